@@ -4,6 +4,9 @@ from datetime import datetime, timedelta
 import logging
 from ..config import settings
 from ..services.performance_analytics import performance_analytics_service
+from ..services.transcript_cache import transcript_cache
+from ..services.llm_cache import llm_cache
+from ..services.lambda_service import lambda_service
 
 # Configure logging
 logging.basicConfig(level=settings.log_level)
@@ -99,3 +102,30 @@ async def generate_performance_report(
             status_code=500,
             detail=f"Error generating performance report: {str(e)}"
         )
+
+@router.get("/cache/transcripts")
+async def get_transcript_cache_stats():
+    """
+    Get transcript cache hit/miss counts and the audio minutes saved
+    """
+    logger.info("Getting transcript cache statistics")
+    
+    return transcript_cache.get_stats()
+
+@router.get("/cache/llm")
+async def get_llm_cache_stats():
+    """
+    Get LLM response cache hit/miss counts and the model latency saved
+    """
+    logger.info("Getting LLM response cache statistics")
+    
+    return llm_cache.get_stats()
+
+@router.get("/lambda/latency")
+async def get_lambda_latency_stats():
+    """
+    Get per-function Lambda latency histograms, timeouts and hedged requests
+    """
+    logger.info("Getting Lambda latency statistics")
+    
+    return lambda_service.get_latency_stats()
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Query
 from typing import List, Optional
+import asyncio
 import uuid
 import os
 import logging
@@ -9,6 +10,8 @@ from ..database import db, create_item, get_item, update_item, list_items
 from ..services.storage import storage_service
 from ..services.content_analysis import content_analysis_service
 from ..services.video_processing import video_processing_service
+from ..services.segment_search import segment_search_service
+from ..services.text_search import text_search_index
 from ..services.auth import get_current_user
 
 # Configure logging
@@ -264,3 +267,48 @@ async def get_template(template_id: str):
         )
     
     return template
+
+@router.get("/search/text")
+async def search_text(
+    user_id: str = Query(...),
+    q: str = Query(..., min_length=1),
+    top_k: int = Query(10, ge=1, le=100)
+):
+    """
+    Full-text search of a user's transcripts, summaries and keywords.
+    Supports "quoted phrases" and prefix* terms
+    """
+    logger.info(f"Text search for user {user_id}")
+    
+    try:
+        results = await asyncio.to_thread(text_search_index.search, user_id, q, top_k)
+    except Exception as e:
+        logger.error(f"Error in text search: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error in text search: {str(e)}"
+        )
+    
+    return {"results": results}
+
+@router.get("/search")
+async def search_segments(
+    user_id: str = Query(...),
+    q: str = Query(..., min_length=1),
+    top_k: int = Query(10, ge=1, le=100)
+):
+    """
+    Search the segments of a user's analyzed content by meaning
+    """
+    logger.info(f"Searching segments for user {user_id}")
+    
+    try:
+        results = await asyncio.to_thread(segment_search_service.search, user_id, q, top_k)
+    except Exception as e:
+        logger.error(f"Error searching segments: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error searching segments: {str(e)}"
+        )
+    
+    return {"results": results}
@@ -34,6 +34,30 @@ class Settings(BaseSettings):
     
     # AWS Lambda Settings
     lambda_function_name: str = os.getenv("LAMBDA_FUNCTION_NAME", "video-processing")
+    engagement_prediction_lambda: str = os.getenv("ENGAGEMENT_PREDICTION_LAMBDA", "engagement-prediction")
+    model_training_lambda: str = os.getenv("MODEL_TRAINING_LAMBDA", "engagement-model-training")
+    engagement_prediction_backend: str = os.getenv("ENGAGEMENT_PREDICTION_BACKEND", "lambda")  # lambda or local
+    local_lambda_latency_seconds: float = 0.0
+    engagement_batch_max_size: int = 64
+    engagement_batch_window_seconds: float = 0.02
+    lambda_max_concurrency: int = 16  # Invoker threads and pooled connections
+    lambda_connect_timeout_seconds: float = 2.0
+    lambda_max_attempts: int = 2  # Per invoke, for idempotent calls; training is never retried
+    lambda_prediction_timeout_seconds: float = 5.0
+    lambda_model_info_timeout_seconds: float = 5.0
+    lambda_training_timeout_seconds: float = 300.0
+    lambda_hedge_enabled: bool = os.getenv("LAMBDA_HEDGE_ENABLED", "false").lower() == "true"
+    lambda_hedge_after_seconds: float = 0.5  # Hedge delay until enough latencies are known
+    lambda_hedge_percentile: float = 95.0
+    lambda_hedge_min_delay_seconds: float = 0.05
+    lambda_hedge_min_samples: int = 20
+    
+    # Engagement Model Settings
+    engagement_scoring_backend: str = os.getenv("ENGAGEMENT_SCORING_BACKEND", "local")  # local or lambda
+    engagement_training_backend: str = os.getenv("ENGAGEMENT_TRAINING_BACKEND", "lambda")  # lambda or local
+    engagement_model_version: str = os.getenv("ENGAGEMENT_MODEL_VERSION", "")  # Empty for the last published model
+    engagement_model_ridge: float = 0.01
+    engagement_model_min_holdout_r2: float = 0.0  # Trained models below this are stored but not activated
     
     # Video Processing Settings
     max_video_size_mb: int = 500
@@ -45,6 +69,97 @@ class Settings(BaseSettings):
     tiktok_aspect_ratios: list[str] = ["9:16", "1:1", "16:9"]
     default_tiktok_aspect_ratio: str = "9:16"
     
+    # Segment Selection Settings
+    segment_selection_resolution_seconds: float = 0.5
+    segment_selection_importance_weight: float = 0.5
+    
+    # Audio Analysis Settings
+    enable_audio_segmentation: bool = os.getenv("ENABLE_AUDIO_SEGMENTATION", "False").lower() == "true"
+    audio_analysis_sample_rate: int = 8000
+    audio_analysis_frame_ms: int = 32
+    audio_analysis_block_seconds: float = 30.0
+    audio_silence_margin_db: float = 12.0
+    audio_max_noise_floor_db: float = -50.0
+    audio_min_silence_seconds: float = 0.35
+    audio_min_speech_seconds: float = 0.15
+    audio_boundary_max_shift_seconds: float = 1.5
+    
+    # Cache Settings
+    cache_dir: str = os.getenv("CACHE_DIR", "/tmp/video-accelerator-cache")
+    transcript_cache_max_bytes: int = 256 * 1024 * 1024
+    llm_cache_max_bytes: int = 64 * 1024 * 1024
+    stage_cache_max_bytes: int = 256 * 1024 * 1024
+    keyword_corpus_cache_max_bytes: int = 256 * 1024 * 1024
+    
+    # Audio Extraction Settings
+    audio_extraction_stream_copy: bool = True
+    audio_extraction_profile: str = "opus"  # opus or flac
+    audio_extract_cache_entries: int = 8
+    
+    # Transcription Settings
+    transcription_backend: str = os.getenv("TRANSCRIPTION_BACKEND", "openai")  # openai or local
+    transcription_model: str = "whisper-1"
+    local_transcription_latency_factor: float = 0.0
+    transcription_chunk_max_seconds: float = 600.0
+    transcription_chunk_max_bytes: int = 24 * 1024 * 1024
+    transcription_chunk_overlap_seconds: float = 2.0
+    transcription_max_concurrency: int = 4
+    transcript_store_cache_entries: int = 64  # Deserialized word transcripts kept in memory
+    
+    # Frame Sampling Settings
+    frame_sampler_width: int = 128
+    frame_sampler_height: int = 72
+    frame_sampler_fps: float = 2.0
+    frame_sampler_ring_size: int = 8
+    
+    # Text Analysis Settings
+    analysis_llm_backend: str = os.getenv("ANALYSIS_LLM_BACKEND", "openai")  # openai or local
+    analysis_model: str = os.getenv("ANALYSIS_MODEL", "gpt-4")
+    local_llm_latency_seconds: float = 0.0
+    llm_tokens_per_minute: int = int(os.getenv("LLM_TOKENS_PER_MINUTE", "40000"))
+    llm_max_concurrency: int = 8
+    llm_batch_max_tokens: int = 3000
+    llm_batch_max_documents: int = 6
+    llm_batch_window_seconds: float = 0.05
+    llm_output_tokens_per_document: int = 500
+    llm_overload_queue_seconds: float = 10.0
+    llm_map_reduce_threshold_tokens: int = 3000
+    llm_chunk_tokens: int = 2500
+    keyword_ngram_max: int = 2
+    
+    # Google Video Intelligence Settings
+    video_intelligence_gcs_bucket: str = os.getenv("VIDEO_INTELLIGENCE_GCS_BUCKET", "")
+    video_intelligence_timeout_seconds: float = 300.0
+    video_intelligence_poll_interval_seconds: float = 5.0
+    gcs_upload_chunk_bytes: int = 8 * 1024 * 1024
+    
+    # Visual Scoring Settings
+    enable_visual_scoring: bool = os.getenv("ENABLE_VISUAL_SCORING", "False").lower() == "true"
+    visual_scoring_fps: float = 2.0
+    visual_scoring_max_realtime_fraction: float = 0.05
+    visual_scoring_skip_frame: str = "bidir"  # Decoder frame skipping: bidir, nokey or empty for none
+    
+    # Segment Search Settings
+    segment_search_embedder: str = os.getenv("SEGMENT_SEARCH_EMBEDDER", "hashing")
+    segment_search_dimensions: int = 256
+    segment_search_hash_buckets: int = 4096
+    segment_search_ivf_min_vectors: int = 50000  # 0 disables the partitioned index
+    segment_search_ivf_lists: int = 128
+    segment_search_ivf_probes: int = 8
+    
+    # Text Search Settings
+    text_search_bm25_k1: float = 1.2
+    text_search_bm25_b: float = 0.75
+    text_search_max_prefix_expansions: int = 50
+    
+    # Duplicate Detection Settings
+    duplicate_shingle_words: int = 3
+    duplicate_minhash_bands: int = 16
+    duplicate_minhash_rows: int = 4
+    duplicate_similarity_threshold: float = 0.6
+    duplicate_min_words: int = 8
+    exclude_duplicate_segments: bool = os.getenv("EXCLUDE_DUPLICATE_SEGMENTS", "False").lower() == "true"
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
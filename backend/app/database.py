@@ -16,6 +16,16 @@ class InMemoryDB:
         self.brand_assets: Dict[str, Dict] = {}
         self.video_processing_results: Dict[str, Dict] = {}
         self.performance_metrics: Dict[str, Dict] = {}
+        self.transcripts: Dict[str, bytes] = {}
+        self.revisions: Dict[int, int] = {}
+    
+    def revision(self, table: Dict) -> int:
+        """Get the write counter of a table, so derived indexes know when to rebuild"""
+        return self.revisions.get(id(table), 0)
+    
+    def touch(self, table: Dict) -> None:
+        """Record a write to a table"""
+        self.revisions[id(table)] = self.revision(table) + 1
 
 # Create a global database instance
 db = InMemoryDB()
@@ -28,40 +38,61 @@ def initialize_templates():
             "name": "TikTok Explainer",
             "description": "Clean, text-focused template for educational content",
             "aspect_ratio": "9:16",
-            "suitable_content_types": ["educational", "tutorial"]
+            "suitable_content_types": ["educational", "tutorial"],
+            "pace": 0.4,
+            "ideal_segment_count": 4,
+            "ideal_duration_seconds": 45,
+            "tags": ["explainer", "education", "learning", "tips", "text"]
         },
         {
             "id": str(uuid.uuid4()),
             "name": "Dynamic Promo",
             "description": "Fast-paced template with motion graphics for promotional content",
             "aspect_ratio": "9:16",
-            "suitable_content_types": ["promotional", "entertainment"]
+            "suitable_content_types": ["promotional", "entertainment"],
+            "pace": 0.9,
+            "ideal_segment_count": 6,
+            "ideal_duration_seconds": 30,
+            "tags": ["product", "launch", "promo", "sale", "brand"]
         },
         {
             "id": str(uuid.uuid4()),
             "name": "Interview Highlights",
             "description": "Template for showcasing key moments from interviews",
             "aspect_ratio": "9:16",
-            "suitable_content_types": ["interview", "educational"]
+            "suitable_content_types": ["interview", "educational"],
+            "pace": 0.3,
+            "ideal_segment_count": 3,
+            "ideal_duration_seconds": 60,
+            "tags": ["interview", "conversation", "guest", "story", "podcast"]
         },
         {
             "id": str(uuid.uuid4()),
             "name": "Tutorial Steps",
             "description": "Step-by-step format for tutorials with clear instructions",
             "aspect_ratio": "9:16",
-            "suitable_content_types": ["tutorial", "educational"]
+            "suitable_content_types": ["tutorial", "educational"],
+            "pace": 0.5,
+            "ideal_segment_count": 5,
+            "ideal_duration_seconds": 60,
+            "tags": ["tutorial", "steps", "how to", "guide", "setup"]
         },
         {
             "id": str(uuid.uuid4()),
             "name": "Presentation Clips",
             "description": "Template for converting presentation slides to engaging videos",
             "aspect_ratio": "9:16",
-            "suitable_content_types": ["presentation", "educational"]
+            "suitable_content_types": ["presentation", "educational"],
+            "pace": 0.3,
+            "ideal_segment_count": 3,
+            "ideal_duration_seconds": 45,
+            "tags": ["presentation", "slides", "talk", "conference", "keynote"]
         }
     ]
     
     for template in templates:
         db.video_templates[template["id"]] = template
+    db.touch(db.video_templates)
 
 # Generic CRUD operations
 async def create_item(table: Dict[str, Dict], item: BaseModel) -> Dict:
@@ -70,6 +101,7 @@ async def create_item(table: Dict[str, Dict], item: BaseModel) -> Dict:
     if "id" not in item_dict:
         item_dict["id"] = str(uuid.uuid4())
     table[item_dict["id"]] = item_dict
+    db.touch(table)
     return item_dict
 
 async def get_item(table: Dict[str, Dict], item_id: str) -> Optional[Dict]:
@@ -82,6 +114,7 @@ async def update_item(table: Dict[str, Dict], item_id: str, item: Dict[str, Any]
         current_item = table[item_id]
         updated_item = {**current_item, **item, "updated_at": datetime.utcnow()}
         table[item_id] = updated_item
+        db.touch(table)
         return updated_item
     return None
 
@@ -89,6 +122,7 @@ async def delete_item(table: Dict[str, Dict], item_id: str) -> bool:
     """Delete an item from the specified table"""
     if item_id in table:
         del table[item_id]
+        db.touch(table)
         return True
     return False
 
@@ -38,6 +38,7 @@ class VideoSegment(BaseModel):
     keywords: List[str] = []
     importance_score: float = 0.0
     engagement_prediction: float = 0.0
+    visual_features: Dict[str, float] = {}
 
 class VideoTemplate(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -46,6 +47,11 @@ class VideoTemplate(BaseModel):
     aspect_ratio: AspectRatio
     suitable_content_types: List[ContentType]
     preview_url: Optional[HttpUrl] = None
+    user_id: Optional[str] = None  # None for public templates
+    pace: float = 0.5  # 0 = slow, 1 = fast cutting
+    ideal_segment_count: int = 3
+    ideal_duration_seconds: int = 30
+    tags: List[str] = []
 
 class BrandAsset(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -86,6 +92,9 @@ class ContentAnalysisResult(BaseModel):
     summary: str
     recommended_templates: List[str] = []
     engagement_prediction: float
+    duplicate_segments: List[Dict[str, Any]] = []
+    stage_cache: Dict[str, bool] = {}
+    stage_timings: Dict[str, float] = {}
     
 class VideoProcessingRequest(BaseModel):
     content_id: str
@@ -93,6 +102,13 @@ class VideoProcessingRequest(BaseModel):
     template_id: str
     brand_assets_ids: List[str] = []
     custom_settings: Dict[str, Any] = {}
+    
+    @validator('custom_settings')
+    def validate_custom_settings(cls, v):
+        max_duration = v.get('max_duration')
+        if max_duration is not None and (isinstance(max_duration, bool) or not isinstance(max_duration, (int, float)) or max_duration <= 0):
+            raise ValueError('max_duration must be a positive number of seconds')
+        return v
 
 class VideoProcessingResult(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+from ..config import settings
+from .disk_cache import DiskCache
+
+# Configure logging
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
+
+class StageMemo:
+    """
+    Persisted outputs of analysis pipeline stages.
+    
+    A stage's output is stored under its name and a fingerprint of everything it
+    consumes (upstream outputs, prompt and model versions, configuration). When a
+    re-run produces the same fingerprint the stored output is reused; when any input
+    changes only that stage and the stages keyed on its output are recomputed.
+    """
+    
+    def __init__(self):
+        self.cache = DiskCache(
+            os.path.join(settings.cache_dir, "stages"),
+            settings.stage_cache_max_bytes
+        )
+    
+    @staticmethod
+    def fingerprint(*parts: Any) -> str:
+        """
+        Fingerprint stage inputs.
+        
+        Args:
+            parts: JSON-serializable inputs
+        
+        Returns:
+            Hex digest of the canonical JSON of the inputs
+        """
+        return DiskCache.make_key(*[json.dumps(part, sort_keys=True, default=str) for part in parts])
+    
+    async def run(
+        self,
+        name: str,
+        fingerprint: str,
+        compute: Callable[[], Awaitable[Any]],
+        cache_hits: Dict[str, bool],
+        cacheable: Optional[Callable[[Any], bool]] = None,
+        timings: Optional[Dict[str, float]] = None
+    ) -> Any:
+        """
+        Get a stage's output, computing and storing it only on a miss.
+        
+        Args:
+            name: Stage name
+            fingerprint: Fingerprint of the stage inputs
+            compute: Coroutine function producing the output
+            cache_hits: Per-stage hit record to update
+            cacheable: Predicate deciding whether a computed output may be stored (optional)
+            timings: Per-stage wall-clock seconds to update (optional)
+        
+        Returns:
+            Stage output
+        """
+        started = time.perf_counter()
+        try:
+            # Cache files are read and written off the event loop so concurrent stages keep overlapping
+            key = DiskCache.make_key("stage", name, fingerprint)
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                logger.info(f"Reusing output of stage: {name}")
+                cache_hits[name] = True
+                return cached["output"]
+            
+            output = await compute()
+            cache_hits[name] = False
+            
+            if cacheable is None or cacheable(output):
+                try:
+                    await asyncio.to_thread(self.cache.set, key, {"output": output})
+                except Exception as e:
+                    logger.error(f"Error storing output of stage {name}: {str(e)}")
+            
+            return output
+        finally:
+            if timings is not None:
+                timings[name] = round(time.perf_counter() - started, 6)
+
+# Create global stage memo instance
+stage_memo = StageMemo()
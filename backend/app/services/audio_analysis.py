@@ -0,0 +1,312 @@
+import asyncio
+import bisect
+import logging
+import os
+import subprocess
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+import numpy as np
+from ..config import settings
+from .ffmpeg import find_ffmpeg
+
+# Configure logging
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
+
+class AudioAnalysisService:
+    def __init__(self):
+        self.ffmpeg_path = find_ffmpeg()
+        self.sample_rate = settings.audio_analysis_sample_rate
+        self.frame_size = max(int(self.sample_rate * settings.audio_analysis_frame_ms / 1000), 32)
+        self.frame_seconds = self.frame_size / self.sample_rate
+        # Blocks always hold a whole number of frames so only the FFT state carries over
+        self.block_frames = max(int(settings.audio_analysis_block_seconds / self.frame_seconds), 1)
+        self.window = np.hanning(self.frame_size).astype(np.float32)
+    
+    async def detect_speech_intervals(self, media_path: str) -> Dict[str, Any]:
+        """
+        Detect speech and silence intervals in the audio track of a media file.
+        
+        Args:
+            media_path: Path to a local audio or video file
+        
+        Returns:
+            Dictionary with 'speech' and 'silence' interval lists and the audio duration
+        """
+        logger.info(f"Detecting speech intervals for: {media_path}")
+        
+        if not self.ffmpeg_path or not os.path.exists(media_path):
+            logger.warning("Audio segmentation unavailable (no FFMPEG or missing file)")
+            return {"speech": [], "silence": [], "duration": 0.0, "success": False}
+        
+        try:
+            # Decoding and feature extraction are CPU/IO bound, keep them off the event loop
+            return await asyncio.to_thread(self._scan_intervals, media_path)
+        except Exception as e:
+            logger.error(f"Error detecting speech intervals: {str(e)}")
+            return {"speech": [], "silence": [], "duration": 0.0, "success": False, "error": str(e)}
+    
+    def iter_pcm_blocks(self, media_path: str) -> Iterator[np.ndarray]:
+        """
+        Stream mono PCM from ffmpeg in fixed-size blocks.
+        
+        The same read buffer is reused for every block, so memory use is bounded by
+        the block size no matter how long the source is. Each yielded array is only
+        valid until the next block is requested.
+        
+        Args:
+            media_path: Path to a local audio or video file
+        
+        Yields:
+            float32 arrays of samples in [-1, 1], each a whole number of frames
+            (the final block may be shorter)
+        """
+        command = [
+            self.ffmpeg_path,
+            "-nostdin",
+            "-v", "error",
+            "-i", media_path,
+            "-vn",
+            "-ac", "1",
+            "-ar", str(self.sample_rate),
+            "-f", "s16le",
+            "-"
+        ]
+        
+        block_samples = self.block_frames * self.frame_size
+        raw = bytearray(block_samples * 2)
+        view = memoryview(raw)
+        samples = np.empty(block_samples, dtype=np.float32)
+        
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        try:
+            while True:
+                filled = 0
+                while filled < len(raw):
+                    count = process.stdout.readinto(view[filled:])
+                    if not count:
+                        break
+                    filled += count
+                
+                filled -= filled % 2
+                if filled == 0:
+                    break
+                
+                count = filled // 2
+                np.multiply(np.frombuffer(raw, dtype=np.int16, count=count), 1.0 / 32768.0, out=samples[:count], casting="unsafe")
+                yield samples[:count]
+                
+                if filled < len(raw):
+                    break
+        finally:
+            process.stdout.close()
+            process.kill()
+            process.wait()
+    
+    def compute_frame_features(self, samples: np.ndarray, previous_spectrum: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        """
+        Compute frame-level RMS level and spectral flux for a block of samples.
+        
+        Args:
+            samples: Mono float32 samples; a trailing partial frame is zero padded
+            previous_spectrum: Magnitude spectrum of the last frame of the previous block
+        
+        Returns:
+            Tuple of (rms level in dBFS per frame, normalized spectral flux per frame,
+            magnitude spectrum of the last frame)
+        """
+        frame_count = -(-len(samples) // self.frame_size)
+        if frame_count == 0:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.float32), previous_spectrum
+        
+        padded = len(samples) != frame_count * self.frame_size
+        if padded:
+            samples = np.pad(samples, (0, frame_count * self.frame_size - len(samples)))
+        frames = samples.reshape(frame_count, self.frame_size)
+        
+        rms = np.sqrt(np.mean(np.square(frames), axis=1))
+        level_db = 20.0 * np.log10(rms + 1e-10)
+        
+        spectrum = np.abs(np.fft.rfft(frames * self.window, axis=1)).astype(np.float32)
+        if previous_spectrum is None:
+            previous_spectrum = spectrum[:1]
+        else:
+            previous_spectrum = previous_spectrum[np.newaxis, :]
+        
+        # Positive spectral change relative to the frame energy, so onsets register at any volume
+        delta = np.diff(np.concatenate([previous_spectrum, spectrum]), axis=0)
+        flux = np.maximum(delta, 0.0).sum(axis=1) / (spectrum.sum(axis=1) + 1e-6)
+        
+        return level_db.astype(np.float32), flux.astype(np.float32), spectrum[-1]
+    
+    def _scan_intervals(self, media_path: str) -> Dict[str, Any]:
+        """
+        Classify frames as speech or silence block by block and merge them into intervals.
+        
+        Args:
+            media_path: Path to a local audio or video file
+        
+        Returns:
+            Dictionary with 'speech' and 'silence' interval lists and the audio duration
+        """
+        min_silence_frames = max(int(round(settings.audio_min_silence_seconds / self.frame_seconds)), 1)
+        min_speech_frames = max(int(round(settings.audio_min_speech_seconds / self.frame_seconds)), 1)
+        
+        silences: List[Tuple[int, int]] = []
+        noise_floor: Optional[float] = None
+        previous_spectrum = None
+        silence_start: Optional[int] = None
+        frame_offset = 0
+        
+        for block in self.iter_pcm_blocks(media_path):
+            level_db, flux, previous_spectrum = self.compute_frame_features(block, previous_spectrum)
+            if len(level_db) == 0:
+                continue
+            
+            # Track the noise floor as a smoothed low percentile, dropping immediately on quieter blocks
+            block_floor = float(np.percentile(level_db, 10))
+            if noise_floor is None or block_floor < noise_floor:
+                noise_floor = block_floor
+            else:
+                noise_floor = 0.8 * noise_floor + 0.2 * block_floor
+            # A block of continuous speech has no quiet frames, so cap the estimate at a plausible room level
+            noise_floor = min(noise_floor, settings.audio_max_noise_floor_db)
+            
+            threshold = max(noise_floor + settings.audio_silence_margin_db, -60.0)
+            is_speech = (level_db > threshold) | ((flux > 0.5) & (level_db > threshold - settings.audio_silence_margin_db / 2))
+            
+            # Run-length encode the block; the number of runs is tiny compared to the frame count
+            change_points = np.flatnonzero(is_speech[1:] != is_speech[:-1]) + 1
+            run_starts = np.concatenate(([0], change_points))
+            run_ends = np.concatenate((change_points, [len(is_speech)]))
+            
+            for run_start, run_end in zip(run_starts.tolist(), run_ends.tolist()):
+                start = frame_offset + run_start
+                if not is_speech[run_start]:
+                    if silence_start is None:
+                        silence_start = start
+                elif silence_start is not None and run_end - run_start >= min_speech_frames:
+                    if start - silence_start >= min_silence_frames:
+                        silences.append((silence_start, start))
+                    silence_start = None
+            
+            frame_offset += len(level_db)
+        
+        if silence_start is not None and frame_offset - silence_start >= min_silence_frames:
+            silences.append((silence_start, frame_offset))
+        
+        duration = frame_offset * self.frame_seconds
+        silence_intervals = [
+            {"start_time": round(start * self.frame_seconds, 3), "end_time": round(end * self.frame_seconds, 3)}
+            for start, end in silences
+        ]
+        
+        # Speech is the complement of the detected silences
+        speech_intervals = []
+        cursor = 0.0
+        for interval in silence_intervals:
+            if interval["start_time"] > cursor:
+                speech_intervals.append({"start_time": round(cursor, 3), "end_time": interval["start_time"]})
+            cursor = interval["end_time"]
+        if duration > cursor:
+            speech_intervals.append({"start_time": round(cursor, 3), "end_time": round(duration, 3)})
+        
+        logger.info(f"Detected {len(speech_intervals)} speech and {len(silence_intervals)} silence intervals")
+        return {
+            "speech": speech_intervals,
+            "silence": silence_intervals,
+            "duration": round(duration, 3),
+            "success": True
+        }
+    
+    def refine_segment_boundaries(
+        self,
+        segments: List[Dict[str, Any]],
+        silence_intervals: List[Dict[str, Any]],
+        max_shift: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Snap segment boundaries to the nearest speech pause.
+        
+        Args:
+            segments: List of video segments
+            silence_intervals: Silence intervals from detect_speech_intervals
+            max_shift: Maximum distance in seconds a boundary may move (optional)
+        
+        Returns:
+            New list of segments with adjusted start and end times
+        """
+        if not segments or not silence_intervals:
+            return segments
+        
+        if max_shift is None:
+            max_shift = settings.audio_boundary_max_shift_seconds
+        
+        pause_points = [(interval["start_time"] + interval["end_time"]) / 2 for interval in silence_intervals]
+        
+        def snap(point: float) -> float:
+            index = bisect.bisect_left(pause_points, point)
+            candidates = pause_points[max(index - 1, 0):index + 1]
+            nearest = min(candidates, key=lambda candidate: abs(candidate - point))
+            return nearest if abs(nearest - point) <= max_shift else point
+        
+        refined = []
+        for segment in segments:
+            start_time = snap(segment.get("start_time", 0.0))
+            end_time = snap(segment.get("end_time", 0.0))
+            if end_time <= start_time:
+                start_time, end_time = segment.get("start_time", 0.0), segment.get("end_time", 0.0)
+            refined.append({**segment, "start_time": round(start_time, 3), "end_time": round(end_time, 3)})
+        
+        return refined
+    
+    def segments_from_speech(
+        self,
+        speech_intervals: List[Dict[str, Any]],
+        min_duration: float = 5.0,
+        max_duration: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Group speech intervals into segments that start and end on pauses.
+        
+        Args:
+            speech_intervals: Speech intervals from detect_speech_intervals
+            min_duration: Minimum segment duration in seconds
+            max_duration: Maximum segment duration in seconds (optional)
+        
+        Returns:
+            List of video segments without transcripts
+        """
+        if max_duration is None:
+            max_duration = float(settings.tiktok_video_max_length_seconds)
+        
+        segments = []
+        current_start = None
+        current_end = None
+        
+        for interval in speech_intervals:
+            if current_start is None:
+                current_start, current_end = interval["start_time"], interval["end_time"]
+                continue
+            
+            if interval["end_time"] - current_start > max_duration and current_end - current_start >= min_duration:
+                segments.append((current_start, current_end))
+                current_start = interval["start_time"]
+            current_end = interval["end_time"]
+        
+        if current_start is not None:
+            segments.append((current_start, current_end))
+        
+        return [
+            {
+                "start_time": start,
+                "end_time": end,
+                "transcript": "",
+                "keywords": [],
+                "importance_score": 0.5,
+                "engagement_prediction": 0.5
+            }
+            for start, end in segments
+        ]
+
+# Create global audio analysis service instance
+audio_analysis_service = AudioAnalysisService()
@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import os
+import re
+import subprocess
+import tempfile
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Any, Optional, Set, Tuple
+from ..config import settings
+from .ffmpeg import find_ffmpeg
+
+# Configure logging
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
+
+# Source codecs the transcription backend accepts as-is, with the container to copy them into
+STREAM_COPY_CONTAINERS = {
+    "aac": ("m4a", "ipod"),
+    "mp3": ("mp3", "mp3"),
+    "opus": ("ogg", "ogg"),
+    "vorbis": ("ogg", "ogg"),
+    "flac": ("flac", "flac")
+}
+
+# Compact speech profiles: 16 kHz mono is all speech recognition uses
+SPEECH_PROFILES = {
+    "opus": {
+        "extension": "ogg",
+        "args": ["-c:a", "libopus", "-b:a", "24k", "-application", "voip", "-compression_level", "0", "-f", "ogg"]
+    },
+    "flac": {
+        "extension": "flac",
+        "args": ["-c:a", "flac", "-compression_level", "0", "-f", "flac"]
+    }
+}
+
+class AudioExtractionService:
+    """
+    Extract the audio track of a video once and share it between consumers.
+    
+    Extracts are cached per source file (path, size and modification time), so
+    transcription, silence detection and waveform features reuse one file. The
+    cache holds a bounded number of extracts; the oldest unused one is deleted when
+    it is full, and owners of a source file should call release() when they delete
+    it. Consumers read extracts inside use(), which pins the file so neither
+    eviction nor release() deletes it until the last reader is done.
+    """
+    
+    def __init__(self):
+        self.ffmpeg_path = find_ffmpeg()
+        self._extracts: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+        self._pending: Dict[Tuple[str, int, int], asyncio.Future] = {}
+        self._pins: Dict[str, int] = {}
+        self._released: Set[str] = set()
+    
+    def _source_key(self, media_path: str) -> Tuple[str, int, int]:
+        stat = os.stat(media_path)
+        return os.path.realpath(media_path), stat.st_size, stat.st_mtime_ns
+    
+    def probe(self, media_path: str) -> Dict[str, Any]:
+        """
+        Read the audio codec and duration of a media file from the ffmpeg header dump.
+        
+        Args:
+            media_path: Path to a local media file
+        
+        Returns:
+            Dictionary with 'codec' (None without an audio stream) and 'duration' (None if unknown)
+        """
+        process = subprocess.run([self.ffmpeg_path, "-hide_banner", "-i", media_path], capture_output=True, text=True)
+        
+        codec_match = re.search(r"Stream #\S+.*?: Audio: (\w+)", process.stderr)
+        duration_match = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", process.stderr)
+        
+        duration = None
+        if duration_match:
+            hours, minutes, seconds = duration_match.groups()
+            duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+        
+        return {
+            "codec": codec_match.group(1) if codec_match else None,
+            "duration": duration
+        }
+    
+    @asynccontextmanager
+    async def use(self, media_path: str) -> AsyncIterator[Optional[str]]:
+        """
+        Get the extract of a media file and keep it on disk while the block runs.
+        
+        Args:
+            media_path: Path to a local audio or video file
+        
+        Yields:
+            Path to the extracted audio file or None if extraction failed
+        """
+        audio_path = await self.extract(media_path)
+        if audio_path is None:
+            yield None
+            return
+        
+        self._pins[audio_path] = self._pins.get(audio_path, 0) + 1
+        try:
+            yield audio_path
+        finally:
+            self._pins[audio_path] -= 1
+            if not self._pins[audio_path]:
+                del self._pins[audio_path]
+                if audio_path in self._released:
+                    self._released.discard(audio_path)
+                    self._remove(audio_path)
+                self._evict()
+    
+    async def extract(self, media_path: str) -> Optional[str]:
+        """
+        Get a compact audio file for a media file, extracting it on first use.
+        
+        The file is only guaranteed to exist until the next extraction; use use()
+        to keep it while reading.
+        
+        Args:
+            media_path: Path to a local audio or video file
+        
+        Returns:
+            Path to the extracted audio file or None if extraction failed
+        """
+        if not self.ffmpeg_path or not os.path.exists(media_path):
+            return None
+        
+        key = self._source_key(media_path)
+        while True:
+            cached = self._extracts.get(key)
+            if cached and os.path.exists(cached):
+                self._extracts.move_to_end(key)
+                return cached
+            
+            # Concurrent consumers of the same source wait for a single extraction
+            pending = self._pending.get(key)
+            if pending is None:
+                break
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # Only a cancelled leader is retried; our own cancellation propagates
+                if not pending.cancelled():
+                    raise
+        
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            audio_path = await asyncio.to_thread(self._extract, media_path)
+            if audio_path:
+                self._store(key, audio_path)
+            future.set_result(audio_path)
+            return audio_path
+        except Exception as e:
+            logger.error(f"Error extracting audio: {str(e)}")
+            future.set_result(None)
+            return None
+        finally:
+            del self._pending[key]
+            # The leader was cancelled: wake the waiters so one of them extracts instead
+            if not future.done():
+                future.cancel()
+    
+    def _extract(self, media_path: str) -> Optional[str]:
+        """
+        Stream-copy the audio track when the backend accepts its codec, otherwise
+        transcode it to the compact speech profile.
+        
+        Args:
+            media_path: Path to a local audio or video file
+        
+        Returns:
+            Path to the extracted audio file or None if failed
+        """
+        codec = self.probe(media_path)["codec"]
+        if not codec:
+            logger.warning(f"No audio stream found in: {media_path}")
+            return None
+        
+        if settings.audio_extraction_stream_copy and codec in STREAM_COPY_CONTAINERS:
+            extension, container = STREAM_COPY_CONTAINERS[codec]
+            output_args = ["-c:a", "copy", "-f", container]
+            mode = "stream copy"
+        else:
+            profile = SPEECH_PROFILES.get(settings.audio_extraction_profile, SPEECH_PROFILES["opus"])
+            extension = profile["extension"]
+            output_args = ["-ac", "1", "-ar", "16000"] + profile["args"]
+            mode = f"{settings.audio_extraction_profile} transcode"
+        
+        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{extension}") as temp_file:
+            audio_path = temp_file.name
+        
+        command = [
+            self.ffmpeg_path,
+            "-nostdin",
+            "-y",
+            "-v", "error",
+            "-i", media_path,
+            "-vn",
+            "-map", "0:a:0"
+        ] + output_args + [audio_path]
+        
+        process = subprocess.run(command, capture_output=True, text=True)
+        if process.returncode != 0:
+            logger.error(f"FFMPEG error: {process.stderr}")
+            if os.path.exists(audio_path):
+                os.remove(audio_path)
+            return None
+        
+        logger.info(f"Audio extracted ({mode} from {codec}) to: {audio_path}")
+        return audio_path
+    
+    def _store(self, key: Tuple[str, int, int], audio_path: str) -> None:
+        self._extracts[key] = audio_path
+        self._extracts.move_to_end(key)
+        self._evict(keep=key)
+    
+    def _evict(self, keep: Optional[Tuple[str, int, int]] = None) -> None:
+        """Delete the oldest unpinned extracts (other than keep) until the cache is within its size"""
+        excess = len(self._extracts) - max(settings.audio_extract_cache_entries, 1)
+        candidates = [key for key, audio_path in self._extracts.items() if audio_path not in self._pins and key != keep]
+        for key in candidates[:max(excess, 0)]:
+            self._remove(self._extracts.pop(key))
+    
+    def release(self, media_path: str) -> None:
+        """
+        Delete the cached extracts of a media file, e.g. before the file itself is removed.
+        
+        Args:
+            media_path: Path to the source media file
+        """
+        real_path = os.path.realpath(media_path)
+        for key in [key for key in self._extracts if key[0] == real_path]:
+            audio_path = self._extracts.pop(key)
+            if audio_path in self._pins:
+                # Deleted when its last reader is done
+                self._released.add(audio_path)
+            else:
+                self._remove(audio_path)
+    
+    def _remove(self, audio_path: str) -> None:
+        try:
+            os.remove(audio_path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Error removing extracted audio file: {str(e)}")
+
+# Create global audio extraction service instance
+audio_extraction_service = AudioExtractionService()
@@ -1,23 +1,64 @@
+import asyncio
+import base64
 import logging
-import json
 import os
+import re
 import tempfile
-from typing import List, Dict, Any, Optional
+import time
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
 import openai
 from google.cloud import videointelligence_v1 as videointelligence
 from ..config import settings
 from ..database import db, create_item, get_item, update_item
 from ..models import ContentAnalysisResult, VideoSegment, ContentType
 from .storage import storage_service
+from .audio_analysis import audio_analysis_service
+from .audio_extraction import audio_extraction_service
+from .visual_features import visual_feature_service
+from .transcript_store import WordTranscript, transcript_store
+from .transcription import transcription_service
+from .llm_cache import llm_cache
+from .keyword_engine import keyword_engine
+from .summarizer import extractive_summarizer
+from .template_recommender import template_recommender
+from .analysis_pipeline import stage_memo
+from .segment_search import segment_search_service
+from .text_search import text_search_index
+from .duplicate_detection import duplicate_detector
+from .llm_dispatcher import LLMDispatcher, create_chat_model, estimate_tokens
 
 # Configure logging
 logging.basicConfig(level=settings.log_level)
 logger = logging.getLogger(__name__)
 
+# Bump a stage version whenever its logic changes so memoized outputs are not reused
+SEGMENTS_STAGE_VERSION = "3"
+TEMPLATES_STAGE_VERSION = "1"
+ENGAGEMENT_STAGE_VERSION = "1"
+
+SEGMENT_ERROR_TRANSCRIPT = "Error analyzing video segments."
+
+# Bump the version whenever the prompt changes so cached responses are not reused
+KEYWORDS_SUMMARY_PROMPT_VERSION = "3"
+KEYWORDS_SUMMARY_SYSTEM_PROMPT = "You are a content analysis assistant that extracts keywords and creates summaries from video transcripts."
+KEYWORDS_SUMMARY_PROMPT = """Analyze each of the following video transcripts independently and for each one:
+1. Extract the top 10 most important keywords or phrases
+2. Create a concise summary (max 100 words)
+
+Transcript text is XML-escaped inside each document tag.
+
+{documents}
+
+Format your response as JSON with a 'results' array containing one object per document,
+each with 'id' (the document id), 'keywords' (array) and 'summary' (string) fields.
+"""
+
 class ContentAnalysisService:
     def __init__(self):
         self.openai_client = None
         self.video_intelligence_client = None
+        self.llm_dispatcher = None
         self.initialize_clients()
     
     def initialize_clients(self):
@@ -31,6 +72,11 @@ class ContentAnalysisService:
             else:
                 logger.warning("OpenAI API key not provided, text analysis will be simulated")
             
+            # Route text analysis through the dispatcher for coalescing, batching and rate limits
+            chat_model = create_chat_model(self.openai_client)
+            if chat_model:
+                self.llm_dispatcher = LLMDispatcher(chat_model, KEYWORDS_SUMMARY_SYSTEM_PROMPT, KEYWORDS_SUMMARY_PROMPT)
+            
             # Initialize Google Video Intelligence client
             if settings.enable_google_video_intelligence and os.path.exists(settings.google_application_credentials):
                 try:
@@ -50,12 +96,13 @@ class ContentAnalysisService:
         Args:
             content_id: ID of the content upload record
             s3_key: S3 key of the uploaded video
-            
+        
         Returns:
             Analysis results
         """
         logger.info(f"Analyzing content: {content_id}")
         
+        video_path = None
         try:
             # Get content upload record
             content = await get_item(db.content_uploads, content_id)
@@ -63,29 +110,96 @@ class ContentAnalysisService:
                 logger.error(f"Content not found: {content_id}")
                 return {"error": "Content not found"}
             
-            # Download video for analysis if needed
-            video_path = None
-            if self.video_intelligence_client:
-                # For Google Video Intelligence, we need the local file
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as temp_file:
-                    video_path = temp_file.name
-                
-                download_success = await storage_service.download_file(s3_key, video_path)
-                if not download_success:
-                    logger.warning(f"Failed to download video for analysis, using S3 URL")
-                    video_path = None
+            content_type = content.get("content_type", "")
+            stage_cache: Dict[str, bool] = {}
+            stage_timings: Dict[str, float] = {}
+            
+            # Segments depend on the source media and the media analysis configuration
+            source_fingerprint = await storage_service.get_object_fingerprint(s3_key) or s3_key
+            segments_fingerprint = stage_memo.fingerprint(
+                SEGMENTS_STAGE_VERSION,
+                source_fingerprint,
+                content_type,
+                self._segmentation_config()
+            )
             
-            # Analyze video content
-            segments = await self._analyze_video_segments(content, video_path, s3_key)
+            async def analyze_segments():
+                nonlocal video_path
+                video_path = await self._download_for_analysis(s3_key)
+                return await self._analyze_video_segments(content, video_path, s3_key)
             
-            # Extract keywords and summary
-            keywords, summary = await self._extract_keywords_and_summary(segments, content.get("content_type", ""))
+            # Simulated or degraded segments stand in for a transient failure and are not kept
+            segments_output = await stage_memo.run(
+                "segments",
+                segments_fingerprint,
+                analyze_segments,
+                stage_cache,
+                cacheable=lambda output: output["complete"],
+                timings=stage_timings
+            )
+            segments = segments_output["segments"]
+            
+            # The word transcript is part of the stage output, so it is restored on a hit too
+            if segments_output["word_transcript"]:
+                word_transcript = WordTranscript.from_bytes(base64.b64decode(segments_output["word_transcript"]))
+                await asyncio.to_thread(transcript_store.save, content_id, word_transcript)
+                # Boundaries may have moved onto pauses since words were assigned, so take each segment's words from its final range
+                segments = await asyncio.to_thread(self._segment_transcripts_from_store, content_id, segments)
+            
+            # 'total' covers everything after segmentation, which has its own timing
+            started = time.perf_counter()
             
-            # Recommend templates based on content type and segments
-            recommended_templates = await self._recommend_templates(content.get("content_type", ""), segments)
+            # Later stages are keyed on the segments they consume plus their own inputs
+            segments_digest = stage_memo.fingerprint(segments)
+            
+            # The remaining stages only consume the segments, so they run concurrently
+            keywords_summary, recommended_templates, engagement_prediction = await asyncio.gather(
+                # Extract keywords and summary
+                stage_memo.run(
+                    "keywords_summary",
+                    stage_memo.fingerprint(
+                        KEYWORDS_SUMMARY_PROMPT_VERSION,
+                        segments_digest,
+                        content_type,
+                        content.get("user_id"),
+                        self.llm_dispatcher.model.name if self.llm_dispatcher else None
+                    ),
+                    lambda: self._extract_keywords_and_summary(segments, content_type, content.get("user_id"), content_id),
+                    stage_cache,
+                    # Local fallback results stand in for an unavailable model and are not kept
+                    cacheable=lambda output: output[2] or not self.llm_dispatcher,
+                    timings=stage_timings
+                ),
+                # Recommend templates based on content type and segments
+                stage_memo.run(
+                    "templates",
+                    stage_memo.fingerprint(
+                        TEMPLATES_STAGE_VERSION,
+                        segments_digest,
+                        content_type,
+                        content.get("user_id"),
+                        content.get("preferred_aspect_ratio"),
+                        content.get("preferred_duration"),
+                        template_recommender.catalog_fingerprint()
+                    ),
+                    lambda: self._recommend_templates(content_type, segments, content),
+                    stage_cache,
+                    timings=stage_timings
+                ),
+                # Predict engagement potential
+                stage_memo.run(
+                    "engagement",
+                    stage_memo.fingerprint(ENGAGEMENT_STAGE_VERSION, segments_digest, content_type),
+                    lambda: self._predict_engagement(segments, content_type),
+                    stage_cache,
+                    timings=stage_timings
+                )
+            )
+            keywords, summary, used_model = keywords_summary
             
-            # Predict engagement potential
-            engagement_prediction = await self._predict_engagement(segments, content.get("content_type", ""))
+            # Flag repeats of earlier material; this depends on the library, so it is never memoized
+            duplicate_segments = await asyncio.to_thread(duplicate_detector.add_analysis, content.get("user_id"), content_id, segments)
+            stage_timings["total"] = round(time.perf_counter() - started, 6)
             
             # Create analysis result
             analysis_result = ContentAnalysisResult(
@@ -94,17 +208,20 @@ class ContentAnalysisService:
                 keywords=keywords,
                 summary=summary,
                 recommended_templates=recommended_templates,
-                engagement_prediction=engagement_prediction
+                engagement_prediction=engagement_prediction,
+                duplicate_segments=duplicate_segments,
+                stage_cache=stage_cache,
+                stage_timings=stage_timings
             )
             
             # Save analysis result
-            result_data = await create_item(db.content_analyses, analysis_result)
+            result_data = await self._save_analysis(analysis_result)
             
-            # Clean up temporary file if created
-            if video_path and os.path.exists(video_path):
-                os.remove(video_path)
+            # Make the new segments searchable in the owner's library
+            await asyncio.to_thread(segment_search_service.add_analysis, content.get("user_id"), content_id, segments)
+            await asyncio.to_thread(text_search_index.add_analysis, content.get("user_id"), content_id, segments, summary, keywords)
             
-            logger.info(f"Content analysis completed for: {content_id}")
+            logger.info(f"Content analysis completed for: {content_id} (stage cache: {stage_cache}, stage timings: {stage_timings})")
             return result_data
         except Exception as e:
             logger.error(f"Error analyzing content: {str(e)}")
@@ -118,13 +235,92 @@ class ContentAnalysisService:
                     recommended_templates=[],
                     engagement_prediction=0.0
                 )
-                result_data = await create_item(db.content_analyses, error_result)
+                result_data = await self._save_analysis(error_result)
                 return result_data
             except Exception as inner_e:
                 logger.error(f"Error creating error analysis result: {str(inner_e)}")
                 return {"error": f"Error analyzing content: {str(e)}"}
+        finally:
+            # Clean up temporary file and any audio extracted from it
+            if video_path and os.path.exists(video_path):
+                audio_extraction_service.release(video_path)
+                os.remove(video_path)
+    
+    async def _download_for_analysis(self, s3_key: str) -> Optional[str]:
+        """
+        Download the video when a local copy is needed for analysis.
+        
+        Args:
+            s3_key: S3 key of the uploaded video
+        
+        Returns:
+            Local path to the video or None if not needed or not available
+        """
+        if not self._needs_local_video():
+            return None
+        
+        # For inline Google Video Intelligence and local media analysis, we need the local file
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as temp_file:
+            video_path = temp_file.name
+        
+        download_success = await storage_service.download_file(s3_key, video_path)
+        if not download_success:
+            logger.warning(f"Failed to download video for analysis, using S3 URL")
+            os.remove(video_path)
+            return None
+        
+        return video_path
+    
+    def _needs_local_video(self) -> bool:
+        """Whether segment analysis reads the video from a local file"""
+        inline_video_intelligence = self.video_intelligence_client and not settings.video_intelligence_gcs_bucket
+        return bool(
+            inline_video_intelligence
+            or self._transcribes_locally()
+            or settings.enable_audio_segmentation
+            or settings.enable_visual_scoring
+        )
+    
+    def _transcribes_locally(self) -> bool:
+        """Whether segments come from the transcription service's sentences rather than Video Intelligence shots"""
+        return not self.video_intelligence_client and not transcription_service.simulated
+    
+    def _segmentation_config(self) -> Dict[str, Any]:
+        """
+        Collect the configuration that shapes segment analysis, for stage fingerprints.
+        
+        Returns:
+            Enabled analyzers and their tuning settings
+        """
+        config = {
+            name: value
+            for name, value in settings.model_dump().items()
+            if name.startswith(("audio_analysis_", "audio_silence_", "audio_max_", "audio_min_", "audio_boundary_", "frame_sampler_", "visual_scoring_"))
+        }
+        config["video_intelligence"] = bool(self.video_intelligence_client)
+        if self._transcribes_locally():
+            config["transcription"] = f"{transcription_service.backend.name}:{transcription_service.backend.model}"
+        config["audio_segmentation"] = settings.enable_audio_segmentation
+        config["visual_scoring"] = settings.enable_visual_scoring
+        return config
+    
+    async def _save_analysis(self, analysis_result: ContentAnalysisResult) -> Dict[str, Any]:
+        """
+        Store an analysis result, replacing the content's previous analysis if there is one.
+        
+        Args:
+            analysis_result: Analysis result
+        
+        Returns:
+            Stored analysis record
+        """
+        for analysis in db.content_analyses.values():
+            if analysis.get("content_id") == analysis_result.content_id:
+                return await update_item(db.content_analyses, analysis["id"], analysis_result.dict())
+        
+        return await create_item(db.content_analyses, analysis_result)
     
-    async def _analyze_video_segments(self, content: Dict[str, Any], video_path: Optional[str], s3_key: str) -> List[Dict[str, Any]]:
+    async def _analyze_video_segments(self, content: Dict[str, Any], video_path: Optional[str], s3_key: str) -> Dict[str, Any]:
         """
         Analyze video to identify segments.
         
@@ -132,16 +328,31 @@ class ContentAnalysisService:
             content: Content upload record
             video_path: Local path to video file (if available)
             s3_key: S3 key of the uploaded video
-            
+        
         Returns:
-            List of video segments
+            Dictionary with 'segments', 'word_transcript' (base64 of the serialized word
+            transcript, or None) and 'complete' (False when segments are simulated or an
+            analyzer that should have run did not)
         """
         logger.info(f"Analyzing video segments for content: {content.get('id')}")
         
         segments = []
+        word_transcript = None
+        has_video = bool(video_path and os.path.exists(video_path))
+        complete = has_video or not self._needs_local_video()
         
         try:
-            if self.video_intelligence_client and video_path and os.path.exists(video_path):
+            # Hand Video Intelligence a storage URI so the video is never loaded into memory.
+            # A failed mirror raises and is reported as a segment analysis error.
+            input_uri = None
+            if self.video_intelligence_client and settings.video_intelligence_gcs_bucket:
+                input_uri = await storage_service.mirror_to_gcs(s3_key, settings.video_intelligence_gcs_bucket)
+            
+            use_video_intelligence = bool(self.video_intelligence_client and (input_uri or has_video))
+            if not use_video_intelligence and has_video and self._transcribes_locally():
+                segments, word_transcript = await self._segments_from_transcription(video_path)
+            
+            if use_video_intelligence:
                 # Use Google Video Intelligence API for segment detection
                 logger.info(f"Using Google Video Intelligence API for segment analysis")
                 
@@ -163,66 +374,69 @@ class ContentAnalysisService:
                     speech_transcription_config=speech_config
                 )
                 
-                # Start the asynchronous request
-                with open(video_path, "rb") as file:
-                    input_content = file.read()
+                request = {
+                    "features": features,
+                    "video_context": video_context
+                }
+                if input_uri:
+                    request["input_uri"] = input_uri
+                else:
+                    # Without a storage bucket the API only accepts the file inline
+                    with open(video_path, "rb") as file:
+                        request["input_content"] = file.read()
                 
-                operation = self.video_intelligence_client.annotate_video(
-                    request={
-                        "features": features,
-                        "input_content": input_content,
-                        "video_context": video_context
-                    }
-                )
+                try:
+                    # Start the asynchronous request
+                    operation = await asyncio.to_thread(self.video_intelligence_client.annotate_video, request=request)
+                    request = None  # Release any inline video bytes while the operation runs
+                    
+                    logger.info(f"Waiting for Google Video Intelligence API operation to complete")
+                    result = await self._wait_for_operation(operation, settings.video_intelligence_timeout_seconds)
+                finally:
+                    # The mirror only exists for the annotation request
+                    if input_uri:
+                        await storage_service.release_gcs_mirror(input_uri)
+                
+                # Keep word timings in a columnar transcript so segments can be sliced by time
+                words = []
+                for speech_transcription in result.annotation_results[0].speech_transcriptions:
+                    for alternative in speech_transcription.alternatives:
+                        for word_info in alternative.words:
+                            words.append({
+                                "word": word_info.word,
+                                "start": word_info.start_time.seconds + word_info.start_time.microseconds / 1000000,
+                                "end": word_info.end_time.seconds + word_info.end_time.microseconds / 1000000,
+                                "confidence": word_info.confidence
+                            })
                 
-                logger.info(f"Waiting for Google Video Intelligence API operation to complete")
-                result = operation.result(timeout=300)  # 5-minute timeout
+                word_transcript = WordTranscript.from_words(words)
+                
+                # Flatten label segments in annotation order so shots can look them up by time
+                label_segments = []
+                for label in result.annotation_results[0].segment_label_annotations:
+                    for segment in label.segments:
+                        label_segments.append((
+                            segment.segment.start_time_offset.seconds + segment.segment.start_time_offset.microseconds / 1000000,
+                            segment.segment.end_time_offset.seconds + segment.segment.end_time_offset.microseconds / 1000000,
+                            label.entity.description
+                        ))
                 
                 # Process shot changes to identify segments
-                shot_changes = result.annotation_results[0].shot_annotations
+                shots = [
+                    (
+                        shot.start_time_offset.seconds + shot.start_time_offset.microseconds / 1000000,
+                        shot.end_time_offset.seconds + shot.end_time_offset.microseconds / 1000000
+                    )
+                    for shot in result.annotation_results[0].shot_annotations
+                ]
                 
-                for i, shot in enumerate(shot_changes):
-                    start_time = shot.start_time_offset.seconds + shot.start_time_offset.microseconds / 1000000
-                    end_time = shot.end_time_offset.seconds + shot.end_time_offset.microseconds / 1000000
-                    
-                    # Extract transcript for this segment
-                    transcript = ""
-                    for speech_transcription in result.annotation_results[0].speech_transcriptions:
-                        for alternative in speech_transcription.alternatives:
-                            for word_info in alternative.words:
-                                word_start = word_info.start_time.seconds + word_info.start_time.microseconds / 1000000
-                                word_end = word_info.end_time.seconds + word_info.end_time.microseconds / 1000000
-                                
-                                if word_start >= start_time and word_end <= end_time:
-                                    transcript += word_info.word + " "
-                    
-                    # Extract keywords from labels
-                    keywords = []
-                    for label in result.annotation_results[0].segment_label_annotations:
-                        for segment in label.segments:
-                            segment_start = segment.segment.start_time_offset.seconds + segment.segment.start_time_offset.microseconds / 1000000
-                            segment_end = segment.segment.end_time_offset.seconds + segment.segment.end_time_offset.microseconds / 1000000
-                            
-                            if segment_start >= start_time and segment_end <= end_time:
-                                keywords.append(label.entity.description)
-                    
-                    # Calculate importance score based on labels and duration
-                    importance_score = min(len(keywords) * 0.1 + (end_time - start_time) * 0.05, 1.0)
-                    
-                    # Calculate engagement prediction (placeholder)
-                    engagement_prediction = min(importance_score + 0.2, 1.0)
-                    
-                    segments.append({
-                        "start_time": start_time,
-                        "end_time": end_time,
-                        "transcript": transcript.strip(),
-                        "keywords": keywords[:10],  # Limit to top 10 keywords
-                        "importance_score": importance_score,
-                        "engagement_prediction": engagement_prediction
-                    })
+                segments = self._segments_from_shots(shots, word_transcript, label_segments)
+            elif segments:
+                logger.info(f"Segmented video on {len(segments)} groups of transcribed sentences")
             else:
                 # Simulate video analysis for development
                 logger.info(f"Simulating video segment analysis")
+                complete = False
                 
                 # Create simulated segments based on content type
                 content_type = content.get("content_type", "educational")
@@ -286,119 +500,357 @@ class ContentAnalysisService:
                     ]
         except Exception as e:
             logger.error(f"Error in _analyze_video_segments: {str(e)}")
+            complete = False
+            word_transcript = None
             # Return a minimal segment as fallback
             segments = [
                 {
                     "start_time": 0.0,
                     "end_time": 60.0,
-                    "transcript": "Error analyzing video segments.",
+                    "transcript": SEGMENT_ERROR_TRANSCRIPT,
                     "keywords": ["error"],
                     "importance_score": 0.5,
                     "engagement_prediction": 0.5
                 }
             ]
         
+        if has_video:
+            # Align segment boundaries with speech pauses so cuts do not land mid-sentence
+            if settings.enable_audio_segmentation:
+                segments = await self._align_segments_to_speech(segments, video_path)
+            
+            # Fold motion, contrast and cut density into the segment scores
+            if settings.enable_visual_scoring:
+                segments = await visual_feature_service.score_segments(video_path, segments)
+                # Visual scoring is all-or-nothing; text-only scores mean it failed or ran out of budget
+                if segments and not all("visual_features" in segment for segment in segments):
+                    complete = False
+        
+        return {
+            "segments": segments,
+            "word_transcript": base64.b64encode(word_transcript.to_bytes()).decode("ascii") if word_transcript is not None else None,
+            "complete": complete
+        }
+    
+    async def _wait_for_operation(self, operation, timeout: float):
+        """
+        Poll a long-running operation without blocking the event loop.
+        
+        Args:
+            operation: Long-running operation returned by the client
+            timeout: Maximum time to wait in seconds
+        
+        Returns:
+            Operation result
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        
+        while not await asyncio.to_thread(operation.done):
+            if loop.time() >= deadline:
+                raise TimeoutError(f"Operation did not complete within {timeout} seconds")
+            await asyncio.sleep(settings.video_intelligence_poll_interval_seconds)
+        
+        return await asyncio.to_thread(operation.result)
+    
+    def _segments_from_shots(
+        self,
+        shots: List[tuple],
+        word_transcript: WordTranscript,
+        label_segments: List[tuple]
+    ) -> List[Dict[str, Any]]:
+        """
+        Build segments from shots, assigning the words and labels that fall inside each shot.
+        
+        Words and label segments are looked up by bisecting arrays sorted by start time,
+        so assignment costs O((shots + words + labels) log n) instead of rescanning every
+        word and label for every shot.
+        
+        Args:
+            shots: (start_time, end_time) of each shot in seconds
+            word_transcript: Columnar transcript of the video
+            label_segments: (start_time, end_time, description) of each label segment, in annotation order
+        
+        Returns:
+            List of video segments
+        """
+        label_starts = np.array([label[0] for label in label_segments], dtype=np.float64)
+        label_ends = np.array([label[1] for label in label_segments], dtype=np.float64)
+        label_order = np.argsort(label_starts, kind="stable")
+        label_starts = label_starts[label_order]
+        label_ends = label_ends[label_order]
+        
+        segments = []
+        for start_time, end_time in shots:
+            # Extract transcript for this segment
+            transcript = word_transcript.slice(start_time, end_time).text()
+            
+            # Extract keywords from labels lying within the shot, keeping annotation order
+            low = int(np.searchsorted(label_starts, start_time, side="left"))
+            high = int(np.searchsorted(label_starts, end_time, side="right"))
+            contained = np.sort(label_order[low:high][label_ends[low:high] <= end_time])
+            keywords = [label_segments[index][2] for index in contained.tolist()]
+            
+            # Calculate importance score based on labels and duration
+            importance_score = min(len(keywords) * 0.1 + (end_time - start_time) * 0.05, 1.0)
+            
+            # Calculate engagement prediction (placeholder)
+            engagement_prediction = min(importance_score + 0.2, 1.0)
+            
+            segments.append({
+                "start_time": start_time,
+                "end_time": end_time,
+                "transcript": transcript,
+                "keywords": keywords[:10],  # Limit to top 10 keywords
+                "importance_score": importance_score,
+                "engagement_prediction": engagement_prediction
+            })
+        
         return segments
     
-    async def _extract_keywords_and_summary(self, segments: List[Dict[str, Any]], content_type: str) -> tuple:
+    def _segment_transcripts_from_store(self, content_id: str, segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Fill segment transcripts with the stored words lying within each segment.
+        
+        Args:
+            content_id: ID of the content
+            segments: List of video segments
+        
+        Returns:
+            New list of segments with transcripts taken from the transcript store
+        """
+        assembled = []
+        for segment in segments:
+            words = transcript_store.get_range(content_id, segment.get("start_time", 0.0), segment.get("end_time", 0.0))
+            assembled.append({**segment, "transcript": words["text"]} if words is not None else segment)
+        return assembled
+    
+    async def _segments_from_transcription(self, video_path: str) -> Tuple[List[Dict[str, Any]], Optional[WordTranscript]]:
+        """
+        Transcribe the video with the transcription service and group its sentences into segments.
+        
+        Args:
+            video_path: Local path to video file
+        
+        Returns:
+            Tuple of (segments without transcripts, word transcript), or ([], None) when
+            the transcription has no word timings
+        """
+        transcription = await transcription_service.transcribe_video(video_path)
+        words = transcription.get("words") or []
+        if not transcription.get("success") or not words:
+            logger.warning(f"Transcription gave no word timings, segments will be simulated: {transcription.get('error', '')}")
+            return [], None
+        
+        word_transcript = WordTranscript.from_words(words)
+        
+        # Sentences end on pauses, so they group like speech intervals; single words stand in without them
+        sentences = transcription.get("segments") or words
+        segments = audio_analysis_service.segments_from_speech([
+            {"start_time": sentence["start"], "end_time": sentence["end"]}
+            for sentence in sentences
+        ])
+        return segments, word_transcript
+    
+    async def _align_segments_to_speech(self, segments: List[Dict[str, Any]], video_path: str) -> List[Dict[str, Any]]:
+        """
+        Refine segment boundaries using speech/silence intervals from the audio track.
+        
+        Args:
+            segments: List of video segments
+            video_path: Local path to video file
+        
+        Returns:
+            List of video segments with boundaries on speech pauses
+        """
+        try:
+            # Reuse the compact extract that transcription shares instead of decoding the video
+            async with audio_extraction_service.use(video_path) as audio_path:
+                intervals = await audio_analysis_service.detect_speech_intervals(audio_path or video_path)
+            if not intervals.get("success"):
+                return segments
+            
+            # Without shot-based segments, cut the source purely on speech pauses
+            if not segments:
+                return audio_analysis_service.segments_from_speech(intervals["speech"])
+            
+            return audio_analysis_service.refine_segment_boundaries(segments, intervals["silence"])
+        except Exception as e:
+            logger.error(f"Error in _align_segments_to_speech: {str(e)}")
+            return segments
+    
+    async def _extract_keywords_and_summary(
+        self,
+        segments: List[Dict[str, Any]],
+        content_type: str,
+        tenant: Optional[str] = None,
+        content_id: Optional[str] = None
+    ) -> tuple:
         """
         Extract keywords and generate summary from video segments.
         
         Args:
             segments: List of video segments
             content_type: Type of content
-            
+            tenant: Owner of the content, whose corpus the fallback keywords are ranked against
+            content_id: ID of the content, so re-analysis replaces its corpus document (optional)
+        
         Returns:
-            Tuple of (keywords, summary)
+            Tuple of (keywords, summary, whether the language model produced them)
         """
         logger.info(f"Extracting keywords and summary")
         
         # Combine all transcripts
-        combined_transcript = " ".join([segment.get("transcript", "") for segment in segments])
+        combined_transcript = llm_cache.normalize(" ".join([segment.get("transcript", "") for segment in segments]))
+        
+        # Every analyzed content feeds the tenant's document frequencies once
+        await asyncio.to_thread(keyword_engine.add_document, tenant or "default", combined_transcript, content_id)
         
+        used_model = False
         try:
-            if self.openai_client and combined_transcript:
-                # Use OpenAI for keyword extraction and summarization
-                logger.info(f"Using OpenAI for keyword extraction and summarization")
-                
-                prompt = f"""
-                Analyze the following video transcript and:
-                1. Extract the top 10 most important keywords or phrases
-                2. Create a concise summary (max 100 words)
-                
-                Content type: {content_type}
-                
-                Transcript:
-                {combined_transcript}
-                
-                Format your response as JSON with 'keywords' (array) and 'summary' (string) fields.
-                """
-                
-                response = self.openai_client.chat.completions.create(
-                    model="gpt-4",
-                    messages=[
-                        {"role": "system", "content": "You are a content analysis assistant that extracts keywords and creates summaries from video transcripts."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.3,
-                    max_tokens=500
+            if self.llm_dispatcher and combined_transcript:
+                cache_key = llm_cache.make_key(
+                    "keywords_summary",
+                    combined_transcript,
+                    content_type,
+                    KEYWORDS_SUMMARY_PROMPT_VERSION,
+                    self.llm_dispatcher.model.name
                 )
+                cached = await asyncio.to_thread(llm_cache.get, cache_key)
+            else:
+                cached = None
+            
+            if cached is not None:
+                logger.info(f"Using cached keyword extraction and summarization")
+                keywords = cached["keywords"]
+                summary = cached["summary"]
+                used_model = True
+            elif self.llm_dispatcher and combined_transcript and self.llm_dispatcher.is_overloaded:
+                # Keep analysis latency bounded instead of queueing behind the model budget
+                logger.warning(f"Language model overloaded, using local keyword extraction and summarization")
+                keywords, summary = await asyncio.to_thread(self._local_keywords_and_summary, combined_transcript, tenant)
+            elif self.llm_dispatcher and combined_transcript:
+                # Use the language model for keyword extraction and summarization
+                logger.info(f"Using {self.llm_dispatcher.model.name} for keyword extraction and summarization")
                 
-                # Parse the response
-                try:
-                    content = response.choices[0].message.content
-                    result = json.loads(content)
-                    keywords = result.get("keywords", [])
-                    summary = result.get("summary", "")
-                except Exception as parse_error:
-                    logger.error(f"Error parsing OpenAI response: {str(parse_error)}")
-                    # Extract keywords and summary using fallback method
-                    keywords = self._extract_keywords_fallback(combined_transcript)
-                    summary = self._generate_summary_fallback(combined_transcript)
+                started = time.perf_counter()
+                result = await self._analyze_transcript(combined_transcript, content_type)
+                keywords = result.get("keywords", [])
+                summary = result.get("summary", "")
+                await asyncio.to_thread(llm_cache.set, cache_key, {"keywords": keywords, "summary": summary}, time.perf_counter() - started)
+                used_model = True
             else:
                 # Use fallback methods for development
                 logger.info(f"Using fallback methods for keyword extraction and summarization")
-                keywords = self._extract_keywords_fallback(combined_transcript)
-                summary = self._generate_summary_fallback(combined_transcript)
+                keywords, summary = await asyncio.to_thread(self._local_keywords_and_summary, combined_transcript, tenant)
         except Exception as e:
             logger.error(f"Error in _extract_keywords_and_summary: {str(e)}")
             # Use fallback methods
-            keywords = self._extract_keywords_fallback(combined_transcript)
-            summary = self._generate_summary_fallback(combined_transcript)
+            keywords, summary = await asyncio.to_thread(self._local_keywords_and_summary, combined_transcript, tenant)
+            used_model = False
         
-        return keywords, summary
+        return keywords, summary, used_model
     
-    def _extract_keywords_fallback(self, text: str) -> List[str]:
+    async def _analyze_transcript(self, transcript: str, content_type: str) -> Dict[str, Any]:
+        """
+        Extract keywords and a summary with the language model, map-reducing long transcripts.
+        
+        Transcripts over the map-reduce threshold are split into token-budgeted chunks that
+        are analyzed concurrently; one reduce call then condenses the chunk summaries and
+        keywords, so latency stays close to one chunk call plus the reduce.
+        
+        Args:
+            transcript: Normalized transcript
+            content_type: Type of content
+        
+        Returns:
+            Dictionary with 'keywords' and 'summary'
+        """
+        if estimate_tokens(transcript) <= settings.llm_map_reduce_threshold_tokens:
+            return await self.llm_dispatcher.analyze(transcript, content_type)
+        
+        chunks = self._chunk_transcript(transcript, settings.llm_chunk_tokens)
+        logger.info(f"Map-reducing transcript over {len(chunks)} chunks")
+        
+        # Chunks are large already; sending each alone keeps map latency at one call
+        partials = await asyncio.gather(*[
+            self.llm_dispatcher.analyze(chunk, content_type, batchable=False)
+            for chunk in chunks
+        ])
+        
+        reduce_document = "\n".join(
+            f"Part {index + 1} summary: {partial.get('summary', '')}\n"
+            f"Part {index + 1} keywords: {', '.join(partial.get('keywords', []))}"
+            for index, partial in enumerate(partials)
+        )
+        return await self.llm_dispatcher.analyze(reduce_document, content_type, batchable=False)
+    
+    def _chunk_transcript(self, transcript: str, max_tokens: int) -> List[str]:
+        """
+        Split a transcript into chunks within a token budget, breaking between sentences.
+        
+        Args:
+            transcript: Transcript text
+            max_tokens: Maximum estimated tokens per chunk
+        
+        Returns:
+            List of transcript chunks
+        """
+        # Sentences longer than the budget are broken between words
+        pieces = []
+        for sentence in re.split(r"(?<=[.!?])\s+", transcript):
+            if estimate_tokens(sentence) <= max_tokens:
+                pieces.append(sentence)
+                continue
+            words = sentence.split()
+            step = max(len(words) * max_tokens // estimate_tokens(sentence), 1)
+            pieces.extend(" ".join(words[i:i + step]) for i in range(0, len(words), step))
+        
+        chunks = []
+        current = []
+        current_tokens = 0
+        for piece in pieces:
+            piece_tokens = estimate_tokens(piece)
+            if current and current_tokens + piece_tokens > max_tokens:
+                chunks.append(" ".join(current))
+                current = []
+                current_tokens = 0
+            current.append(piece)
+            current_tokens += piece_tokens
+        if current:
+            chunks.append(" ".join(current))
+        
+        return chunks
+    
+    def _local_keywords_and_summary(self, text: str, tenant: Optional[str] = None) -> tuple:
+        """
+        Extract keywords and generate a summary without the language model.
+        
+        Args:
+            text: Input text
+            tenant: Owner of the content, whose corpus the keywords are ranked against
+        
+        Returns:
+            Tuple of (keywords, summary)
+        """
+        return self._extract_keywords_fallback(text, tenant), self._generate_summary_fallback(text)
+    
+    def _extract_keywords_fallback(self, text: str, tenant: Optional[str] = None) -> List[str]:
         """
         Extract keywords from text using a simple fallback method.
         
         Args:
             text: Input text
-            
+            tenant: Owner of the content, whose corpus the keywords are ranked against
+        
         Returns:
             List of keywords
         """
         if not text:
             return ["no content"]
         
-        # Simple keyword extraction based on word frequency
-        words = text.lower().split()
-        word_freq = {}
-        
-        # Common stop words to exclude
-        stop_words = {"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "with", "by", "about", "as", "of", "is", "are", "was", "were"}
-        
-        for word in words:
-            # Clean the word
-            word = word.strip(".,!?;:\"'()[]{}").lower()
-            if word and len(word) > 3 and word not in stop_words:
-                word_freq[word] = word_freq.get(word, 0) + 1
-        
-        # Sort by frequency
-        sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-        
-        # Return top 10 keywords
-        return [word for word, freq in sorted_words[:10]]
+        # TF-IDF ranking against the tenant's previously analyzed transcripts
+        return keyword_engine.extract_keywords(tenant or "default", text)
     
     def _generate_summary_fallback(self, text: str) -> str:
         """
@@ -406,60 +858,42 @@ class ContentAnalysisService:
         
         Args:
             text: Input text
-            
+        
         Returns:
             Summary text
         """
         if not text:
             return "No content available for summarization."
         
-        # Simple summarization by taking the first few sentences
-        sentences = text.split(".")
-        
-        # Take first 3 sentences or fewer if not available
-        summary_sentences = sentences[:min(3, len(sentences))]
-        
-        summary = ". ".join(summary_sentences).strip()
-        
-        # Limit to 100 words
-        words = summary.split()
-        if len(words) > 100:
-            summary = " ".join(words[:100]) + "..."
-        
-        return summary
+        # Extractive summary of the most central sentences
+        return extractive_summarizer.summarize(text, max_words=100)
     
-    async def _recommend_templates(self, content_type: str, segments: List[Dict[str, Any]]) -> List[str]:
+    async def _recommend_templates(self, content_type: str, segments: List[Dict[str, Any]], content: Optional[Dict[str, Any]] = None) -> List[str]:
         """
         Recommend video templates based on content type and segments.
         
         Args:
             content_type: Type of content
             segments: List of video segments
-            
+            content: Content upload record, for the owner and output preferences (optional)
+        
         Returns:
             List of template IDs
         """
         logger.info(f"Recommending templates for content type: {content_type}")
         
         recommended_templates = []
+        content = content or {}
         
         try:
-            # Get all available templates
-            templates = list(db.video_templates.values())
-            
-            # Filter templates by content type
-            matching_templates = []
-            for template in templates:
-                suitable_types = template.get("suitable_content_types", [])
-                if content_type in suitable_types:
-                    matching_templates.append(template)
-            
-            # If no matching templates, use all templates
-            if not matching_templates:
-                matching_templates = templates
-            
-            # Recommend up to 3 templates
-            recommended_templates = [template["id"] for template in matching_templates[:3]]
+            recommended_templates = await asyncio.to_thread(
+                template_recommender.recommend,
+                content_type,
+                segments,
+                aspect_ratio=content.get("preferred_aspect_ratio"),
+                user_id=content.get("user_id"),
+                preferred_duration=content.get("preferred_duration")
+            )
         except Exception as e:
             logger.error(f"Error in _recommend_templates: {str(e)}")
         
@@ -472,7 +906,7 @@ class ContentAnalysisService:
         Args:
             segments: List of video segments
             content_type: Type of content
-            
+        
         Returns:
             Engagement prediction score (0.0 to 1.0)
         """
@@ -511,7 +945,7 @@ class ContentAnalysisService:
         
         Args:
             content_id: ID of the content
-            
+        
         Returns:
             Analysis results
         """
@@ -0,0 +1,176 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from ..config import settings
+
+# Configure logging
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
+
+class DiskCache:
+    """
+    Persistent JSON cache with least-recently-used eviction by total size.
+    
+    Each entry is one file in the cache directory, so the cache survives restarts.
+    The in-memory index only tracks keys and sizes; it is rebuilt from file
+    modification times on startup, and reads refresh the modification time so
+    recency carries over between processes.
+    """
+    
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_index()
+    
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        Build a cache key from its parts.
+        
+        Args:
+            parts: Values identifying the cached computation
+        
+        Returns:
+            Hex digest of the parts
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\x1f")
+        return digest.hexdigest()
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+    
+    def _load_index(self):
+        """Rebuild the LRU index from the files already on disk"""
+        try:
+            files = []
+            for name in os.listdir(self.directory):
+                if not name.endswith(".json"):
+                    continue
+                stat = os.stat(os.path.join(self.directory, name))
+                files.append((stat.st_mtime, name[:-5], stat.st_size))
+            
+            for _, key, size in sorted(files):
+                self._entries[key] = size
+                self._total_bytes += size
+            
+            if files:
+                logger.info(f"Loaded {len(files)} cache entries from {self.directory}")
+        except Exception as e:
+            logger.error(f"Error loading cache index from {self.directory}: {str(e)}")
+    
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a cached value and mark it as recently used.
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Cached value or None on a miss
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+        
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as cache_file:
+                value = json.load(cache_file)
+            os.utime(path)
+        except Exception as e:
+            logger.warning(f"Dropping unreadable cache entry {key}: {str(e)}")
+            self._discard(key)
+            with self._lock:
+                self.misses += 1
+            return None
+        
+        with self._lock:
+            self.hits += 1
+        return value
+    
+    def set(self, key: str, value: Any) -> None:
+        """
+        Store a value, evicting least recently used entries if over the size limit.
+        
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+        """
+        data = json.dumps(value).encode("utf-8")
+        
+        try:
+            # Write to a temporary file first so readers never see a partial entry
+            with tempfile.NamedTemporaryFile(dir=self.directory, suffix=".tmp", delete=False) as temp_file:
+                temp_file.write(data)
+                temp_path = temp_file.name
+            os.replace(temp_path, self._path(key))
+        except Exception as e:
+            logger.error(f"Error writing cache entry {key}: {str(e)}")
+            return
+        
+        with self._lock:
+            self._total_bytes -= self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._total_bytes += len(data)
+            evicted = self._evict()
+        
+        for evicted_key in evicted:
+            try:
+                os.remove(self._path(evicted_key))
+            except FileNotFoundError:
+                pass
+    
+    def _evict(self) -> list:
+        """Pop least recently used keys until the cache fits; call with the lock held"""
+        evicted = []
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            evicted.append(key)
+        return evicted
+    
+    def _discard(self, key: str) -> None:
+        with self._lock:
+            self._total_bytes -= self._entries.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache usage statistics.
+        
+        Returns:
+            Hit/miss counts, hit ratio, entry count and size
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes
+            }
@@ -0,0 +1,195 @@
+import logging
+import threading
+import zlib
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from ..config import settings
+from ..database import db
+from .keyword_engine import TOKEN_PATTERN
+
+# Configure logging
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
+
+# Mersenne prime for the universal hash family (a * x + b) mod p
+MINHASH_PRIME = (1 << 31) - 1
+
+# Segment reference: (content ID, segment index)
+SegmentRef = Tuple[str, int]
+
+class LSHIndex:
+    """
+    MinHash signatures of one user's segments, bucketed by LSH band.
+    
+    A signature is split into bands of rows; two segments land in the same bucket
+    for a band when all of its rows agree, which happens with probability s^rows
+    for Jaccard similarity s. Looking up a segment only touches its own buckets,
+    and candidates are then verified against the full signatures.
+    """
+    
+    def __init__(self):
+        self.buckets: Dict[bytes, List[SegmentRef]] = {}
+        self.signatures: Dict[SegmentRef, np.ndarray] = {}
+        self.segments_by_content: Dict[str, List[SegmentRef]] = {}
+    
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        rows = settings.duplicate_minhash_rows
+        return [
+            band.to_bytes(2, "little") + signature[band * rows:(band + 1) * rows].tobytes()
+            for band in range(settings.duplicate_minhash_bands)
+        ]
+    
+    def query(self, signature: np.ndarray, threshold: float) -> Optional[Tuple[SegmentRef, float]]:
+        """
+        Find the most similar indexed segment.
+        
+        Args:
+            signature: MinHash signature of the segment
+            threshold: Minimum estimated Jaccard similarity
+        
+        Returns:
+            Tuple of (segment reference, estimated similarity), or None
+        """
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self.buckets.get(key, ()))
+        if not candidates:
+            return None
+        
+        candidates = sorted(candidates)
+        similarities = (np.stack([self.signatures[ref] for ref in candidates]) == signature).mean(axis=1)
+        best = int(np.argmax(similarities))
+        if similarities[best] < threshold:
+            return None
+        return candidates[best], float(similarities[best])
+    
+    def add(self, ref: SegmentRef, signature: np.ndarray) -> None:
+        self.signatures[ref] = signature
+        self.segments_by_content.setdefault(ref[0], []).append(ref)
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, []).append(ref)
+    
+    def remove(self, content_id: str) -> None:
+        for ref in self.segments_by_content.pop(content_id, []):
+            signature = self.signatures.pop(ref)
+            for key in self._band_keys(signature):
+                bucket = self.buckets.get(key)
+                if bucket is None:
+                    continue
+                bucket.remove(ref)
+                if not bucket:
+                    del self.buckets[key]
+
+class DuplicateDetector:
+    """
+    Near-duplicate segment detection across each user's library.
+    
+    Transcripts are reduced to word shingles, and shingle hashes to MinHash
+    signatures with a vectorized universal hash family. Signatures are indexed
+    per user in an LSHIndex, so each new segment is checked against the library
+    in time proportional to its bucket sizes rather than the library size.
+    """
+    
+    def __init__(self):
+        self.num_hashes = settings.duplicate_minhash_bands * settings.duplicate_minhash_rows
+        rng = np.random.default_rng(0)
+        self.hash_a = rng.integers(1, MINHASH_PRIME, self.num_hashes, dtype=np.uint64)[:, None]
+        self.hash_b = rng.integers(0, MINHASH_PRIME, self.num_hashes, dtype=np.uint64)[:, None]
+        self.indexes: Dict[str, LSHIndex] = {}
+        self._lock = threading.Lock()
+    
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """
+        Compute the MinHash signature of a transcript.
+        
+        Args:
+            text: Transcript text
+        
+        Returns:
+            Signature as a uint32 array, or None when the text is too short to compare
+        """
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        if not tokens or len(tokens) < settings.duplicate_min_words:
+            return None
+        
+        unique, inverse = np.unique(tokens, return_inverse=True)
+        token_hashes = np.array([zlib.crc32(token.encode("utf-8")) for token in unique.tolist()], dtype=np.uint64)[inverse]
+        
+        # Combine consecutive token hashes into shingle hashes (polynomial rolling, mod 2^32);
+        # a text shorter than one shingle becomes a single shingle of all its words
+        width = min(settings.duplicate_shingle_words, len(tokens))
+        shingles = np.zeros(len(tokens) - width + 1, dtype=np.uint64)
+        for offset in range(width):
+            shingles = (shingles * np.uint64(1000003) + token_hashes[offset:len(tokens) - width + 1 + offset]) & np.uint64(0xFFFFFFFF)
+        shingles = np.unique(shingles)
+        
+        # a * x + b stays below 2^63 for a < 2^31 and x < 2^32
+        hashed = (self.hash_a * shingles[None, :] + self.hash_b) % np.uint64(MINHASH_PRIME)
+        return hashed.min(axis=1).astype(np.uint32)
+    
+    def _get_index(self, user_id: str) -> LSHIndex:
+        """Get a user's index, building it from stored analyses the first time (caller holds the lock)"""
+        index = self.indexes.get(user_id)
+        if index is not None:
+            return index
+        
+        index = LSHIndex()
+        content_ids = {content_id for content_id, content in db.content_uploads.items() if content.get("user_id") == user_id}
+        for analysis in list(db.content_analyses.values()):
+            content_id = analysis.get("content_id")
+            if content_id in content_ids:
+                for segment_index, segment in enumerate(analysis.get("segments", [])):
+                    signature = self.signature(segment.get("transcript", ""))
+                    if signature is not None:
+                        index.add((content_id, segment_index), signature)
+        
+        self.indexes[user_id] = index
+        logger.info(f"Built duplicate index for user {user_id}: {len(index.signatures)} segments")
+        return index
+    
+    def add_analysis(self, user_id: Optional[str], content_id: str, segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Flag segments that repeat earlier material and index them.
+        
+        Segments are checked in order against the user's library, including the
+        earlier segments of the same content, and then indexed themselves.
+        
+        Args:
+            user_id: Owner of the content
+            content_id: ID of the content
+            segments: Analyzed segments
+        
+        Returns:
+            One entry per near-duplicate segment: its index, the segment it repeats and the estimated similarity
+        """
+        if not user_id:
+            return []
+        
+        duplicates = []
+        try:
+            signatures = [self.signature(segment.get("transcript", "")) for segment in segments]
+            with self._lock:
+                index = self._get_index(user_id)
+                index.remove(content_id)
+                for segment_index, signature in enumerate(signatures):
+                    if signature is None:
+                        continue
+                    match = index.query(signature, settings.duplicate_similarity_threshold)
+                    if match is not None:
+                        (duplicate_content_id, duplicate_segment_index), similarity = match
+                        duplicates.append({
+                            "segment_index": segment_index,
+                            "duplicate_of_content_id": duplicate_content_id,
+                            "duplicate_of_segment_index": duplicate_segment_index,
+                            "similarity": round(similarity, 3)
+                        })
+                    index.add((content_id, segment_index), signature)
+        except Exception as e:
+            logger.error(f"Error detecting duplicate segments of {content_id}: {str(e)}")
+        
+        if duplicates:
+            logger.info(f"Found {len(duplicates)} near-duplicate segments in {content_id}")
+        return duplicates
+
+# Create global duplicate detector instance
+duplicate_detector = DuplicateDetector()
@@ -0,0 +1,241 @@
+import asyncio
+import json
+import logging
+import time
+from typing import List, Dict, Any, Optional, Protocol, Tuple
+from ..config import settings
+from ..models import ContentType
+from .lambda_invoker import LambdaInvoker
+
+# Configure logging
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
+
+# Version of the compact payload; bump when the feature layout changes
+FEATURE_VERSION = 1
+
+# Column order of a feature row
+FEATURE_NAMES = [
+    "content_type",
+    "segment_count",
+    "total_duration",
+    "mean_segment_duration",
+    "mean_importance",
+    "max_importance",
+    "mean_engagement",
+    "keyword_count"
+]
+
+# Content types are sent as their position in this list (-1 for unknown)
+CONTENT_TYPES = [content_type.value for content_type in ContentType]
+
+# Base engagement of each content type, used by the local function
+CONTENT_TYPE_SCORES = {
+    "educational": 0.7,
+    "promotional": 0.6,
+    "entertainment": 0.8,
+    "tutorial": 0.75,
+    "interview": 0.65,
+    "presentation": 0.55
+}
+
+def extract_features(segments: List[Dict[str, Any]], content_type: str) -> List[float]:
+    """
+    Reduce a content item to the numeric features the prediction function uses.
+    
+    Args:
+        segments: List of content segments
+        content_type: Type of content
+    
+    Returns:
+        Feature row in FEATURE_NAMES order
+    """
+    content_type = getattr(content_type, "value", content_type)
+    durations = [max(segment.get("end_time", 0.0) - segment.get("start_time", 0.0), 0.0) for segment in segments]
+    importance = [segment.get("importance_score", 0.0) for segment in segments]
+    engagement = [segment.get("engagement_prediction", 0.0) for segment in segments]
+    count = len(segments)
+    
+    return [
+        CONTENT_TYPES.index(content_type) if content_type in CONTENT_TYPES else -1,
+        count,
+        round(sum(durations), 3),
+        round(sum(durations) / count, 3) if count else 0.0,
+        round(sum(importance) / count, 4) if count else 0.0,
+        round(max(importance), 4) if count else 0.0,
+        round(sum(engagement) / count, 4) if count else 0.0,
+        sum(len(segment.get("keywords", [])) for segment in segments)
+    ]
+
+def encode_payload(rows: List[List[float]]) -> bytes:
+    """Encode feature rows as the compact JSON payload"""
+    return json.dumps({"version": FEATURE_VERSION, "rows": rows}, separators=(",", ":")).encode("utf-8")
+
+class PredictionFunction(Protocol):
+    """
+    Interface for functions that score batches of feature rows.
+    
+    invoke takes an encoded payload and returns JSON with a 'predictions' array of
+    [score, confidence] pairs in row order. It must not block the event loop.
+    """
+    
+    name: str
+    
+    async def invoke(self, payload: bytes) -> bytes:
+        ...
+
+class LambdaPredictionFunction:
+    def __init__(self, invoker: LambdaInvoker, function_name: str):
+        self.invoker = invoker
+        self.name = function_name
+    
+    async def invoke(self, payload: bytes) -> bytes:
+        """
+        Invoke the prediction Lambda on the invoker's executor.
+        
+        Predictions are idempotent, so slow invokes may be hedged.
+        
+        Args:
+            payload: Encoded feature rows
+        
+        Returns:
+            Raw response payload
+        """
+        return await self.invoker.invoke(self.name, payload, settings.lambda_prediction_timeout_seconds, hedge=True)
+
+class LocalPredictionFunction:
+    """
+    Offline stand-in for the prediction Lambda, for development and load benchmarks.
+    
+    Scores rows with the same heuristic the simulated predictions use, minus the
+    noise. Fixed per-invoke and per-row delays mimic Lambda round trips.
+    """
+    
+    name = "local-engagement-v1"
+    
+    def __init__(self, latency_seconds: float = 0.0, row_latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+        self.row_latency_seconds = row_latency_seconds
+        self.calls = 0
+    
+    async def invoke(self, payload: bytes) -> bytes:
+        """Score a batch of feature rows on a worker thread"""
+        return await asyncio.to_thread(self._invoke, payload)
+    
+    def _invoke(self, payload: bytes) -> bytes:
+        """
+        Score a batch of feature rows.
+        
+        Args:
+            payload: Encoded feature rows
+        
+        Returns:
+            JSON with one [score, confidence] pair per row
+        """
+        self.calls += 1
+        rows = json.loads(payload)["rows"]
+        delay = self.latency_seconds + self.row_latency_seconds * len(rows)
+        if delay > 0:
+            time.sleep(delay)
+        
+        predictions = []
+        for row in rows:
+            features = dict(zip(FEATURE_NAMES, row))
+            content_type_index = int(features["content_type"])
+            base_score = CONTENT_TYPE_SCORES.get(CONTENT_TYPES[content_type_index], 0.5) if content_type_index >= 0 else 0.5
+            segment_factor = min(features["segment_count"] / 5, 1.0) * 0.1
+            score = min(max(base_score + segment_factor + features["mean_importance"] * 0.2, 0.0), 1.0)
+            confidence = 0.7 + 0.2 * min(features["segment_count"] / 5, 1.0)
+            predictions.append([round(score, 4), round(confidence, 4)])
+        
+        return json.dumps({"predictions": predictions}).encode("utf-8")
+
+class EngagementBatcher:
+    """
+    Coalesce engagement prediction requests into batched function invokes.
+    
+    Requests wait up to engagement_batch_window_seconds for company, or until
+    engagement_batch_max_size are queued, and are then sent as one payload of
+    numeric feature rows. The function runs the invoke off the event loop, and each
+    caller's future is resolved with its own row of the response.
+    """
+    
+    def __init__(self, function: PredictionFunction):
+        self.function = function
+        self._batch: List[Tuple[List[float], asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+    
+    async def predict(self, features: List[float]) -> Tuple[float, float]:
+        """
+        Score one feature row, sharing an invoke with concurrent requests.
+        
+        Args:
+            features: Feature row from extract_features
+        
+        Returns:
+            Tuple of (score, confidence)
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._batch.append((features, future))
+        
+        if len(self._batch) >= max(settings.engagement_batch_max_size, 1):
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(settings.engagement_batch_window_seconds, self._flush)
+        
+        return await future
+    
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        if self._batch:
+            items = self._batch
+            self._batch = []
+            task = asyncio.get_running_loop().create_task(self._run(items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, items: List[Tuple[List[float], asyncio.Future]]) -> None:
+        """Invoke the function once for a batch and resolve each request's future"""
+        try:
+            response = await self.function.invoke(encode_payload([features for features, _ in items]))
+            predictions = json.loads(response)["predictions"]
+            if len(predictions) != len(items):
+                raise ValueError(f"Expected {len(items)} predictions, got {len(predictions)}")
+        except Exception as e:
+            logger.error(f"Error in engagement prediction batch of {len(items)}: {str(e)}")
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), (score, confidence) in zip(items, predictions):
+            if not future.done():
+                future.set_result((float(score), float(confidence)))
+
+def create_prediction_function(lambda_invoker: Optional[LambdaInvoker] = None) -> Optional[PredictionFunction]:
+    """
+    Create the engagement prediction function selected in settings.
+    
+    Args:
+        lambda_invoker: Lambda invoker, if AWS credentials are configured
+    
+    Returns:
+        Function instance, or None when the selected function is not configured
+    """
+    backend = settings.engagement_prediction_backend.lower()
+    
+    if backend == "local":
+        logger.info("Using local stand-in function for engagement prediction")
+        return LocalPredictionFunction(settings.local_lambda_latency_seconds)
+    
+    if backend == "lambda":
+        if lambda_invoker is None:
+            return None
+        return LambdaPredictionFunction(lambda_invoker, settings.engagement_prediction_lambda)
+    
+    logger.error(f"Unknown engagement prediction backend: {settings.engagement_prediction_backend}")
+    return None
@@ -0,0 +1,305 @@
+import json
+import logging
+import os
+import re
+import threading
+import uuid
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from ..config import settings
+from .engagement_batcher import CONTENT_TYPES, CONTENT_TYPE_SCORES
+
+# Configure logging
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
+
+# Column order of a segment feature row: content type one-hot, then segment features
+FEATURE_NAMES = [f"content_type_{content_type}" for content_type in CONTENT_TYPES] + [
+    "content_type_unknown",
+    "segment_count_factor",
+    "importance_score",
+    "engagement_prediction",
+    "duration",
+    "keyword_count",
+    "words_per_second"
+]
+
+DEFAULT_MODEL_VERSION = "heuristic-v1"
+
+# Versions name files in the model directory, so they are restricted to a safe file name
+VERSION_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]{0,127}")
+
+def validate_version(version: str) -> str:
+    """
+    Check that a model version is usable as a file name.
+    
+    Args:
+        version: Model version
+    
+    Returns:
+        The version
+    
+    Raises:
+        ValueError: If the version contains anything but letters, digits, '.', '_' and '-'
+    """
+    if not isinstance(version, str) or not VERSION_PATTERN.fullmatch(version):
+        raise ValueError(f"Invalid model version: {version!r}")
+    return version
+
+def segment_feature_matrix(segments: List[Dict[str, Any]], content_type: str) -> np.ndarray:
+    """
+    Build the feature matrix of a content item's segments.
+    
+    Args:
+        segments: List of content segments
+        content_type: Type of content
+    
+    Returns:
+        Matrix with one FEATURE_NAMES row per segment
+    """
+    content_type = getattr(content_type, "value", content_type)
+    matrix = np.zeros((len(segments), len(FEATURE_NAMES)), dtype=np.float64)
+    if not segments:
+        return matrix
+    
+    type_column = CONTENT_TYPES.index(content_type) if content_type in CONTENT_TYPES else len(CONTENT_TYPES)
+    matrix[:, type_column] = 1.0
+    
+    start = np.array([segment.get("start_time", 0.0) for segment in segments], dtype=np.float64)
+    end = np.array([segment.get("end_time", 0.0) for segment in segments], dtype=np.float64)
+    duration = np.maximum(end - start, 0.0)
+    words = np.array([len(segment.get("transcript", "").split()) for segment in segments], dtype=np.float64)
+    
+    offset = len(CONTENT_TYPES) + 1
+    matrix[:, offset] = min(len(segments) / 5, 1.0)
+    matrix[:, offset + 1] = [segment.get("importance_score", 0.0) for segment in segments]
+    matrix[:, offset + 2] = [segment.get("engagement_prediction", 0.0) for segment in segments]
+    matrix[:, offset + 3] = duration
+    matrix[:, offset + 4] = [len(segment.get("keywords", [])) for segment in segments]
+    matrix[:, offset + 5] = np.divide(words, duration, out=np.zeros_like(words), where=duration > 0)
+    return matrix
+
+class LinearEngagementModel:
+    """
+    Linear engagement model over segment features.
+    
+    A segment's score is its feature row dotted with the weights, clipped to
+    [0, 1]; a content item scores the clipped mean of its raw segment scores.
+    Scoring a whole content item is one matrix-vector product.
+    """
+    
+    def __init__(self, version: str, weights: np.ndarray, metrics: Optional[Dict[str, Any]] = None, created_at: Optional[str] = None):
+        self.version = version
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.metrics = metrics or {}
+        self.created_at = created_at or datetime.utcnow().isoformat() + "Z"
+    
+    def score(self, segments: List[Dict[str, Any]], content_type: str) -> Tuple[float, np.ndarray]:
+        """
+        Score a content item and each of its segments with one matrix-vector product.
+        
+        The content score clips the mean of the raw segment scores, which is the
+        quantity the model was fitted on, rather than averaging clipped scores.
+        
+        Args:
+            segments: List of content segments
+            content_type: Type of content
+        
+        Returns:
+            Tuple of (content score, score of each segment), all 0.0 to 1.0; the
+            content score is 0.5 for content without segments
+        """
+        raw = segment_feature_matrix(segments, content_type) @ self.weights
+        content_score = float(np.clip(raw.mean(), 0.0, 1.0)) if len(raw) else 0.5
+        return content_score, np.clip(raw, 0.0, 1.0)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "features": FEATURE_NAMES,
+            "weights": self.weights.tolist(),
+            "metrics": self.metrics,
+            "created_at": self.created_at
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LinearEngagementModel":
+        if data.get("features") != FEATURE_NAMES:
+            raise ValueError(f"Model {data.get('version')} was trained on a different feature layout")
+        return cls(data["version"], np.array(data["weights"]), data.get("metrics"), data.get("created_at"))
+
+def default_model() -> LinearEngagementModel:
+    """
+    Model reproducing the simulated heuristic without its noise.
+    
+    Returns:
+        Model scoring content type base + 0.1 * segment count factor + 0.2 * importance
+    """
+    weights = np.zeros(len(FEATURE_NAMES), dtype=np.float64)
+    for column, content_type in enumerate(CONTENT_TYPES):
+        weights[column] = CONTENT_TYPE_SCORES.get(content_type, 0.5)
+    weights[FEATURE_NAMES.index("content_type_unknown")] = 0.5
+    weights[FEATURE_NAMES.index("segment_count_factor")] = 0.1
+    weights[FEATURE_NAMES.index("importance_score")] = 0.2
+    return LinearEngagementModel(DEFAULT_MODEL_VERSION, weights, {"confidence": 0.8}, "1970-01-01T00:00:00Z")
+
+def train_linear_model(training_data: List[Dict[str, Any]], version: str) -> LinearEngagementModel:
+    """
+    Fit a linear engagement model with ridge-regularized least squares.
+    
+    Each sample is a content item: {"segments": [...], "content_type": str, "engagement": float}.
+    Its feature row is the mean of its segment rows, so the fitted weights score
+    segments and content alike.
+    
+    Args:
+        training_data: Training samples
+        version: Version to give the model
+    
+    Returns:
+        Trained model with training and holdout metrics
+    """
+    samples = [sample for sample in training_data if sample.get("segments") and "engagement" in sample]
+    if len(samples) < 2:
+        raise ValueError("At least two samples with segments and an engagement label are required")
+    
+    features = np.stack([segment_feature_matrix(sample["segments"], sample.get("content_type", "")).mean(axis=0) for sample in samples])
+    targets = np.array([float(sample["engagement"]) for sample in samples], dtype=np.float64)
+    
+    # Hold out every fifth sample when there is enough data to measure generalization
+    holdout = np.arange(len(samples)) % 5 == 4 if len(samples) >= 10 else np.zeros(len(samples), dtype=bool)
+    train = ~holdout
+    
+    # Ridge regression: append sqrt(lambda) * I rows to the least squares system
+    ridge = np.sqrt(settings.engagement_model_ridge) * np.eye(features.shape[1])
+    system = np.vstack([features[train], ridge])
+    rhs = np.concatenate([targets[train], np.zeros(features.shape[1])])
+    weights, *_ = np.linalg.lstsq(system, rhs, rcond=None)
+    
+    def errors(mask: np.ndarray) -> Dict[str, float]:
+        predicted = np.clip(features[mask] @ weights, 0.0, 1.0)
+        residual = targets[mask] - predicted
+        variance = np.var(targets[mask])
+        return {
+            "rmse": round(float(np.sqrt(np.mean(residual ** 2))), 4),
+            "r2": round(float(1 - np.mean(residual ** 2) / variance), 4) if variance > 0 else 0.0
+        }
+    
+    metrics = {"samples": int(train.sum()), "train": errors(train)}
+    if holdout.any():
+        metrics["holdout_samples"] = int(holdout.sum())
+        metrics["holdout"] = errors(holdout)
+    metrics["confidence"] = round(float(np.clip(1 - metrics.get("holdout", metrics["train"])["rmse"], 0.0, 1.0)), 4)
+    
+    return LinearEngagementModel(version, weights, metrics)
+
+class EngagementModelRegistry:
+    """
+    Versioned engagement models, loaded once and kept in memory.
+    
+    Models are persisted as JSON under cache_dir/models/engagement together with a
+    pointer to the active version. Publishing a model swaps the active reference
+    in one assignment, so requests already scoring keep the model they started
+    with and the next request uses the new one. Models whose holdout r2 falls
+    below engagement_model_min_holdout_r2 are stored but not activated.
+    """
+    
+    def __init__(self):
+        self.directory = os.path.join(settings.cache_dir, "models", "engagement")
+        self.models: Dict[str, LinearEngagementModel] = {}
+        self._lock = threading.Lock()
+        self.active = self._load_initial()
+    
+    def _path(self, version: str) -> str:
+        return os.path.join(self.directory, f"{version}.json")
+    
+    def _load_initial(self) -> LinearEngagementModel:
+        default = default_model()
+        self.models[default.version] = default
+        
+        version = settings.engagement_model_version
+        if not version:
+            try:
+                with open(os.path.join(self.directory, "ACTIVE")) as f:
+                    version = f.read().strip()
+            except OSError:
+                version = DEFAULT_MODEL_VERSION
+        
+        return self.get(version) or default
+    
+    def get(self, version: Optional[str] = None) -> Optional[LinearEngagementModel]:
+        """
+        Get a model by version, loading it from disk on first use.
+        
+        Args:
+            version: Model version (default: the active model)
+        
+        Returns:
+            Model, or None if the version is unknown
+        """
+        if version is None:
+            return self.active
+        
+        model = self.models.get(version)
+        if model is not None or not VERSION_PATTERN.fullmatch(version):
+            return model
+        
+        with self._lock:
+            model = self.models.get(version)
+            if model is None:
+                try:
+                    with open(self._path(version)) as f:
+                        model = LinearEngagementModel.from_dict(json.load(f))
+                    self.models[version] = model
+                    logger.info(f"Loaded engagement model: {version}")
+                except FileNotFoundError:
+                    return None
+                except (OSError, ValueError, KeyError) as e:
+                    logger.error(f"Error loading engagement model {version}: {str(e)}")
+                    return None
+        return model
+    
+    def publish(self, model: LinearEngagementModel) -> bool:
+        """
+        Persist a model and make it the active one if its holdout metrics allow.
+        
+        Args:
+            model: Model to publish
+        
+        Returns:
+            Whether the model was activated
+        
+        Raises:
+            ValueError: If the model version is not a safe file name
+        """
+        validate_version(model.version)
+        holdout_r2 = model.metrics.get("holdout", {}).get("r2")
+        activate = holdout_r2 is None or holdout_r2 >= settings.engagement_model_min_holdout_r2
+        if holdout_r2 is None:
+            logger.warning(f"Engagement model {model.version} has no holdout metrics, activating it unvalidated")
+        elif not activate:
+            logger.warning(
+                f"Engagement model {model.version} has holdout r2 {holdout_r2} below "
+                f"{settings.engagement_model_min_holdout_r2}, keeping {self.active.version} active"
+            )
+        
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            temp_path = f"{self._path(model.version)}.{uuid.uuid4().hex}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(model.to_dict(), f)
+            os.replace(temp_path, self._path(model.version))
+            self.models[model.version] = model
+            if not activate:
+                return False
+            
+            pointer_path = os.path.join(self.directory, f"ACTIVE.{uuid.uuid4().hex}.tmp")
+            with open(pointer_path, "w") as f:
+                f.write(model.version)
+            os.replace(pointer_path, os.path.join(self.directory, "ACTIVE"))
+            self.active = model
+        logger.info(f"Activated engagement model: {model.version}")
+        return True
+
+# Create global engagement model registry instance
+engagement_model_registry = EngagementModelRegistry()
@@ -0,0 +1,39 @@
+import functools
+import logging
+import os
+import shutil
+from typing import Optional
+from ..config import settings
+
+# Configure logging
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
+
+# Locations checked when ffmpeg is not on PATH
+COMMON_FFMPEG_PATHS = [
+    "/usr/bin/ffmpeg",
+    "/usr/local/bin/ffmpeg",
+    "/opt/homebrew/bin/ffmpeg"
+]
+
+@functools.lru_cache(maxsize=None)
+def find_ffmpeg() -> Optional[str]:
+    """
+    Find the FFMPEG binary path.
+    
+    The lookup runs once per process and is shared by every service that
+    decodes media.
+    
+    Returns:
+        Path to ffmpeg or None if not found
+    """
+    path = shutil.which("ffmpeg")
+    if path:
+        return path
+    
+    for path in COMMON_FFMPEG_PATHS:
+        if os.path.exists(path):
+            return path
+    
+    logger.warning("FFMPEG not found, media decoding will be skipped or simulated")
+    return None
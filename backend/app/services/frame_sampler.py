@@ -0,0 +1,203 @@
+import logging
+import subprocess
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+import numpy as np
+from ..config import settings
+from .ffmpeg import find_ffmpeg
+
+# Configure logging
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
+
+PIXEL_FORMAT_CHANNELS = {
+    "gray": 1,
+    "rgb24": 3
+}
+
+# Segments closer than this are decoded in one ffmpeg pass instead of seeking to each
+SEGMENT_RUN_MAX_GAP_SECONDS = 10.0
+
+class FrameSampler:
+    """
+    Decode low-resolution frames from a video through an ffmpeg rawvideo pipe.
+    
+    Frames are read straight into a preallocated ring buffer, so sampling never
+    allocates per frame. A yielded frame stays valid until ring_size further frames
+    have been read, which lets callers keep a short history (e.g. the previous frame
+    for motion estimation) without copying. Frames are only decoded as fast as the
+    caller consumes them: ffmpeg blocks on the full pipe, so memory stays constant.
+    The ring is per instance, so use one sampler per consumer.
+    
+    Setting skip_frame makes the decoder drop frames before they are decoded
+    ('bidir' skips B-frames, 'nokey' keeps only keyframes) and skips the
+    in-loop deblocking filter. Sampling at a few frames per second loses little
+    accuracy this way, and full-resolution decoding is most of the cost.
+    """
+    
+    def __init__(
+        self,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        fps: Optional[float] = None,
+        pixel_format: str = "gray",
+        ring_size: Optional[int] = None,
+        skip_frame: Optional[str] = None
+    ):
+        if pixel_format not in PIXEL_FORMAT_CHANNELS:
+            raise ValueError(f"Unsupported pixel format: {pixel_format}")
+        
+        self.ffmpeg_path = find_ffmpeg()
+        self.width = width or settings.frame_sampler_width
+        self.height = height or settings.frame_sampler_height
+        self.fps = fps or settings.frame_sampler_fps
+        self.pixel_format = pixel_format
+        self.skip_frame = skip_frame
+        self.channels = PIXEL_FORMAT_CHANNELS[pixel_format]
+        self.ring_size = max(ring_size or settings.frame_sampler_ring_size, 2)
+        
+        shape = (self.ring_size, self.height, self.width)
+        if self.channels > 1:
+            shape += (self.channels,)
+        self.ring = np.empty(shape, dtype=np.uint8)
+        self.frame_bytes = self.width * self.height * self.channels
+        self._slot = 0
+    
+    @property
+    def available(self) -> bool:
+        """Whether frames can be decoded in this environment"""
+        return self.ffmpeg_path is not None
+    
+    def iter_frames(
+        self,
+        media_path: str,
+        start_time: float = 0.0,
+        end_time: Optional[float] = None,
+        fps: Optional[float] = None
+    ) -> Iterator[Tuple[float, np.ndarray]]:
+        """
+        Sample frames from a time window of a video.
+        
+        Args:
+            media_path: Path to a local video file
+            start_time: Window start in seconds (default: 0.0)
+            end_time: Window end in seconds (optional, defaults to end of video)
+            fps: Sampling rate for this window (optional, defaults to sampler fps)
+        
+        Yields:
+            Tuples of (timestamp in seconds, frame view into the ring buffer)
+        """
+        if not self.available:
+            raise RuntimeError("FFMPEG not found, cannot sample frames")
+        
+        fps = fps or self.fps
+        command = [self.ffmpeg_path, "-nostdin", "-v", "error"]
+        if self.skip_frame:
+            command += ["-skip_frame", self.skip_frame, "-skip_loop_filter", "all"]
+        
+        # Seek on the input side so only the window is demuxed and decoded
+        if start_time > 0:
+            command += ["-ss", f"{start_time:.3f}"]
+        command += ["-i", media_path]
+        if end_time is not None:
+            command += ["-t", f"{max(end_time - start_time, 0.0):.3f}"]
+        command += [
+            "-an",
+            "-vf", f"fps={fps},scale={self.width}:{self.height}",
+            "-pix_fmt", self.pixel_format,
+            "-f", "rawvideo",
+            "-"
+        ]
+        
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=self.frame_bytes
+        )
+        try:
+            index = 0
+            while True:
+                frame = self.ring[self._slot]
+                view = memoryview(frame.reshape(-1))
+                filled = 0
+                while filled < self.frame_bytes:
+                    count = process.stdout.readinto(view[filled:])
+                    if not count:
+                        break
+                    filled += count
+                
+                if filled < self.frame_bytes:
+                    break
+                
+                self._slot = (self._slot + 1) % self.ring_size
+                yield start_time + index / fps, frame
+                index += 1
+        finally:
+            process.stdout.close()
+            process.kill()
+            process.wait()
+    
+    def iter_every(self, media_path: str, interval_seconds: float) -> Iterator[Tuple[float, np.ndarray]]:
+        """
+        Sample one frame every N seconds across the whole video.
+        
+        Args:
+            media_path: Path to a local video file
+            interval_seconds: Seconds between sampled frames
+        
+        Yields:
+            Tuples of (timestamp in seconds, frame view into the ring buffer)
+        """
+        return self.iter_frames(media_path, fps=1.0 / interval_seconds)
+    
+    def iter_segment_frames(
+        self,
+        media_path: str,
+        segments: List[Dict[str, Any]],
+        fps: Optional[float] = None
+    ) -> Iterator[Tuple[int, float, np.ndarray]]:
+        """
+        Sample frames from each segment window.
+        
+        Segments are sorted by start time and grouped into runs whose gaps are at
+        most SEGMENT_RUN_MAX_GAP_SECONDS. Each run is decoded in a single ffmpeg
+        pass, so adjacent segments share one process and one decoder warm-up. A
+        frame inside overlapping segments is yielded once for each of them.
+        
+        Args:
+            media_path: Path to a local video file
+            segments: List of video segments with start_time and end_time
+            fps: Sampling rate within each segment (optional)
+        
+        Yields:
+            Tuples of (segment index, timestamp in seconds, frame view into the ring buffer)
+        """
+        windows = sorted(
+            (segment.get("start_time", 0.0), segment.get("end_time", segment.get("start_time", 0.0)), segment_index)
+            for segment_index, segment in enumerate(segments)
+        )
+        
+        runs: List[List[Tuple[float, float, int]]] = []
+        run_ends: List[float] = []
+        for window in windows:
+            if window[1] <= window[0]:
+                continue
+            if runs and window[0] - run_ends[-1] <= SEGMENT_RUN_MAX_GAP_SECONDS:
+                runs[-1].append(window)
+                run_ends[-1] = max(run_ends[-1], window[1])
+            else:
+                runs.append([window])
+                run_ends.append(window[1])
+        
+        for run, run_end in zip(runs, run_ends):
+            first = 0
+            for timestamp, frame in self.iter_frames(media_path, run[0][0], run_end, fps):
+                # Windows are sorted by start, so skip those that ended before this frame
+                while first < len(run) and run[first][1] <= timestamp:
+                    first += 1
+                for position in range(first, len(run)):
+                    start_time, end_time, segment_index = run[position]
+                    if start_time > timestamp:
+                        break
+                    if timestamp < end_time:
+                        yield segment_index, timestamp, frame
@@ -0,0 +1,236 @@
+import logging
+import os
+import re
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from ..config import settings
+from .disk_cache import DiskCache
+
+# Configure logging
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9']*[a-z0-9]|[a-z0-9]")
+
+STOP_WORDS = np.array(sorted({
+    "a", "about", "above", "actually", "after", "again", "all", "also", "am", "an", "and", "any", "are",
+    "as", "at", "be", "because", "been", "before", "being", "below", "between", "both", "but", "by",
+    "can", "could", "did", "do", "does", "doing", "don't", "down", "during", "each", "even", "every",
+    "few", "for", "from", "further", "get", "go", "going", "gonna", "got", "had", "has", "have",
+    "having", "he", "her", "here", "hers", "him", "his", "how", "i", "i'm", "if", "in", "into", "is",
+    "it", "it's", "its", "just", "know", "let's", "like", "little", "lot", "make", "me", "more", "most",
+    "much", "my", "need", "no", "nor", "not", "now", "of", "off", "okay", "on", "once", "one", "only",
+    "or", "other", "our", "out", "over", "own", "really", "right", "said", "same", "say", "see", "she",
+    "should", "so", "some", "something", "such", "take", "than", "that", "that's", "the", "their",
+    "them", "then", "there", "these", "they", "thing", "things", "think", "this", "those", "through",
+    "to", "too", "under", "until", "up", "us", "very", "want", "was", "way", "we", "we're", "well",
+    "were", "what", "when", "where", "which", "while", "who", "why", "will", "with", "would", "yeah",
+    "you", "you're", "your", "yours"
+}))
+
+class TenantCorpus:
+    """
+    Document frequencies of the n-grams seen in one tenant's transcripts.
+    
+    Terms get dense integer ids in order of first appearance, and document
+    frequencies live in a numpy array indexed by id that grows by doubling, so
+    adding a document costs time proportional to its length. The term ids of
+    documents added with an ID are kept, so re-adding one replaces its counts.
+    """
+    
+    def __init__(self):
+        self.term_ids: Dict[str, int] = {}
+        self.terms: List[str] = []
+        self.document_frequency = np.zeros(1024, dtype=np.int32)
+        self.documents = 0
+        self.document_terms: Dict[str, np.ndarray] = {}
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the corpus to JSON-compatible values"""
+        return {
+            "terms": self.terms,
+            "document_frequency": self.document_frequency[:len(self.terms)].tolist(),
+            "documents": self.documents,
+            "document_terms": {document_id: ids.tolist() for document_id, ids in self.document_terms.items()}
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TenantCorpus":
+        """Rebuild a corpus serialized with to_dict"""
+        corpus = cls()
+        corpus.terms = list(data["terms"])
+        corpus.term_ids = {term: term_id for term_id, term in enumerate(corpus.terms)}
+        corpus.document_frequency = np.zeros(max(len(corpus.terms), 1024), dtype=np.int32)
+        corpus.document_frequency[:len(corpus.terms)] = data["document_frequency"]
+        corpus.documents = data["documents"]
+        corpus.document_terms = {
+            document_id: np.array(ids, dtype=np.int32) for document_id, ids in data["document_terms"].items()
+        }
+        return corpus
+    
+    def lookup(self, terms: np.ndarray, add: bool) -> np.ndarray:
+        """
+        Map terms to ids.
+        
+        Args:
+            terms: Unique terms
+            add: Whether to assign ids to unseen terms (otherwise they map to -1)
+        
+        Returns:
+            Term ids
+        """
+        ids = np.empty(len(terms), dtype=np.int64)
+        for index, term in enumerate(terms.tolist()):
+            term_id = self.term_ids.get(term, -1)
+            if term_id < 0 and add:
+                term_id = len(self.terms)
+                self.term_ids[term] = term_id
+                self.terms.append(term)
+            ids[index] = term_id
+        
+        if len(self.terms) > len(self.document_frequency):
+            grown = np.zeros(max(len(self.terms), 2 * len(self.document_frequency)), dtype=np.int32)
+            grown[:len(self.document_frequency)] = self.document_frequency
+            self.document_frequency = grown
+        
+        return ids
+
+class KeywordEngine:
+    """
+    TF-IDF keyword extraction over an incrementally maintained corpus per tenant.
+    
+    Documents are turned into sparse term vectors (unique term ids and counts) of
+    unigrams and n-grams up to keyword_ngram_max, skipping n-grams that start or end
+    with a stop word. Counting and scoring run on numpy arrays; only unique terms are
+    looked up in the tenant vocabulary.
+    
+    Each tenant's corpus is written to a disk cache after every added document and
+    loaded from it on first use, so document frequencies survive restarts. The cache
+    is bounded by size; a tenant evicted from it starts over with an empty corpus.
+    """
+    
+    def __init__(self):
+        self.corpora: Dict[str, TenantCorpus] = {}
+        self.cache = DiskCache(
+            os.path.join(settings.cache_dir, "keyword_corpora"),
+            settings.keyword_corpus_cache_max_bytes
+        )
+        self._lock = threading.Lock()
+    
+    def _corpus(self, tenant: str) -> TenantCorpus:
+        """Get a tenant's corpus, loading it from disk on first use; call with the lock held"""
+        corpus = self.corpora.get(tenant)
+        if corpus is None:
+            data = self.cache.get(DiskCache.make_key("keyword_corpus", tenant))
+            corpus = TenantCorpus.from_dict(data) if data is not None else TenantCorpus()
+            self.corpora[tenant] = corpus
+        return corpus
+    
+    def _term_counts(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Count the n-grams of a text.
+        
+        Args:
+            text: Input text
+        
+        Returns:
+            Tuple of (unique terms, counts)
+        """
+        tokens = np.array(TOKEN_PATTERN.findall(text.lower()))
+        if len(tokens) == 0:
+            return np.array([], dtype=str), np.array([], dtype=np.int64)
+        
+        stop = np.isin(tokens, STOP_WORDS)
+        grams = [tokens[~stop & (np.char.str_len(tokens) > 2)]]
+        
+        for n in range(2, settings.keyword_ngram_max + 1):
+            if len(tokens) < n:
+                break
+            # An n-gram is kept when its first and last words are not stop words
+            keep = ~stop[:len(tokens) - n + 1] & ~stop[n - 1:]
+            gram = tokens[:len(tokens) - n + 1][keep]
+            for offset in range(1, n):
+                gram = np.char.add(np.char.add(gram, " "), tokens[offset:len(tokens) - n + 1 + offset][keep])
+            grams.append(gram)
+        
+        return np.unique(np.concatenate(grams), return_counts=True)
+    
+    def add_document(self, tenant: str, text: str, document_id: Optional[str] = None) -> None:
+        """
+        Add a transcript to a tenant's corpus, updating document frequencies.
+        
+        Args:
+            tenant: Tenant the transcript belongs to, e.g. the user ID
+            text: Transcript text
+            document_id: ID of the document, e.g. the content ID (optional); a document
+                added again under the same ID replaces its earlier version
+        """
+        terms, _ = self._term_counts(text)
+        with self._lock:
+            corpus = self._corpus(tenant)
+            if document_id is not None:
+                previous = corpus.document_terms.pop(document_id, None)
+                if previous is not None:
+                    corpus.document_frequency[previous] -= 1
+                    corpus.documents -= 1
+            
+            ids = corpus.lookup(terms, add=True)
+            corpus.document_frequency[ids] += 1
+            corpus.documents += 1
+            if document_id is not None:
+                corpus.document_terms[document_id] = ids.astype(np.int32)
+            
+            # Written under the lock so a slower writer cannot persist an older state
+            self.cache.set(DiskCache.make_key("keyword_corpus", tenant), corpus.to_dict())
+    
+    def extract_keywords(self, tenant: str, text: str, top_k: int = 10) -> List[str]:
+        """
+        Rank the terms of a text by TF-IDF against a tenant's corpus.
+        
+        Args:
+            tenant: Tenant whose document frequencies to use
+            text: Input text
+            top_k: Number of keywords to return
+        
+        Returns:
+            Keywords ordered by score, with unigrams dropped when a higher-ranked n-gram contains them
+        """
+        terms, counts = self._term_counts(text)
+        if len(terms) == 0:
+            return []
+        
+        with self._lock:
+            corpus = self._corpus(tenant)
+            ids = corpus.lookup(terms, add=False)
+            document_frequency = np.where(ids >= 0, corpus.document_frequency[np.maximum(ids, 0)], 0)
+            documents = corpus.documents
+        
+        # Smoothed IDF and sublinear term frequency; longer n-grams get a small boost
+        idf = np.log((1 + documents) / (1 + document_frequency)) + 1
+        lengths = np.char.count(terms, " ") + 1
+        scores = (1 + np.log(counts)) * idf * (1 + 0.25 * (lengths - 1))
+        # N-grams seen once are usually accidental word pairs
+        scores[(lengths > 1) & (counts < 2)] = 0
+        
+        candidates = min(len(terms), top_k * 3)
+        top = np.argpartition(-scores, candidates - 1)[:candidates]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        
+        keywords = []
+        covered = set()
+        for index in top.tolist():
+            if scores[index] <= 0:
+                break
+            term = str(terms[index])
+            if term in covered:
+                continue
+            keywords.append(term)
+            covered.update(term.split())
+            if len(keywords) == top_k:
+                break
+        
+        return keywords
+
+# Create global keyword engine instance
+keyword_engine = KeywordEngine()
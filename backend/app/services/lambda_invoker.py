@@ -0,0 +1,235 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
+import boto3
+import numpy as np
+from botocore.config import Config
+from ..config import settings
+
+# Configure logging
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+
+# Recent latencies kept per function for percentiles and hedge delays
+LATENCY_WINDOW = 1024
+
+def create_lambda_client(read_timeout: float, max_attempts: int):
+    """
+    Create a boto3 Lambda client sized for the invoker.
+    
+    The connection pool matches the executor, so every worker thread gets a
+    connection, and the socket timeouts bound how long a worker stays blocked
+    after its caller's deadline has passed. botocore retries read timeouts too,
+    so a worker can be held for up to max_attempts read timeouts.
+    
+    Args:
+        read_timeout: Socket read timeout in seconds for one attempt
+        max_attempts: Total attempts per invoke, including the first; 1 disables retries
+    
+    Returns:
+        boto3 Lambda client
+    """
+    config = Config(
+        max_pool_connections=settings.lambda_max_concurrency,
+        connect_timeout=settings.lambda_connect_timeout_seconds,
+        read_timeout=read_timeout,
+        retries={"total_max_attempts": max(max_attempts, 1), "mode": "standard"},
+        tcp_keepalive=True
+    )
+    return boto3.client(
+        'lambda',
+        region_name=settings.aws_region,
+        aws_access_key_id=settings.aws_access_key_id,
+        aws_secret_access_key=settings.aws_secret_access_key,
+        config=config
+    )
+
+class LatencyHistogram:
+    """
+    Invoke latencies of one Lambda function.
+    
+    Cumulative bucket counts show the overall shape, where cold starts appear as
+    a separate mode in the upper buckets; a window of recent latencies gives the
+    percentiles and the hedge delay.
+    """
+    
+    def __init__(self):
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.recent = deque(maxlen=LATENCY_WINDOW)
+        self.count = 0
+        self.total_seconds = 0.0
+        self.errors = 0
+        self.timeouts = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+    
+    def record(self, seconds: float, error: bool = False) -> None:
+        milliseconds = seconds * 1000
+        bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if milliseconds <= bound), len(LATENCY_BUCKETS_MS))
+        with self._lock:
+            self.bucket_counts[bucket] += 1
+            self.recent.append(seconds)
+            self.count += 1
+            self.total_seconds += seconds
+            if error:
+                self.errors += 1
+    
+    def count_event(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """Recent latency percentile in seconds, or None without samples"""
+        with self._lock:
+            recent = list(self.recent)
+        return float(np.percentile(recent, q)) if recent else None
+    
+    def hedge_delay(self) -> float:
+        """
+        Time to wait before sending a hedged duplicate.
+        
+        Returns:
+            The lambda_hedge_percentile of recent latencies once enough are known,
+            but at least lambda_hedge_min_delay_seconds; otherwise lambda_hedge_after_seconds
+        """
+        if len(self.recent) >= settings.lambda_hedge_min_samples:
+            return max(self.percentile(settings.lambda_hedge_percentile), settings.lambda_hedge_min_delay_seconds)
+        return settings.lambda_hedge_after_seconds
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            recent = np.array(self.recent) * 1000
+            stats = {
+                "invocations": self.count,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "mean_ms": round(self.total_seconds / self.count * 1000, 1) if self.count else 0.0,
+                "buckets_ms": {
+                    **{f"le_{bound}": count for bound, count in zip(LATENCY_BUCKETS_MS, self.bucket_counts)},
+                    "le_inf": self.bucket_counts[-1]
+                }
+            }
+        for q in (50, 95, 99):
+            stats[f"p{q}_ms"] = round(float(np.percentile(recent, q)), 1) if len(recent) else 0.0
+        return stats
+
+class LambdaInvoker:
+    """
+    Non-blocking Lambda invokes with deadlines and optional hedging.
+    
+    Blocking boto3 invokes run on a dedicated executor of lambda_max_concurrency
+    threads, so a cold function never stalls the event loop and cannot take
+    over the default executor other services share. Each call has a deadline
+    covering both queueing and the invoke. Idempotent calls can be hedged: if
+    the first attempt is slower than the function's recent tail, a duplicate
+    is sent and whichever finishes first wins. Calls that must not run twice go
+    through a second client that never retries.
+    """
+    
+    def __init__(self, client, single_attempt_client=None):
+        self.client = client
+        self.single_attempt_client = single_attempt_client or client
+        self.executor = ThreadPoolExecutor(max_workers=max(settings.lambda_max_concurrency, 1), thread_name_prefix="lambda")
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+    
+    def _histogram(self, function_name: str) -> LatencyHistogram:
+        with self._lock:
+            histogram = self.histograms.get(function_name)
+            if histogram is None:
+                histogram = self.histograms[function_name] = LatencyHistogram()
+            return histogram
+    
+    def _invoke_blocking(self, client, function_name: str, payload: bytes, histogram: LatencyHistogram) -> bytes:
+        """Invoke a function synchronously on a worker thread and record its latency"""
+        start_time = time.perf_counter()
+        try:
+            response = client.invoke(
+                FunctionName=function_name,
+                InvocationType='RequestResponse',
+                Payload=payload
+            )
+            response_payload = response['Payload'].read()
+            if response.get('FunctionError'):
+                raise RuntimeError(f"Lambda function {function_name} failed: {response_payload[:500]!r}")
+        except Exception:
+            histogram.record(time.perf_counter() - start_time, error=True)
+            raise
+        histogram.record(time.perf_counter() - start_time)
+        return response_payload
+    
+    async def invoke(self, function_name: str, payload: bytes, timeout: float, hedge: bool = False, retry: bool = True) -> bytes:
+        """
+        Invoke a Lambda function without blocking the event loop.
+        
+        Args:
+            function_name: Name of the Lambda function
+            payload: Request payload
+            timeout: Deadline in seconds for the whole call
+            hedge: Whether the call is idempotent and may be duplicated when slow
+            retry: Whether the client may retry after a transport error or read timeout;
+                pass False for calls that are not idempotent
+        
+        Returns:
+            Raw response payload
+        
+        Raises:
+            asyncio.TimeoutError: If the deadline passes first
+        """
+        histogram = self._histogram(function_name)
+        try:
+            client = self.client if retry else self.single_attempt_client
+            return await asyncio.wait_for(self._race(client, function_name, payload, histogram, hedge and retry), timeout)
+        except asyncio.TimeoutError:
+            histogram.count_event("timeouts")
+            logger.warning(f"Lambda function {function_name} missed its {timeout}s deadline")
+            raise asyncio.TimeoutError(f"Lambda function {function_name} missed its {timeout}s deadline") from None
+    
+    async def _race(self, client, function_name: str, payload: bytes, histogram: LatencyHistogram, hedge: bool) -> bytes:
+        loop = asyncio.get_running_loop()
+        primary = loop.run_in_executor(self.executor, self._invoke_blocking, client, function_name, payload, histogram)
+        attempts = {primary}
+        try:
+            if hedge and settings.lambda_hedge_enabled:
+                done, _ = await asyncio.wait(attempts, timeout=histogram.hedge_delay())
+                if not done:
+                    histogram.count_event("hedged")
+                    attempts.add(loop.run_in_executor(self.executor, self._invoke_blocking, client, function_name, payload, histogram))
+            
+            # First successful attempt wins; fail only once every attempt has failed
+            pending = set(attempts)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    if attempt.exception() is None:
+                        if attempt is not primary:
+                            histogram.count_event("hedge_wins")
+                        return attempt.result()
+                    error = attempt.exception()
+            raise error
+        finally:
+            # Attempts still queued are dropped; running ones finish on their worker
+            for attempt in attempts:
+                attempt.cancel()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get per-function latency histograms.
+        
+        Returns:
+            Statistics keyed by function name
+        """
+        with self._lock:
+            histograms = dict(self.histograms)
+        return {function_name: histogram.get_stats() for function_name, histogram in histograms.items()}
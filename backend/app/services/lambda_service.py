@@ -1,10 +1,13 @@
+import asyncio
 import logging
 import json
-import boto3
 import uuid
 from typing import Dict, Any, Optional, List
 from ..config import settings
 from ..database import db, create_item, get_item, update_item
+from .engagement_batcher import EngagementBatcher, CONTENT_TYPE_SCORES, create_prediction_function, extract_features
+from .engagement_model import LinearEngagementModel, engagement_model_registry, train_linear_model, validate_version
+from .lambda_invoker import LambdaInvoker, create_lambda_client
 
 # Configure logging
 logging.basicConfig(level=settings.log_level)
@@ -13,24 +16,33 @@ logger = logging.getLogger(__name__)
 class LambdaService:
     def __init__(self):
         self.lambda_client = None
+        self.lambda_invoker = None
         self.initialized = False
+        self.engagement_batcher = None
         self.initialize_client()
     
     def initialize_client(self):
         """Initialize AWS Lambda client"""
         try:
             if settings.aws_access_key_id and settings.aws_secret_access_key:
-                self.lambda_client = boto3.client(
-                    'lambda',
-                    region_name=settings.aws_region,
-                    aws_access_key_id=settings.aws_access_key_id,
-                    aws_secret_access_key=settings.aws_secret_access_key
+                # Predictions and model info read with a timeout near their deadline;
+                # training waits as long as its deadline but is never retried
+                self.lambda_client = create_lambda_client(
+                    max(settings.lambda_prediction_timeout_seconds, settings.lambda_model_info_timeout_seconds),
+                    settings.lambda_max_attempts
                 )
+                training_client = create_lambda_client(settings.lambda_training_timeout_seconds, 1)
+                self.lambda_invoker = LambdaInvoker(self.lambda_client, training_client)
                 self.initialized = True
                 logger.info("AWS Lambda client initialized successfully")
             else:
                 logger.warning("AWS credentials not provided, Lambda operations will be simulated")
                 self.initialized = False
+            
+            # Batch engagement predictions into compact multi-row invokes
+            prediction_function = create_prediction_function(self.lambda_invoker)
+            if prediction_function:
+                self.engagement_batcher = EngagementBatcher(prediction_function)
         except Exception as e:
             logger.error(f"Error initializing AWS Lambda client: {str(e)}")
             self.initialized = False
@@ -43,13 +55,13 @@ class LambdaService:
         metadata: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
-        Predict engagement potential using AWS Lambda function.
+        Predict engagement potential with the in-process model, or the AWS Lambda function.
         
         Args:
             content_id: ID of the content
             segments: List of content segments
             content_type: Type of content
-            metadata: Additional metadata (optional)
+            metadata: Additional metadata (optional, not sent to the prediction function)
             
         Returns:
             Engagement prediction result
@@ -57,32 +69,31 @@ class LambdaService:
         logger.info(f"Predicting engagement for content ID: {content_id}")
         
         try:
-            # Prepare payload for Lambda function
-            payload = {
-                "content_id": content_id,
-                "segments": segments,
-                "content_type": content_type,
-                "metadata": metadata or {}
-            }
-            
-            if self.initialized and self.lambda_client:
-                # Invoke Lambda function
-                response = self.lambda_client.invoke(
-                    FunctionName=settings.engagement_prediction_lambda,
-                    InvocationType='RequestResponse',
-                    Payload=json.dumps(payload)
-                )
+            if settings.engagement_scoring_backend.lower() == "local":
+                # Score all segments in one vectorized call, no network round trip
+                model = engagement_model_registry.active
+                score, segment_scores = model.score(segments, content_type)
                 
-                # Parse response
-                response_payload = json.loads(response['Payload'].read().decode())
+                return {
+                    "content_id": content_id,
+                    "prediction": score,
+                    "confidence": model.metrics.get("confidence", 0.8),
+                    "factors": self._prediction_factors(segments, content_type),
+                    "segment_scores": [round(float(segment_score), 4) for segment_score in segment_scores],
+                    "model_version": model.version,
+                    "success": True
+                }
+            elif self.engagement_batcher:
+                # Only numeric features are sent; concurrent requests share one invoke
+                score, confidence = await self.engagement_batcher.predict(extract_features(segments, content_type))
                 
                 logger.info(f"Engagement prediction completed for content ID: {content_id}")
                 
                 return {
                     "content_id": content_id,
-                    "prediction": response_payload.get("prediction", 0.0),
-                    "confidence": response_payload.get("confidence", 0.0),
-                    "factors": response_payload.get("factors", []),
+                    "prediction": score,
+                    "confidence": confidence,
+                    "factors": self._prediction_factors(segments, content_type),
                     "success": True
                 }
             else:
@@ -117,11 +128,16 @@ class LambdaService:
         model_name: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Train engagement prediction model using AWS Lambda function.
+        Train engagement prediction model.
+        
+        By default the model training Lambda function trains it; a linear model in
+        its response is published to the in-process registry, which makes it the
+        active model for local scoring. With engagement_training_backend set to
+        "local", the linear model is fitted in-process and published instead.
         
         Args:
-            training_data: List of training data samples
-            model_name: Name of the model (optional)
+            training_data: List of training data samples, each {"segments", "content_type", "engagement"}
+            model_name: Name of the model (optional), also its version
             
         Returns:
             Training result
@@ -133,6 +149,9 @@ class LambdaService:
             if not model_name:
                 model_name = f"engagement_model_{uuid.uuid4().hex[:8]}"
             
+            # The name doubles as the model version, which names its file
+            validate_version(model_name)
+            
             # Prepare payload for Lambda function
             payload = {
                 "action": "train",
@@ -140,22 +159,41 @@ class LambdaService:
                 "training_data": training_data
             }
             
-            if self.initialized and self.lambda_client:
-                # Invoke Lambda function
-                response = self.lambda_client.invoke(
-                    FunctionName=settings.model_training_lambda,
-                    InvocationType='RequestResponse',
-                    Payload=json.dumps(payload)
+            if settings.engagement_training_backend.lower() == "local":
+                model = await asyncio.to_thread(train_linear_model, training_data, model_name)
+                activated = await asyncio.to_thread(engagement_model_registry.publish, model)
+                
+                logger.info(f"Model training completed: {model_name}")
+                
+                return {
+                    "model_name": model_name,
+                    "metrics": model.metrics,
+                    "activated": activated,
+                    "success": True
+                }
+            elif self.initialized and self.lambda_invoker:
+                # Invoke Lambda function; training is not idempotent, so it is never hedged or retried
+                response = await self.lambda_invoker.invoke(
+                    settings.model_training_lambda,
+                    json.dumps(payload).encode("utf-8"),
+                    settings.lambda_training_timeout_seconds,
+                    retry=False
                 )
                 
                 # Parse response
-                response_payload = json.loads(response['Payload'].read().decode())
+                response_payload = json.loads(response.decode())
+                
+                # Linear models can also be served in-process
+                activated = False
+                if "model" in response_payload:
+                    activated = engagement_model_registry.publish(LinearEngagementModel.from_dict(response_payload["model"]))
                 
                 logger.info(f"Model training completed: {model_name}")
                 
                 return {
                     "model_name": model_name,
                     "metrics": response_payload.get("metrics", {}),
+                    "activated": activated,
                     "success": True
                 }
             else:
@@ -204,16 +242,28 @@ class LambdaService:
                 "model_name": model_name
             }
             
-            if self.initialized and self.lambda_client:
+            model = engagement_model_registry.get(model_name)
+            if model is not None:
+                info = model.to_dict()
+                info["active"] = model is engagement_model_registry.active
+                info["framework"] = "numpy"
+                
+                return {
+                    "model_name": model_name,
+                    "info": info,
+                    "success": True
+                }
+            elif self.initialized and self.lambda_invoker:
                 # Invoke Lambda function
-                response = self.lambda_client.invoke(
-                    FunctionName=settings.model_training_lambda,
-                    InvocationType='RequestResponse',
-                    Payload=json.dumps(payload)
+                response = await self.lambda_invoker.invoke(
+                    settings.model_training_lambda,
+                    json.dumps(payload).encode("utf-8"),
+                    settings.lambda_model_info_timeout_seconds,
+                    hedge=True
                 )
                 
                 # Parse response
-                response_payload = json.loads(response['Payload'].read().decode())
+                response_payload = json.loads(response.decode())
                 
                 logger.info(f"Retrieved information for model: {model_name}")
                 
@@ -255,6 +305,15 @@ class LambdaService:
                 "error": str(e)
             }
     
+    def get_latency_stats(self) -> Dict[str, Any]:
+        """
+        Get per-function Lambda latency histograms.
+        
+        Returns:
+            Statistics keyed by function name (empty when Lambda is not configured)
+        """
+        return self.lambda_invoker.get_stats() if self.lambda_invoker else {}
+    
     def _simulate_engagement_prediction(
         self,
         segments: List[Dict[str, Any]],
@@ -272,18 +331,8 @@ class LambdaService:
         """
         import random
         
-        # Base prediction based on content type
-        content_type_scores = {
-            "educational": 0.7,
-            "promotional": 0.6,
-            "entertainment": 0.8,
-            "tutorial": 0.75,
-            "interview": 0.65,
-            "presentation": 0.55
-        }
-        
         # Get base score for content type
-        base_score = content_type_scores.get(content_type, 0.5)
+        base_score = CONTENT_TYPE_SCORES.get(content_type, 0.5)
         
         # Adjust score based on segments
         segment_count = len(segments)
@@ -304,20 +353,7 @@ class LambdaService:
         final_score = min(max(final_score + random.uniform(-0.05, 0.05), 0.0), 1.0)
         
         # Generate factors that influenced the prediction
-        factors = []
-        
-        if content_type in content_type_scores:
-            factors.append(f"{content_type.capitalize()} content typically performs well")
-        
-        if segment_count > 3:
-            factors.append("Multiple engaging segments detected")
-        elif segment_count <= 1:
-            factors.append("Limited number of segments may reduce engagement")
-        
-        if avg_importance > 0.7:
-            factors.append("High-quality content segments")
-        elif avg_importance < 0.4:
-            factors.append("Content segments could be more impactful")
+        factors = self._prediction_factors(segments, content_type)
         
         # Add some generic factors
         generic_factors = [
@@ -336,6 +372,36 @@ class LambdaService:
             "confidence": random.uniform(0.7, 0.9),
             "factors": factors[:5]  # Limit to top 5 factors
         }
+    
+    def _prediction_factors(self, segments: List[Dict[str, Any]], content_type: str) -> List[str]:
+        """
+        Describe the content properties that drive an engagement prediction.
+        
+        Args:
+            segments: List of content segments
+            content_type: Type of content
+            
+        Returns:
+            Human-readable factors
+        """
+        factors = []
+        segment_count = len(segments)
+        avg_importance = sum(segment.get("importance_score", 0.0) for segment in segments) / segment_count if segments else 0.0
+        
+        if content_type in CONTENT_TYPE_SCORES:
+            factors.append(f"{content_type.capitalize()} content typically performs well")
+        
+        if segment_count > 3:
+            factors.append("Multiple engaging segments detected")
+        elif segment_count <= 1:
+            factors.append("Limited number of segments may reduce engagement")
+        
+        if avg_importance > 0.7:
+            factors.append("High-quality content segments")
+        elif avg_importance < 0.4:
+            factors.append("Content segments could be more impactful")
+        
+        return factors
 
 # Create global lambda service instance
 lambda_service = LambdaService()
@@ -0,0 +1,106 @@
+import logging
+import os
+import re
+import threading
+import unicodedata
+from typing import Dict, Any, Optional
+from ..config import settings
+from .disk_cache import DiskCache
+
+# Configure logging
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
+
+class LLMResponseCache:
+    """
+    Persistent cache of parsed LLM responses.
+    
+    Entries are keyed by the normalized input text, the prompt template version and
+    the model, so changing either the prompt or the model starts from a cold cache.
+    Each entry records how long the original request took, which is credited as
+    latency saved whenever the entry is served.
+    """
+    
+    def __init__(self):
+        self.cache = DiskCache(
+            os.path.join(settings.cache_dir, "llm"),
+            settings.llm_cache_max_bytes
+        )
+        self.saved_latency_seconds = 0.0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Normalize text so trivially different inputs share a cache entry.
+        
+        Args:
+            text: Input text
+        
+        Returns:
+            Text in Unicode NFC form with runs of whitespace collapsed
+        """
+        return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+    
+    def make_key(self, task: str, text: str, context: str, template_version: str, model: str) -> str:
+        """
+        Build the cache key for an LLM request.
+        
+        Args:
+            task: Name of the prompt, e.g. 'keywords_summary'
+            text: Normalized input text
+            context: Other prompt inputs, e.g. the content type
+            template_version: Version of the prompt template
+            model: Model name
+        
+        Returns:
+            Cache key
+        """
+        return DiskCache.make_key("llm", task, text, context, template_version, model)
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response and account for the latency it saves.
+        
+        Args:
+            key: Cache key from make_key
+        
+        Returns:
+            Cached response or None on a miss
+        """
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        
+        with self._lock:
+            self.saved_latency_seconds += entry.get("latency_seconds", 0.0)
+        return entry.get("response")
+    
+    def set(self, key: str, response: Dict[str, Any], latency_seconds: float) -> None:
+        """
+        Store a parsed response.
+        
+        Args:
+            key: Cache key from make_key
+            response: Parsed, JSON-serializable response
+            latency_seconds: Time the model request took
+        """
+        self.cache.set(key, {
+            "response": response,
+            "latency_seconds": latency_seconds
+        })
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get LLM cache statistics.
+        
+        Returns:
+            Cache statistics including the model latency saved by hits
+        """
+        stats = self.cache.get_stats()
+        with self._lock:
+            stats["saved_latency_seconds"] = round(self.saved_latency_seconds, 2)
+        return stats
+
+# Create global LLM response cache instance
+llm_cache = LLMResponseCache()
@@ -0,0 +1,350 @@
+import asyncio
+import html
+import json
+import logging
+import re
+import time
+from collections import Counter
+from typing import List, Dict, Any, Optional, Protocol, Tuple
+from ..config import settings
+
+# Configure logging
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
+
+# Documents are embedded in prompts between these tags; responses refer to them by id.
+# Tag contents are XML-escaped so a document cannot close its own tag or forge another.
+DOCUMENT_TEMPLATE = '<document id="{id}" content_type="{content_type}">\n{text}\n</document>'
+DOCUMENT_PATTERN = re.compile(r'<document id="([^"]*)" content_type="([^"]*)">\n(.*?)\n</document>', re.DOTALL)
+
+def format_document(document_id: int, content_type: str, text: str) -> str:
+    """
+    Wrap a document in prompt tags, escaping anything that could be read as markup.
+    
+    Args:
+        document_id: Id the model echoes back in its result
+        content_type: Type of content
+        text: Document text
+    
+    Returns:
+        Tagged document
+    """
+    return DOCUMENT_TEMPLATE.format(
+        id=document_id,
+        content_type=html.escape(content_type),
+        text=html.escape(text, quote=False)
+    )
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of model tokens in a text (about four characters per token).
+    
+    Args:
+        text: Input text
+    
+    Returns:
+        Estimated token count
+    """
+    return len(text) // 4 + 1
+
+class ChatModel(Protocol):
+    """
+    Interface for chat completion models used by the dispatcher.
+    
+    complete returns the raw text of the model reply and must not block the event loop.
+    """
+    
+    name: str
+    
+    async def complete(self, system: str, prompt: str, max_tokens: int) -> str:
+        ...
+
+class OpenAIChatModel:
+    def __init__(self, client, model: str):
+        self.client = client
+        self.name = model
+    
+    async def complete(self, system: str, prompt: str, max_tokens: int) -> str:
+        """
+        Run a chat completion.
+        
+        Args:
+            system: System message
+            prompt: User message
+            max_tokens: Maximum tokens in the reply
+        
+        Returns:
+            Text of the reply
+        """
+        response = await asyncio.to_thread(
+            self.client.chat.completions.create,
+            model=self.name,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=max_tokens
+        )
+        return response.choices[0].message.content
+
+class LocalChatModel:
+    """
+    Deterministic offline stand-in for tests and load benchmarks.
+    
+    Answers multi-document prompts with per-document keywords (most frequent longer
+    words) and summaries (leading words), echoing each document id. An optional
+    fixed delay mimics model latency.
+    """
+    
+    name = "local-fake-v1"
+    
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+    
+    async def complete(self, system: str, prompt: str, max_tokens: int) -> str:
+        """
+        Produce a deterministic reply for the documents in a prompt.
+        
+        Args:
+            system: System message (unused)
+            prompt: User message containing tagged documents
+            max_tokens: Maximum tokens in the reply (unused)
+        
+        Returns:
+            JSON reply with one result per document
+        """
+        self.calls += 1
+        if self.latency_seconds > 0:
+            await asyncio.sleep(self.latency_seconds)
+        
+        results = []
+        for document_id, content_type, text in DOCUMENT_PATTERN.findall(prompt):
+            text = html.unescape(text)
+            words = re.findall(r"[a-z']+", text.lower())
+            counts = Counter(word for word in words if len(word) > 3)
+            results.append({
+                "id": document_id,
+                "keywords": [word for word, _ in counts.most_common(10)],
+                "summary": " ".join(text.split()[:30])
+            })
+        
+        return json.dumps({"results": results})
+
+class TokenBucket:
+    """
+    Token-per-minute budget shared by all model requests.
+    
+    Requests wait in arrival order until the bucket has refilled enough for them.
+    A request larger than the whole budget waits for a full bucket.
+    """
+    
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = max(tokens_per_minute, 1)
+        self.rate = self.capacity / 60
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.queued_tokens = 0
+        self._lock: Optional[asyncio.Lock] = None
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    async def acquire(self, tokens: int) -> None:
+        """
+        Wait until the budget allows a request of the given size, then spend it.
+        
+        Args:
+            tokens: Estimated prompt plus reply tokens
+        """
+        tokens = min(tokens, self.capacity)
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        
+        self.queued_tokens += tokens
+        try:
+            async with self._lock:
+                self._refill()
+                while self.tokens < tokens:
+                    await asyncio.sleep((tokens - self.tokens) / self.rate)
+                    self._refill()
+                self.tokens -= tokens
+        finally:
+            self.queued_tokens -= tokens
+    
+    def wait_estimate(self) -> float:
+        """
+        Estimate how long a new request would queue for budget.
+        
+        Returns:
+            Expected wait in seconds
+        """
+        self._refill()
+        return max(self.queued_tokens - self.tokens, 0) / self.rate
+
+class LLMDispatcher:
+    """
+    Route document analysis requests to a chat model under a shared budget.
+    
+    Identical in-flight requests (same document and content type) share one model
+    call. Short documents that arrive within a small window are packed into one
+    multi-document prompt, up to a token and document limit; long documents go
+    alone. Every model call first takes its estimated tokens from a token-per-minute
+    bucket and then a concurrency slot, so bursts queue instead of hitting rate limits.
+    
+    The prompt template has a {documents} placeholder, and replies must be JSON with a
+    'results' array of objects carrying the id of the document they answer.
+    """
+    
+    def __init__(self, model: ChatModel, system_prompt: str, prompt_template: str):
+        self.model = model
+        self.system_prompt = system_prompt
+        self.prompt_template = prompt_template
+        self.bucket = TokenBucket(settings.llm_tokens_per_minute)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._waiting_calls = 0
+        self._pending: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._batch: List[Tuple[str, str, asyncio.Future]] = []
+        self._batch_tokens = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+    
+    @property
+    def is_overloaded(self) -> bool:
+        """Whether a new request would queue longer than llm_overload_queue_seconds"""
+        if self._waiting_calls >= max(settings.llm_max_concurrency, 1):
+            return True
+        return self.bucket.wait_estimate() > settings.llm_overload_queue_seconds
+    
+    async def analyze(self, document: str, content_type: str, batchable: bool = True) -> Dict[str, Any]:
+        """
+        Analyze one document, sharing the model call with identical or batched requests.
+        
+        Args:
+            document: Document text
+            content_type: Type of content
+            batchable: Whether the document may share a prompt with other documents
+        
+        Returns:
+            Parsed result for the document (without its 'id')
+        """
+        key = (document, content_type)
+        if key in self._pending:
+            return await asyncio.shield(self._pending[key])
+        
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            if batchable:
+                self._enqueue(document, content_type, future)
+            else:
+                self._start([(document, content_type, future)])
+            return await asyncio.shield(future)
+        finally:
+            del self._pending[key]
+    
+    def _enqueue(self, document: str, content_type: str, future: asyncio.Future) -> None:
+        tokens = estimate_tokens(document)
+        max_tokens = settings.llm_batch_max_tokens
+        
+        if tokens > max_tokens or settings.llm_batch_max_documents <= 1:
+            self._start([(document, content_type, future)])
+            return
+        
+        if self._batch_tokens + tokens > max_tokens:
+            self._flush()
+        
+        self._batch.append((document, content_type, future))
+        self._batch_tokens += tokens
+        
+        if len(self._batch) >= settings.llm_batch_max_documents:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(settings.llm_batch_window_seconds, self._flush)
+    
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        if self._batch:
+            items = self._batch
+            self._batch = []
+            self._batch_tokens = 0
+            self._start(items)
+    
+    def _start(self, items: List[Tuple[str, str, asyncio.Future]]) -> None:
+        task = asyncio.get_running_loop().create_task(self._run(items))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, items: List[Tuple[str, str, asyncio.Future]]) -> None:
+        """Send one prompt for a batch of documents and resolve each document's future"""
+        documents = "\n\n".join(
+            format_document(index, content_type, document)
+            for index, (document, content_type, _) in enumerate(items)
+        )
+        prompt = self.prompt_template.format(documents=documents)
+        max_tokens = settings.llm_output_tokens_per_document * len(items)
+        
+        try:
+            await self.bucket.acquire(estimate_tokens(self.system_prompt + prompt) + max_tokens)
+            
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(max(settings.llm_max_concurrency, 1))
+            self._waiting_calls += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self._waiting_calls -= 1
+            try:
+                reply = await self.model.complete(self.system_prompt, prompt, max_tokens)
+            finally:
+                self._semaphore.release()
+            
+            results = {str(result.get("id")): result for result in json.loads(reply).get("results", [])}
+        except Exception as e:
+            logger.error(f"Error in LLM request for {len(items)} document(s): {str(e)}")
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        logger.info(f"LLM request answered {len(results)} of {len(items)} document(s)")
+        
+        for index, (document, content_type, future) in enumerate(items):
+            result = results.get(str(index))
+            if result is not None:
+                future.set_result({key: value for key, value in result.items() if key != "id"})
+            elif len(items) > 1:
+                # Retry documents the model dropped from a batch on their own
+                self._start([(document, content_type, future)])
+            else:
+                future.set_exception(ValueError("Document missing from LLM response"))
+
+def create_chat_model(openai_client=None) -> Optional[ChatModel]:
+    """
+    Create the text analysis model selected in settings.
+    
+    Args:
+        openai_client: Initialized OpenAI client, if an API key is configured
+    
+    Returns:
+        Model instance, or None when the selected model is not configured
+    """
+    backend = settings.analysis_llm_backend.lower()
+    
+    if backend == "local":
+        logger.info("Using local stand-in model for text analysis")
+        return LocalChatModel(settings.local_llm_latency_seconds)
+    
+    if backend == "openai":
+        if openai_client is None:
+            return None
+        return OpenAIChatModel(openai_client, settings.analysis_model)
+    
+    logger.error(f"Unknown text analysis backend: {settings.analysis_llm_backend}")
+    return None
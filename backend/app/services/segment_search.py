@@ -0,0 +1,364 @@
+import logging
+import threading
+import zlib
+from typing import List, Dict, Any, Optional, Protocol
+import numpy as np
+from ..config import settings
+from ..database import db
+from .keyword_engine import TOKEN_PATTERN, STOP_WORDS
+
+# Configure logging
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
+
+# Texts embedded per matrix product, bounding the dense bucket-count matrix
+EMBED_BATCH_SIZE = 512
+
+# Hits scoring below this are noise from the random projection
+MIN_SCORE = 0.1
+
+# k-means iterations and training sample per list for the partitioned index
+IVF_TRAIN_ITERATIONS = 10
+IVF_TRAIN_SAMPLES_PER_LIST = 64
+
+class Embedder(Protocol):
+    """
+    Interface for text embedders used by the segment index.
+    
+    embed returns one L2-normalized float32 row per text.
+    """
+    
+    name: str
+    dimensions: int
+    
+    def embed(self, texts: List[str]) -> np.ndarray:
+        ...
+
+class HashingEmbedder:
+    """
+    Local stand-in for a sentence embedding model.
+    
+    Content words are hashed (crc32) into signed buckets, counts are damped with
+    log1p, and the bucket vector is reduced to a dense embedding by a fixed Gaussian
+    random projection, which approximately preserves cosine similarity.
+    """
+    
+    def __init__(self, dimensions: int, buckets: int, seed: int = 0):
+        self.name = f"hashing-{buckets}x{dimensions}-v1"
+        self.dimensions = dimensions
+        self.buckets = buckets
+        rng = np.random.default_rng(seed)
+        self.projection = (rng.standard_normal((buckets, dimensions)) / np.sqrt(dimensions)).astype(np.float32)
+    
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts.
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            Matrix with one normalized row per text
+        """
+        embeddings = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for start in range(0, len(texts), EMBED_BATCH_SIZE):
+            batch = texts[start:start + EMBED_BATCH_SIZE]
+            embeddings[start:start + len(batch)] = self._embed_batch(batch)
+        return embeddings
+    
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        tokens = []
+        rows = []
+        for row, text in enumerate(texts):
+            words = TOKEN_PATTERN.findall(text.lower())
+            tokens.extend(words)
+            rows.extend([row] * len(words))
+        
+        embeddings = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        if not tokens:
+            return embeddings
+        
+        tokens = np.array(tokens)
+        rows = np.array(rows, dtype=np.int64)
+        content = ~np.isin(tokens, STOP_WORDS)
+        if not content.any():
+            return embeddings
+        unique, inverse = np.unique(tokens[content], return_inverse=True)
+        hashes = np.array([zlib.crc32(token.encode("utf-8")) for token in unique.tolist()], dtype=np.int64)
+        signs = np.where(hashes & (1 << 31), -1.0, 1.0).astype(np.float32)
+        
+        # Signed bucket counts of every text, damped with log1p, then projected with one matrix product
+        counts = np.bincount(
+            rows[content] * self.buckets + hashes[inverse] % self.buckets,
+            weights=signs[inverse],
+            minlength=len(texts) * self.buckets
+        ).astype(np.float32).reshape(len(texts), self.buckets)
+        counts = np.sign(counts) * np.log1p(np.abs(counts))
+        embeddings = counts @ self.projection
+        
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        np.divide(embeddings, norms, out=embeddings, where=norms > 0)
+        return embeddings
+
+def create_embedder() -> Embedder:
+    """
+    Create the segment embedder selected in settings.
+    
+    Returns:
+        Embedder instance
+    """
+    name = settings.segment_search_embedder.lower()
+    if name != "hashing":
+        logger.error(f"Unknown segment search embedder: {settings.segment_search_embedder}, using hashing")
+    return HashingEmbedder(settings.segment_search_dimensions, settings.segment_search_hash_buckets)
+
+class VectorIndex:
+    """
+    Segment embeddings of one user's library.
+    
+    Vectors live in one contiguous float32 matrix that grows by doubling, so a
+    search is a single matrix-vector product followed by an argpartition top-k.
+    Re-indexed content tombstones its old rows, and the matrix is compacted once
+    half of it is dead. Past segment_search_ivf_min_vectors rows the index is
+    partitioned with spherical k-means (IVF) and a search scores only the rows of
+    the lists whose centroids are closest to the query.
+    """
+    
+    def __init__(self, dimensions: int):
+        self.vectors = np.zeros((1024, dimensions), dtype=np.float32)
+        self.alive = np.zeros(1024, dtype=bool)
+        self.count = 0
+        self.entries: List[Dict[str, Any]] = []
+        self.rows_by_content: Dict[str, List[int]] = {}
+        
+        # Partitioned mode
+        self.centroids: Optional[np.ndarray] = None
+        self.list_rows: List[List[int]] = []
+        self.trained_count = 0
+    
+    @property
+    def size(self) -> int:
+        """Number of live vectors"""
+        return int(self.alive[:self.count].sum())
+    
+    def add(self, content_id: str, vectors: np.ndarray, entries: List[Dict[str, Any]]) -> None:
+        """
+        Index the segments of a content item, replacing any previously indexed ones.
+        
+        Args:
+            content_id: Content the segments belong to
+            vectors: Segment embeddings
+            entries: Segment metadata returned with search hits
+        """
+        self.remove(content_id)
+        if len(vectors) == 0:
+            return
+        
+        needed = self.count + len(vectors)
+        if needed > len(self.vectors):
+            capacity = max(needed, 2 * len(self.vectors))
+            grown = np.zeros((capacity, self.vectors.shape[1]), dtype=np.float32)
+            grown[:self.count] = self.vectors[:self.count]
+            self.vectors = grown
+            alive = np.zeros(capacity, dtype=bool)
+            alive[:self.count] = self.alive[:self.count]
+            self.alive = alive
+        
+        rows = list(range(self.count, needed))
+        self.vectors[self.count:needed] = vectors
+        self.alive[self.count:needed] = True
+        self.entries.extend(entries)
+        self.rows_by_content[content_id] = rows
+        self.count = needed
+        
+        if self.centroids is not None:
+            assignments = np.argmax(vectors @ self.centroids.T, axis=1)
+            for row, assignment in zip(rows, assignments.tolist()):
+                self.list_rows[assignment].append(row)
+        
+        self._maybe_train()
+    
+    def remove(self, content_id: str) -> None:
+        """
+        Drop the indexed segments of a content item.
+        
+        Args:
+            content_id: Content to drop
+        """
+        rows = self.rows_by_content.pop(content_id, None)
+        if not rows:
+            return
+        self.alive[rows] = False
+        if self.count - self.size > self.count // 2:
+            self._compact()
+    
+    def _compact(self) -> None:
+        keep = np.flatnonzero(self.alive[:self.count])
+        remap = {int(old): new for new, old in enumerate(keep.tolist())}
+        
+        self.vectors[:len(keep)] = self.vectors[keep]
+        self.alive[:] = False
+        self.alive[:len(keep)] = True
+        self.entries = [self.entries[row] for row in keep.tolist()]
+        self.rows_by_content = {
+            content_id: [remap[row] for row in rows]
+            for content_id, rows in self.rows_by_content.items()
+        }
+        self.count = len(keep)
+        
+        # Partitions are rebuilt from scratch on the compacted rows
+        self.centroids = None
+        self.list_rows = []
+        self.trained_count = 0
+        self._maybe_train()
+    
+    def _maybe_train(self) -> None:
+        """Partition the index once it is large enough, and re-partition when it doubles"""
+        min_vectors = settings.segment_search_ivf_min_vectors
+        if min_vectors <= 0 or self.size < min_vectors:
+            return
+        if self.centroids is not None and self.size < 2 * self.trained_count:
+            return
+        
+        live = np.flatnonzero(self.alive[:self.count])
+        lists = min(settings.segment_search_ivf_lists, len(live))
+        rng = np.random.default_rng(0)
+        sample = self.vectors[rng.choice(live, min(len(live), lists * IVF_TRAIN_SAMPLES_PER_LIST), replace=False)]
+        
+        # Spherical k-means: centroids are kept unit length so assignment is a dot product
+        centroids = sample[rng.choice(len(sample), lists, replace=False)].copy()
+        for _ in range(IVF_TRAIN_ITERATIONS):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+        
+        assignments = np.argmax(self.vectors[live] @ centroids.T, axis=1)
+        order = np.argsort(assignments, kind="stable")
+        boundaries = np.searchsorted(assignments[order], np.arange(lists + 1))
+        self.list_rows = [live[order[boundaries[i]:boundaries[i + 1]]].tolist() for i in range(lists)]
+        self.centroids = centroids
+        self.trained_count = len(live)
+        logger.info(f"Partitioned segment index: {len(live)} vectors in {lists} lists")
+    
+    def search(self, query: np.ndarray, top_k: int) -> List[tuple]:
+        """
+        Find the segments most similar to a query embedding.
+        
+        Args:
+            query: Normalized query embedding
+            top_k: Number of hits to return
+        
+        Returns:
+            List of (row, score) tuples, best first
+        """
+        if self.centroids is not None:
+            probes = min(settings.segment_search_ivf_probes, len(self.centroids))
+            closest = np.argpartition(-(self.centroids @ query), probes - 1)[:probes]
+            rows = np.array([row for probe in closest.tolist() for row in self.list_rows[probe]], dtype=np.int64)
+            rows = rows[self.alive[rows]]
+            scores = self.vectors[rows] @ query
+        else:
+            # Score the whole matrix in place and mask tombstoned rows, avoiding a gather copy
+            rows = np.arange(self.count)
+            scores = self.vectors[:self.count] @ query
+            scores[~self.alive[:self.count]] = -np.inf
+        if len(rows) == 0:
+            return []
+        
+        top_k = min(top_k, len(rows))
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(rows[position]), float(scores[position])) for position in top.tolist() if scores[position] >= MIN_SCORE]
+
+class SegmentSearchService:
+    """
+    Semantic search over the segments of each user's analyzed content.
+    
+    Every user has their own VectorIndex, built from the stored analyses on first
+    use and updated incrementally as analyses complete.
+    """
+    
+    def __init__(self):
+        self.embedder = create_embedder()
+        self.indexes: Dict[str, VectorIndex] = {}
+        self._lock = threading.Lock()
+    
+    def _segment_text(self, segment: Dict[str, Any]) -> str:
+        return " ".join([segment.get("transcript", "")] + list(segment.get("keywords", [])))
+    
+    def _embed_segments(self, content_id: str, segments: List[Dict[str, Any]]) -> tuple:
+        vectors = self.embedder.embed([self._segment_text(segment) for segment in segments])
+        entries = [
+            {
+                "content_id": content_id,
+                "segment_index": index,
+                "start_time": segment.get("start_time", 0.0),
+                "end_time": segment.get("end_time", 0.0),
+                "transcript": segment.get("transcript", ""),
+                "keywords": segment.get("keywords", [])
+            }
+            for index, segment in enumerate(segments)
+        ]
+        return vectors, entries
+    
+    def _get_index(self, user_id: str) -> VectorIndex:
+        """Get a user's index, building it from stored analyses the first time (caller holds the lock)"""
+        index = self.indexes.get(user_id)
+        if index is not None:
+            return index
+        
+        index = VectorIndex(self.embedder.dimensions)
+        content_ids = {content_id for content_id, content in db.content_uploads.items() if content.get("user_id") == user_id}
+        for analysis in list(db.content_analyses.values()):
+            content_id = analysis.get("content_id")
+            if content_id in content_ids:
+                index.add(content_id, *self._embed_segments(content_id, analysis.get("segments", [])))
+        
+        self.indexes[user_id] = index
+        logger.info(f"Built segment index for user {user_id}: {index.size} segments")
+        return index
+    
+    def add_analysis(self, user_id: Optional[str], content_id: str, segments: List[Dict[str, Any]]) -> None:
+        """
+        Index the segments of a completed analysis.
+        
+        Args:
+            user_id: Owner of the content
+            content_id: ID of the content
+            segments: Analyzed segments
+        """
+        if not user_id:
+            return
+        
+        try:
+            vectors, entries = self._embed_segments(content_id, segments)
+            with self._lock:
+                self._get_index(user_id).add(content_id, vectors, entries)
+        except Exception as e:
+            logger.error(f"Error indexing segments of {content_id}: {str(e)}")
+    
+    def search(self, user_id: str, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
+        """
+        Find the segments of a user's library that best match a query.
+        
+        Args:
+            user_id: User whose content to search
+            query: Free-text query
+            top_k: Number of hits to return
+        
+        Returns:
+            Matching segments with their similarity scores, best first
+        """
+        query_vector = self.embedder.embed([query])[0]
+        if not query_vector.any():
+            return []
+        
+        with self._lock:
+            index = self._get_index(user_id)
+            hits = index.search(query_vector, top_k)
+            return [dict(index.entries[row], score=round(score, 4)) for row, score in hits]
+
+# Create global segment search service instance
+segment_search_service = SegmentSearchService()
@@ -0,0 +1,159 @@
+import logging
+import math
+from typing import List, Dict, Any, Optional
+import numpy as np
+from ..config import settings
+
+# Configure logging
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
+
+# Value floor for requested segments, so a zero-value one is still taken when it fits
+MIN_REQUESTED_VALUE = 1e-6
+
+class SegmentSelector:
+    """
+    Choose the segments of a video that fit a duration budget.
+    
+    Each segment is worth a blend of its importance score and engagement prediction.
+    Durations are rounded up to a fixed time resolution, and a 0/1 knapsack over the
+    budget finds the most valuable subset; the DP table is updated one segment at a
+    time with numpy, so hundreds of segments take milliseconds. In contiguous mode
+    the best run of adjacent segments is found with a sliding window instead.
+    When nothing fits, the most valuable candidate is returned on its own and the
+    caller trims it to the budget, so a non-empty candidate list never yields an
+    empty selection.
+    """
+    
+    def _values(self, segments: List[Dict[str, Any]]) -> np.ndarray:
+        weight = settings.segment_selection_importance_weight
+        return np.array([
+            weight * segment.get("importance_score", 0.0) + (1 - weight) * segment.get("engagement_prediction", 0.0)
+            for segment in segments
+        ], dtype=np.float64)
+    
+    def _durations(self, segments: List[Dict[str, Any]]) -> np.ndarray:
+        return np.array([
+            max(segment.get("end_time", 0.0) - segment.get("start_time", 0.0), 0.0)
+            for segment in segments
+        ], dtype=np.float64)
+    
+    def select(
+        self,
+        segments: List[Dict[str, Any]],
+        budget_seconds: float,
+        candidates: Optional[List[int]] = None,
+        contiguous: bool = False,
+        order: str = "chronological",
+        requested: bool = False
+    ) -> List[int]:
+        """
+        Select segments maximizing total value within a duration budget.
+        
+        Args:
+            segments: Video segments from analysis
+            budget_seconds: Maximum total duration in seconds
+            candidates: Indices of the segments to choose from (default: all)
+            contiguous: Whether the selection must be a run of adjacent segments
+            order: 'chronological' to return indices in timeline order, 'score' for best first
+            requested: Whether the candidates were explicitly requested, in which case
+                segments without value are kept as long as they fit
+        
+        Returns:
+            Indices of the selected segments; a single segment that may exceed the
+            budget when no candidate fits it
+        """
+        if candidates is None:
+            candidates = list(range(len(segments)))
+        candidates = sorted(set(index for index in candidates if 0 <= index < len(segments)), key=lambda index: segments[index].get("start_time", 0.0))
+        if not candidates or budget_seconds <= 0:
+            return []
+        
+        chosen_segments = [segments[index] for index in candidates]
+        values = self._values(chosen_segments)
+        if requested:
+            values = np.maximum(values, MIN_REQUESTED_VALUE)
+        durations = self._durations(chosen_segments)
+        
+        if contiguous:
+            picked = self._best_run(values, durations, budget_seconds)
+        else:
+            picked = self._knapsack(values, durations, budget_seconds)
+        
+        if not picked:
+            # Every candidate is longer than the budget (or worthless): fall back to the best one
+            picked = [int(np.argmax(values))]
+            logger.info(f"No segment fits the {budget_seconds:.1f}s budget, using the best one trimmed")
+        
+        if order == "score":
+            picked = sorted(picked, key=lambda position: -values[position])
+        return [candidates[position] for position in picked]
+    
+    def _knapsack(self, values: np.ndarray, durations: np.ndarray, budget_seconds: float) -> List[int]:
+        """
+        Solve the 0/1 knapsack over the time budget.
+        
+        Args:
+            values: Value of each segment
+            durations: Duration of each segment in seconds
+            budget_seconds: Maximum total duration in seconds
+        
+        Returns:
+            Positions of the chosen segments, in input order
+        """
+        resolution = settings.segment_selection_resolution_seconds
+        capacity = int(math.floor(budget_seconds / resolution + 1e-9))
+        weights = np.ceil(durations / resolution - 1e-9).astype(np.int64)
+        
+        # best[c] is the highest value using at most c time units; taken[i, c] records the choices
+        best = np.zeros(capacity + 1, dtype=np.float64)
+        taken = np.zeros((len(values), capacity + 1), dtype=bool)
+        for position, (value, weight) in enumerate(zip(values.tolist(), weights.tolist())):
+            if weight > capacity or value <= 0:
+                continue
+            with_item = best[:capacity + 1 - weight] + value
+            improved = with_item > best[weight:]
+            taken[position, weight:] = improved
+            best[weight:] = np.where(improved, with_item, best[weight:])
+        
+        picked = []
+        remaining = capacity
+        for position in range(len(values) - 1, -1, -1):
+            if taken[position, remaining]:
+                picked.append(position)
+                remaining -= weights[position]
+        picked.reverse()
+        return picked
+    
+    def _best_run(self, values: np.ndarray, durations: np.ndarray, budget_seconds: float) -> List[int]:
+        """
+        Find the run of adjacent segments with the highest total value within the budget.
+        
+        Args:
+            values: Value of each segment
+            durations: Duration of each segment in seconds
+            budget_seconds: Maximum total duration in seconds
+        
+        Returns:
+            Positions of the chosen segments
+        """
+        best_value = 0.0
+        best_run = (0, 0)
+        run_value = 0.0
+        run_duration = 0.0
+        start = 0
+        for end in range(len(values)):
+            run_value += values[end]
+            run_duration += durations[end]
+            while start <= end and run_duration > budget_seconds + 1e-9:
+                run_value -= values[start]
+                run_duration -= durations[start]
+                start += 1
+            if run_value > best_value:
+                best_value = run_value
+                best_run = (start, end + 1)
+        
+        return list(range(*best_run))
+
+# Create global segment selector instance
+segment_selector = SegmentSelector()
@@ -1,9 +1,15 @@
+import asyncio
 import logging
 import boto3
 import os
-from typing import Optional
+from typing import Dict, Optional
 from ..config import settings
 
+try:
+    from google.cloud import storage as gcs
+except ImportError:
+    gcs = None
+
 # Configure logging
 logging.basicConfig(level=settings.log_level)
 logger = logging.getLogger(__name__)
@@ -14,6 +20,8 @@ class StorageService:
         self.s3_bucket_name = settings.s3_bucket_name
         self.s3_region = settings.aws_region
         self.s3_endpoint_url = os.getenv("AWS_ENDPOINT_URL_S3")
+        self.gcs_client = None
+        self._gcs_mirror_users: Dict[str, int] = {}
         self.initialize_s3()
     
     def initialize_s3(self):
@@ -105,6 +113,109 @@ class StorageService:
             logger.error(f"Error downloading from S3: {str(e)}")
             return False
     
+    async def get_object_fingerprint(self, key: str) -> Optional[str]:
+        """
+        Identify the current content of an S3 object without downloading it.
+        
+        Args:
+            key: S3 key (path within bucket)
+            
+        Returns:
+            ETag and size of the object, or None if unavailable
+        """
+        if not self.s3_client:
+            return None
+        
+        try:
+            response = await asyncio.to_thread(self.s3_client.head_object, Bucket=self.s3_bucket_name, Key=key)
+            etag = response["ETag"].strip('"')
+            return f"{etag}:{response['ContentLength']}"
+        except Exception as e:
+            logger.error(f"Error reading S3 object metadata: {str(e)}")
+            return None
+    
+    async def mirror_to_gcs(self, key: str, bucket_name: str) -> Optional[str]:
+        """
+        Copy an S3 object to Google Cloud Storage for services that read gs:// URIs.
+        
+        The object body is streamed through in fixed-size chunks, so the file is never
+        held in memory or written to local disk. The mirror records the S3 ETag of its
+        source, and an existing mirror is only reused when that ETag still matches.
+        Mirrors are temporary: call release_gcs_mirror once the consumer is done.
+        
+        Args:
+            key: S3 key (path within bucket)
+            bucket_name: Destination GCS bucket
+            
+        Returns:
+            gs:// URI of the mirrored object, or None when S3 is simulated
+        
+        Raises:
+            RuntimeError: If google-cloud-storage is not installed
+            Exception: If reading from S3 or uploading to GCS fails
+        """
+        if not self.s3_client:
+            logger.info(f"Simulating GCS mirror (no AWS credentials): {key}")
+            return None
+        
+        if gcs is None:
+            raise RuntimeError("google-cloud-storage is not installed, cannot mirror to GCS")
+        
+        try:
+            uri = await asyncio.to_thread(self._mirror_to_gcs, key, bucket_name)
+        except Exception as e:
+            logger.error(f"Error mirroring S3 object {key} to GCS bucket {bucket_name}: {str(e)}")
+            raise
+        self._gcs_mirror_users[uri] = self._gcs_mirror_users.get(uri, 0) + 1
+        return uri
+    
+    def _mirror_to_gcs(self, key: str, bucket_name: str) -> str:
+        if self.gcs_client is None:
+            self.gcs_client = gcs.Client()
+        
+        response = self.s3_client.get_object(Bucket=self.s3_bucket_name, Key=key)
+        size = response["ContentLength"]
+        etag = response["ETag"].strip('"')
+        
+        blob = self.gcs_client.bucket(bucket_name).blob(key)
+        uri = f"gs://{bucket_name}/{key}"
+        if blob.exists():
+            blob.reload()
+            # The same size is not the same file; only the source ETag identifies the content
+            if blob.size == size and (blob.metadata or {}).get("source_etag") == etag:
+                response["Body"].close()
+                logger.info(f"Reusing GCS mirror of S3 object: {uri}")
+                return uri
+        
+        # Resumable upload reads the S3 stream one chunk at a time
+        blob.chunk_size = settings.gcs_upload_chunk_bytes
+        blob.metadata = {"source_etag": etag}
+        with response["Body"] as body:
+            blob.upload_from_file(body, size=size, content_type=response.get("ContentType"))
+        
+        logger.info(f"Mirrored S3 object {key} to {uri}")
+        return uri
+    
+    async def release_gcs_mirror(self, uri: str) -> None:
+        """
+        Delete a GCS mirror once no analysis in this process is using it.
+        
+        Args:
+            uri: gs:// URI returned by mirror_to_gcs
+        """
+        users = self._gcs_mirror_users.get(uri, 0) - 1
+        if users > 0:
+            self._gcs_mirror_users[uri] = users
+            return
+        self._gcs_mirror_users.pop(uri, None)
+        
+        bucket_name, _, blob_name = uri[len("gs://"):].partition("/")
+        try:
+            await asyncio.to_thread(self.gcs_client.bucket(bucket_name).blob(blob_name).delete)
+            logger.info(f"Deleted GCS mirror: {uri}")
+        except Exception as e:
+            logger.warning(f"Error deleting GCS mirror {uri}: {str(e)}")
+    
     async def delete_file(self, key: str) -> bool:
         """
         Delete a file from S3 bucket.
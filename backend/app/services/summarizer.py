@@ -0,0 +1,131 @@
+import logging
+import re
+import zlib
+from typing import List
+import numpy as np
+from ..config import settings
+from .keyword_engine import TOKEN_PATTERN, STOP_WORDS
+
+# Configure logging
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
+
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+# Hashed feature space for sentence vectors
+HASH_DIMENSIONS = 1 << 10
+
+DAMPING = 0.85
+MIN_SIMILARITY = 0.05
+
+class ExtractiveSummarizer:
+    """
+    Graph-based extractive summarizer.
+    
+    Sentences are embedded with a hashing vectorizer (crc32 of each content word),
+    linked by cosine similarity, and ranked by PageRank computed with power
+    iteration. The best-ranked sentences are returned in transcript order.
+    """
+    
+    def _embed(self, sentences: List[str]) -> np.ndarray:
+        """
+        Embed sentences as L2-normalized hashed bag-of-words vectors.
+        
+        Args:
+            sentences: Sentences to embed
+        
+        Returns:
+            Matrix with one row per sentence
+        """
+        tokens = []
+        rows = []
+        for row, sentence in enumerate(sentences):
+            words = TOKEN_PATTERN.findall(sentence.lower())
+            tokens.extend(words)
+            rows.extend([row] * len(words))
+        
+        vectors = np.zeros((len(sentences), HASH_DIMENSIONS), dtype=np.float32)
+        if not tokens:
+            return vectors
+        
+        tokens = np.array(tokens)
+        rows = np.array(rows)
+        content = ~np.isin(tokens, STOP_WORDS)
+        unique, inverse = np.unique(tokens[content], return_inverse=True)
+        buckets = np.array([zlib.crc32(token.encode("utf-8")) % HASH_DIMENSIONS for token in unique.tolist()], dtype=np.int64)
+        
+        np.add.at(vectors, (rows[content], buckets[inverse]), 1.0)
+        np.log1p(vectors, out=vectors)
+        
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+    
+    def rank_sentences(self, sentences: List[str]) -> np.ndarray:
+        """
+        Score sentences by their centrality in the similarity graph.
+        
+        Args:
+            sentences: Sentences to rank
+        
+        Returns:
+            PageRank score of each sentence
+        """
+        count = len(sentences)
+        vectors = self._embed(sentences)
+        
+        similarity = vectors @ vectors.T
+        np.fill_diagonal(similarity, 0.0)
+        similarity[similarity < MIN_SIMILARITY] = 0.0
+        
+        # Column-stochastic transition matrix; sentences without links spread evenly
+        out_weight = similarity.sum(axis=0)
+        transition = np.divide(similarity, out_weight, out=np.full_like(similarity, 1.0 / count), where=out_weight > 0)
+        
+        scores = np.full(count, 1.0 / count, dtype=np.float32)
+        for _ in range(100):
+            updated = (1 - DAMPING) / count + DAMPING * (transition @ scores)
+            converged = np.abs(updated - scores).sum() < 1e-6
+            scores = updated
+            if converged:
+                break
+        
+        return scores
+    
+    def summarize(self, text: str, max_words: int = 100) -> str:
+        """
+        Build an extractive summary.
+        
+        Args:
+            text: Input text
+            max_words: Maximum summary length in words
+        
+        Returns:
+            The most central sentences, in their original order
+        """
+        sentences = [sentence.strip() for sentence in SENTENCE_PATTERN.split(text) if sentence.strip()]
+        if len(sentences) <= 1:
+            words = text.split()
+            return " ".join(words[:max_words]) + ("..." if len(words) > max_words else "")
+        
+        scores = self.rank_sentences(sentences)
+        
+        selected = []
+        word_count = 0
+        for index in np.argsort(-scores, kind="stable").tolist():
+            length = len(sentences[index].split())
+            if selected and word_count + length > max_words:
+                continue
+            selected.append(index)
+            word_count += length
+            if word_count >= max_words:
+                break
+        
+        summary = " ".join(sentences[index] for index in sorted(selected))
+        words = summary.split()
+        if len(words) > max_words:
+            summary = " ".join(words[:max_words]) + "..."
+        return summary
+
+# Create global extractive summarizer instance
+extractive_summarizer = ExtractiveSummarizer()
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import logging
+from typing import List, Dict, Any, Optional
+import numpy as np
+from ..config import settings
+from ..database import db
+
+# Configure logging
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
+
+# Weights of the fit scores combined into a template's rank
+PACE_WEIGHT = 0.3
+SEGMENT_COUNT_WEIGHT = 0.2
+DURATION_WEIGHT = 0.3
+KEYWORD_WEIGHT = 0.2
+
+# Segments per minute treated as the fastest pace
+MAX_SEGMENTS_PER_MINUTE = 12.0
+
+def _enum_value(value: Any) -> Any:
+    """Plain value of an enum member, so records created from models and raw dicts index alike"""
+    return getattr(value, "value", value)
+
+class TemplateIndex:
+    """
+    Snapshot of the template catalog prepared for scoring.
+    
+    Template features are stored column-wise in numpy arrays, and inverted indexes map
+    content types, aspect ratios, owners and tags to sorted row numbers.
+    """
+    
+    def __init__(self, templates: List[Dict[str, Any]]):
+        self.ids = [template["id"] for template in templates]
+        self.fingerprint = hashlib.sha256(
+            json.dumps(sorted(templates, key=lambda template: template["id"]), sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        self.pace = np.array([template.get("pace", 0.5) for template in templates], dtype=np.float32)
+        self.segment_count = np.array([max(template.get("ideal_segment_count", 3), 1) for template in templates], dtype=np.float32)
+        self.duration = np.array([max(template.get("ideal_duration_seconds", 30), 1) for template in templates], dtype=np.float32)
+        
+        by_content_type: Dict[str, List[int]] = {}
+        by_aspect_ratio: Dict[str, List[int]] = {}
+        by_owner: Dict[Optional[str], List[int]] = {}
+        by_tag: Dict[str, List[int]] = {}
+        for row, template in enumerate(templates):
+            for content_type in template.get("suitable_content_types", []):
+                by_content_type.setdefault(_enum_value(content_type), []).append(row)
+            by_aspect_ratio.setdefault(_enum_value(template.get("aspect_ratio")), []).append(row)
+            by_owner.setdefault(template.get("user_id"), []).append(row)
+            for tag in set(tag.lower() for tag in template.get("tags", [])):
+                by_tag.setdefault(tag, []).append(row)
+        
+        def to_arrays(index: Dict) -> Dict:
+            return {key: np.array(rows, dtype=np.int64) for key, rows in index.items()}
+        
+        self.by_content_type = to_arrays(by_content_type)
+        self.by_aspect_ratio = to_arrays(by_aspect_ratio)
+        self.by_owner = to_arrays(by_owner)
+        self.by_tag = to_arrays(by_tag)
+    
+    def visible(self, user_id: Optional[str]) -> np.ndarray:
+        """Rows of the public templates plus the user's own"""
+        public = self.by_owner.get(None, np.array([], dtype=np.int64))
+        if user_id is None or user_id not in self.by_owner:
+            return public
+        return np.union1d(public, self.by_owner[user_id])
+
+class TemplateRecommender:
+    """
+    Rank templates for analyzed content.
+    
+    Candidates come from the inverted indexes (content type, aspect ratio and owner)
+    rather than a catalog scan, and are scored in one vectorized pass against the
+    content's pace, segment count, duration and keywords. The index is rebuilt only
+    when the templates table revision changes.
+    """
+    
+    def __init__(self):
+        self._index: Optional[TemplateIndex] = None
+        self._revision = -1
+    
+    def _get_index(self) -> TemplateIndex:
+        revision = db.revision(db.video_templates)
+        if self._index is None or revision != self._revision:
+            self._index = TemplateIndex(list(db.video_templates.values()))
+            self._revision = revision
+            logger.info(f"Indexed {len(self._index.ids)} templates (revision {revision})")
+        return self._index
+    
+    def catalog_fingerprint(self) -> str:
+        """
+        Fingerprint the current template catalog, e.g. to key results derived from it.
+        
+        Returns:
+            Hex digest of the catalog contents
+        """
+        return self._get_index().fingerprint
+    
+    def _candidates(self, index: TemplateIndex, content_type: str, aspect_ratio: Optional[str], user_id: Optional[str]) -> np.ndarray:
+        """
+        Select candidate rows, relaxing the content type and aspect ratio filters when nothing matches.
+        
+        Args:
+            index: Template index
+            content_type: Type of content
+            aspect_ratio: Preferred aspect ratio (optional)
+            user_id: Owner of the content (optional)
+        
+        Returns:
+            Sorted candidate rows
+        """
+        visible = index.visible(user_id)
+        by_type = np.intersect1d(visible, index.by_content_type.get(_enum_value(content_type), np.array([], dtype=np.int64)), assume_unique=True)
+        candidates = by_type if len(by_type) else visible
+        
+        if aspect_ratio:
+            by_ratio = np.intersect1d(candidates, index.by_aspect_ratio.get(_enum_value(aspect_ratio), np.array([], dtype=np.int64)), assume_unique=True)
+            if len(by_ratio):
+                candidates = by_ratio
+        
+        return candidates
+    
+    def recommend(
+        self,
+        content_type: str,
+        segments: List[Dict[str, Any]],
+        aspect_ratio: Optional[str] = None,
+        user_id: Optional[str] = None,
+        preferred_duration: Optional[int] = None,
+        top_k: int = 3
+    ) -> List[str]:
+        """
+        Recommend templates for analyzed content.
+        
+        Args:
+            content_type: Type of content
+            segments: Video segments from analysis
+            aspect_ratio: Preferred aspect ratio (optional)
+            user_id: Owner of the content, whose private templates are also considered (optional)
+            preferred_duration: Requested output duration in seconds (optional)
+            top_k: Number of templates to return
+        
+        Returns:
+            Template IDs, best first
+        """
+        index = self._get_index()
+        candidates = self._candidates(index, content_type, aspect_ratio, user_id)
+        if len(candidates) == 0:
+            return []
+        
+        # Content features
+        total_duration = sum(max(segment["end_time"] - segment["start_time"], 0.0) for segment in segments)
+        segment_count = max(len(segments), 1)
+        segments_per_minute = segment_count / max(total_duration / 60, 1 / 60)
+        content_pace = min(segments_per_minute / MAX_SEGMENTS_PER_MINUTE, 1.0)
+        
+        pace_fit = 1.0 - np.abs(index.pace[candidates] - content_pace)
+        count_fit = np.exp(-np.abs(np.log(segment_count / index.segment_count[candidates])))
+        
+        # The source must be long enough to fill the template; a requested duration should match it
+        duration_fit = np.minimum(total_duration / index.duration[candidates], 1.0)
+        if preferred_duration:
+            duration_fit *= np.minimum(preferred_duration, index.duration[candidates]) / np.maximum(preferred_duration, index.duration[candidates])
+        
+        # Keyword hits via the tag index, counting only candidate rows
+        keyword_hits = np.zeros(len(candidates), dtype=np.float32)
+        keywords = set(keyword.lower() for segment in segments for keyword in segment.get("keywords", []))
+        for keyword in keywords:
+            rows = index.by_tag.get(keyword)
+            if rows is None:
+                continue
+            positions = np.minimum(np.searchsorted(candidates, rows), len(candidates) - 1)
+            keyword_hits[positions[candidates[positions] == rows]] += 1
+        keyword_fit = np.minimum(keyword_hits / 3, 1.0)
+        
+        scores = (
+            PACE_WEIGHT * pace_fit
+            + SEGMENT_COUNT_WEIGHT * count_fit
+            + DURATION_WEIGHT * duration_fit
+            + KEYWORD_WEIGHT * keyword_fit
+        )
+        
+        top_k = min(top_k, len(candidates))
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        
+        return [index.ids[candidates[row]] for row in top.tolist()]
+
+# Create global template recommender instance
+template_recommender = TemplateRecommender()
@@ -0,0 +1,452 @@
+import bisect
+from array import array
+import logging
+import re
+import threading
+from typing import List, Dict, Any, Optional
+import numpy as np
+from ..config import settings
+from ..database import db
+from .keyword_engine import TOKEN_PATTERN, STOP_WORDS
+
+# Configure logging
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
+
+# Quoted phrases, prefix terms (pric*) and plain terms
+QUERY_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+
+# Postings per skip block, and values per skip entry
+POSTING_BLOCK_SIZE = 128
+SKIP_FIELDS = 5
+
+# Positions are packed with the document id into one int64 key for phrase matching
+POSITION_BITS = 24
+
+def encode_varints(values: List[int], out: bytearray) -> None:
+    """
+    Append non-negative integers to a buffer as LEB128 varints.
+    
+    Args:
+        values: Integers to encode
+        out: Buffer to append to
+    """
+    for value in values:
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+
+def decode_varints(data: bytes) -> np.ndarray:
+    """
+    Decode a buffer of LEB128 varints in one vectorized pass.
+    
+    Args:
+        data: Encoded buffer
+    
+    Returns:
+        Decoded integers
+    """
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if len(raw) == 0:
+        return np.array([], dtype=np.int64)
+    
+    # A byte without the continuation bit ends a value
+    ends = np.flatnonzero(raw < 0x80)
+    starts = np.r_[0, ends[:-1] + 1]
+    if len(ends) == len(raw):
+        return raw.astype(np.int64)
+    
+    shifts = 7 * (np.arange(len(raw)) - np.repeat(starts, ends - starts + 1))
+    parts = (raw & 0x7F).astype(np.int64) << shifts
+    return np.add.reduceat(parts, starts)
+
+def _gather_ranges(data: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Concatenate data[starts[i]:ends[i]] for every i without a Python loop"""
+    lengths = ends - starts
+    offsets = np.repeat(starts - np.r_[0, np.cumsum(lengths)[:-1]], lengths)
+    return data[offsets + np.arange(lengths.sum())]
+
+class PostingList:
+    """
+    Postings of one term, compressed.
+    
+    Document ids are delta-encoded, frequencies stored as-is and each posting's
+    positions delta-encoded from the start of the document, all as varints in
+    append-only buffers; document ids only ever grow, so new postings are appended
+    without touching the existing bytes. Every POSTING_BLOCK_SIZE postings a skip
+    entry records the block's base and first document and its offsets in each
+    buffer, so lookups for a few documents decode only the blocks that can hold
+    them. Most terms never fill a block, so the skip table is only allocated once
+    a second block starts.
+    """
+    
+    __slots__ = ("documents", "frequencies", "positions", "last_document", "count", "skips")
+    
+    def __init__(self):
+        self.documents = bytearray()
+        self.frequencies = bytearray()
+        self.positions = bytearray()
+        self.last_document = 0
+        self.count = 0
+        self.skips: Optional[array] = None
+    
+    def append(self, document: int, positions: List[int]) -> None:
+        if self.count and self.count % POSTING_BLOCK_SIZE == 0:
+            if self.skips is None:
+                self.skips = array("q", SKIP_FIELDS * [0])
+            self.skips.extend([self.last_document, document, len(self.documents), len(self.frequencies), len(self.positions)])
+        encode_varints([document - self.last_document], self.documents)
+        encode_varints([len(positions)], self.frequencies)
+        encode_varints([positions[0]] + [b - a for a, b in zip(positions, positions[1:])], self.positions)
+        self.last_document = document
+        self.count += 1
+    
+    def decode(self) -> tuple:
+        """
+        Decode all document ids and frequencies.
+        
+        Returns:
+            Tuple of (document ids, term frequencies)
+        """
+        return np.cumsum(decode_varints(bytes(self.documents))), decode_varints(bytes(self.frequencies))
+    
+    def decode_for(self, documents: np.ndarray) -> tuple:
+        """
+        Decode the postings of some documents, with their positions.
+        
+        Args:
+            documents: Sorted document ids to look up
+        
+        Returns:
+            Tuple of (document ids, term frequencies, positions of each posting concatenated)
+        """
+        # Columns: base document, first document, then offsets in the document, frequency and position buffers
+        skips = np.frombuffer(self.skips if self.skips is not None else array("q", SKIP_FIELDS * [0]), dtype=np.int64).reshape(-1, SKIP_FIELDS)
+        blocks = np.unique(np.searchsorted(skips[:, 1], documents, side="right") - 1)
+        blocks = blocks[blocks >= 0]
+        if len(blocks) == 0:
+            empty = np.array([], dtype=np.int64)
+            return empty, empty, empty
+        
+        def block_bytes(buffer: bytearray, column: int) -> np.ndarray:
+            bounds = np.r_[skips[:, column], len(buffer)]
+            return _gather_ranges(np.frombuffer(bytes(buffer), dtype=np.uint8), bounds[blocks], bounds[blocks + 1])
+        
+        deltas = decode_varints(block_bytes(self.documents, 2))
+        frequencies = decode_varints(block_bytes(self.frequencies, 3))
+        position_deltas = decode_varints(block_bytes(self.positions, 4))
+        
+        # Each block's first delta is relative to the block base; restart the running sum there
+        sizes = np.minimum(self.count - blocks * POSTING_BLOCK_SIZE, POSTING_BLOCK_SIZE)
+        block_starts = np.r_[0, np.cumsum(sizes)[:-1]]
+        deltas[block_starts] += skips[blocks, 0]
+        posting_documents = _segmented_cumsum(deltas, block_starts, sizes)
+        positions = _segmented_cumsum(position_deltas, np.r_[0, np.cumsum(frequencies)[:-1]], frequencies)
+        
+        keep = np.isin(posting_documents, documents, assume_unique=True)
+        return posting_documents[keep], frequencies[keep], positions[np.repeat(keep, frequencies)]
+
+def _segmented_cumsum(values: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Running sums of values that restart at every segment start"""
+    totals = np.cumsum(values)
+    return totals - np.repeat(totals[starts] - values[starts], lengths)
+
+class UserPostings:
+    """Posting lists and BM25 collection statistics of one user's library"""
+    
+    def __init__(self):
+        self.postings: Dict[str, PostingList] = {}
+        self.sorted_terms: Optional[List[str]] = None
+        self.live_count = 0
+        self.total_length = 0
+
+class TextSearchIndex:
+    """
+    In-process BM25 full-text index over analyzed content.
+    
+    Each segment (transcript and keywords) and each content summary (summary and
+    keywords) is a document. Postings are kept per user, so a query only decodes
+    postings of the requesting user's library and BM25 statistics are per library.
+    Postings are compressed (see PostingList) and decoded with numpy at query time;
+    each term's live postings are scored and summed per document with bincount
+    before an argpartition top-k. Re-indexed content tombstones its old documents,
+    and the index is rebuilt from stored analyses once half of it is dead.
+    
+    Query syntax: plain terms are OR-ed, "quoted phrases" must appear verbatim and
+    terms ending in * match every indexed term with that prefix.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._reset()
+    
+    def _reset(self) -> None:
+        self.users: Dict[str, UserPostings] = {}
+        self.entries: List[Dict[str, Any]] = []
+        self.lengths = np.zeros(1024, dtype=np.int32)
+        self.alive = np.zeros(1024, dtype=bool)
+        self.count = 0
+        self.live_count = 0
+        self.documents_by_content: Dict[str, tuple] = {}
+    
+    def _ensure_loaded(self) -> None:
+        """Index stored analyses the first time the index is used (caller holds the lock)"""
+        if self._loaded:
+            return
+        self._loaded = True
+        self._index_stored_analyses()
+    
+    def _index_stored_analyses(self) -> None:
+        owners = {content_id: content.get("user_id") for content_id, content in db.content_uploads.items()}
+        for analysis in list(db.content_analyses.values()):
+            content_id = analysis.get("content_id")
+            if owners.get(content_id):
+                self._add(owners[content_id], content_id, analysis.get("segments", []), analysis.get("summary", ""), analysis.get("keywords", []))
+        logger.info(f"Indexed {self.live_count} documents for text search")
+    
+    def _add_document(self, user: UserPostings, text: str, entry: Dict[str, Any]) -> int:
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        document = self.count
+        if document == len(self.lengths):
+            capacity = 2 * len(self.lengths)
+            self.lengths = np.resize(self.lengths, capacity)
+            alive = np.zeros(capacity, dtype=bool)
+            alive[:document] = self.alive[:document]
+            self.alive = alive
+        
+        positions: Dict[str, List[int]] = {}
+        for position, token in enumerate(tokens):
+            positions.setdefault(token, []).append(position)
+        for token, token_positions in positions.items():
+            posting_list = user.postings.get(token)
+            if posting_list is None:
+                posting_list = user.postings[token] = PostingList()
+                user.sorted_terms = None
+            posting_list.append(document, token_positions)
+        
+        self.lengths[document] = len(tokens)
+        self.alive[document] = True
+        self.entries.append(entry)
+        self.count += 1
+        self.live_count += 1
+        user.live_count += 1
+        user.total_length += len(tokens)
+        return document
+    
+    def _add(self, user_id: str, content_id: str, segments: List[Dict[str, Any]], summary: str, keywords: List[str]) -> None:
+        self._remove(content_id)
+        user = self.users.setdefault(user_id, UserPostings())
+        
+        documents = []
+        for index, segment in enumerate(segments):
+            transcript = segment.get("transcript", "")
+            documents.append(self._add_document(user, " ".join([transcript] + list(segment.get("keywords", []))), {
+                "content_id": content_id,
+                "segment_index": index,
+                "start_time": segment.get("start_time", 0.0),
+                "end_time": segment.get("end_time", 0.0),
+                "text": transcript
+            }))
+        if summary or keywords:
+            documents.append(self._add_document(user, " ".join([summary or ""] + list(keywords or [])), {
+                "content_id": content_id,
+                "segment_index": None,
+                "text": summary or ""
+            }))
+        self.documents_by_content[content_id] = (user, documents)
+    
+    def _remove(self, content_id: str) -> None:
+        user, documents = self.documents_by_content.pop(content_id, (None, None))
+        if not documents:
+            return
+        self.alive[documents] = False
+        self.live_count -= len(documents)
+        user.live_count -= len(documents)
+        user.total_length -= int(self.lengths[documents].sum())
+    
+    def add_analysis(
+        self,
+        user_id: Optional[str],
+        content_id: str,
+        segments: List[Dict[str, Any]],
+        summary: str = "",
+        keywords: Optional[List[str]] = None
+    ) -> None:
+        """
+        Index a completed analysis, replacing the content's previous documents.
+        
+        Args:
+            user_id: Owner of the content
+            content_id: ID of the content
+            segments: Analyzed segments
+            summary: Content summary
+            keywords: Content keywords
+        """
+        if not user_id:
+            return
+        
+        try:
+            with self._lock:
+                self._ensure_loaded()
+                self._add(user_id, content_id, segments, summary, keywords or [])
+                if self.count - self.live_count > max(self.count // 2, 1024):
+                    # Tombstones only shrink the live set; reclaim their postings
+                    self._reset()
+                    self._index_stored_analyses()
+        except Exception as e:
+            logger.error(f"Error indexing text of {content_id}: {str(e)}")
+    
+    def _expand_prefix(self, user: UserPostings, prefix: str) -> List[str]:
+        """Terms of a user's library starting with a prefix, the most frequent first"""
+        if user.sorted_terms is None:
+            user.sorted_terms = sorted(user.postings)
+        start = bisect.bisect_left(user.sorted_terms, prefix)
+        end = bisect.bisect_left(user.sorted_terms, prefix + "\uffff")
+        terms = user.sorted_terms[start:end]
+        terms.sort(key=lambda term: -user.postings[term].count)
+        return terms[:settings.text_search_max_prefix_expansions]
+    
+    def _parse(self, user: UserPostings, query: str) -> tuple:
+        """
+        Parse a query against a user's library.
+        
+        Returns:
+            Tuple of (scored terms, phrases as token lists)
+        """
+        terms = []
+        phrases = []
+        for phrase, word in QUERY_PATTERN.findall(query.lower()):
+            if phrase:
+                tokens = TOKEN_PATTERN.findall(phrase)
+                if len(tokens) > 1:
+                    phrases.append(tokens)
+                terms.extend(tokens)
+            elif word.endswith("*") and len(word) > 1:
+                prefix = TOKEN_PATTERN.findall(word[:-1])
+                if prefix:
+                    terms.extend(self._expand_prefix(user, prefix[-1]))
+            else:
+                terms.extend(TOKEN_PATTERN.findall(word))
+        
+        # Stop words only count when the query has nothing else
+        content_terms = [term for term in terms if term not in STOP_WORDS]
+        return list(dict.fromkeys(content_terms or terms)), phrases
+    
+    def _phrase_documents(self, user: UserPostings, tokens: List[str], candidates: np.ndarray) -> np.ndarray:
+        """
+        Narrow candidate documents to those containing a phrase.
+        
+        Args:
+            user: Library to search
+            tokens: Phrase tokens
+            candidates: Sorted candidate document ids
+        
+        Returns:
+            Sorted ids of the candidates containing the phrase
+        """
+        posting_lists = [user.postings.get(token) for token in tokens]
+        if any(posting_list is None for posting_list in posting_lists):
+            return np.array([], dtype=np.int64)
+        
+        # Rarest tokens first, so each lookup only decodes blocks holding surviving candidates
+        keys = None
+        for offset in sorted(range(len(tokens)), key=lambda offset: posting_lists[offset].count):
+            documents, frequencies, positions = posting_lists[offset].decode_for(candidates)
+            # Align every token to the phrase start
+            token_keys = (np.repeat(documents, frequencies) << POSITION_BITS) + positions - offset
+            keys = token_keys if keys is None else np.intersect1d(keys, token_keys, assume_unique=True)
+            candidates = np.unique(keys >> POSITION_BITS)
+            if len(candidates) == 0:
+                break
+        return candidates
+    
+    def search(self, user_id: str, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
+        """
+        Search a user's analyzed content.
+        
+        Args:
+            user_id: User whose content to search
+            query: Query text
+            top_k: Number of hits to return
+        
+        Returns:
+            Matching documents with their BM25 scores, best first
+        """
+        with self._lock:
+            self._ensure_loaded()
+            user = self.users.get(user_id)
+            if user is None or user.live_count == 0:
+                return []
+            
+            terms, phrases = self._parse(user, query)
+            if not terms:
+                return []
+            
+            k1 = settings.text_search_bm25_k1
+            b = settings.text_search_bm25_b
+            average_length = max(user.total_length / user.live_count, 1.0)
+            
+            # Decode each term's postings, keep the live documents and score them
+            matched_documents = []
+            matched_scores = []
+            for term in terms:
+                posting_list = user.postings.get(term)
+                if posting_list is None:
+                    continue
+                documents, frequencies = posting_list.decode()
+                live = self.alive[documents]
+                documents = documents[live]
+                frequencies = frequencies[live]
+                document_frequency = min(len(documents), user.live_count)
+                idf = np.log(1 + (user.live_count - document_frequency + 0.5) / (document_frequency + 0.5))
+                length_norm = k1 * (1 - b + b * self.lengths[documents] / average_length)
+                matched_documents.append(documents)
+                matched_scores.append(idf * frequencies * (k1 + 1) / (frequencies + length_norm))
+            if not matched_documents:
+                return []
+            
+            candidates, inverse = np.unique(np.concatenate(matched_documents), return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate(matched_scores), minlength=len(candidates))
+            for tokens in phrases:
+                if len(candidates) == 0:
+                    break
+                matching = self._phrase_documents(user, tokens, candidates)
+                keep = np.isin(candidates, matching, assume_unique=True)
+                candidates = candidates[keep]
+                scores = scores[keep]
+            if len(candidates) == 0:
+                return []
+            
+            candidate_scores = scores
+            top_k = min(top_k, len(candidates))
+            top = np.argpartition(-candidate_scores, top_k - 1)[:top_k]
+            top = top[np.argsort(-candidate_scores[top], kind="stable")]
+            return [
+                dict(self.entries[candidates[position]], score=round(float(candidate_scores[position]), 4))
+                for position in top.tolist()
+            ]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get index size statistics.
+        
+        Returns:
+            Document, term and postings byte counts
+        """
+        with self._lock:
+            posting_lists = [posting_list for user in self.users.values() for posting_list in user.postings.values()]
+            return {
+                "documents": self.live_count,
+                "tombstoned_documents": self.count - self.live_count,
+                "libraries": len(self.users),
+                "posting_lists": len(posting_lists),
+                "postings_bytes": sum(
+                    len(posting_list.documents) + len(posting_list.frequencies) + len(posting_list.positions)
+                    for posting_list in posting_lists
+                )
+            }
+
+# Create global text search index instance
+text_search_index = TextSearchIndex()
@@ -0,0 +1,123 @@
+import asyncio
+import hashlib
+import logging
+import os
+import subprocess
+import threading
+from typing import Dict, Any, Optional
+from ..config import settings
+from .ffmpeg import find_ffmpeg
+from .disk_cache import DiskCache
+
+# Configure logging
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
+
+class TranscriptCache:
+    def __init__(self):
+        self.cache = DiskCache(
+            os.path.join(settings.cache_dir, "transcripts"),
+            settings.transcript_cache_max_bytes
+        )
+        self.ffmpeg_path = find_ffmpeg()
+        self.saved_audio_seconds = 0.0
+        self._lock = threading.Lock()
+    
+    async def fingerprint(self, media_path: str) -> Optional[str]:
+        """
+        Fingerprint the audio stream of a media file.
+        
+        The hash covers the encoded audio packets only (no decoding), so the same
+        audio in a re-uploaded or re-muxed file maps to the same fingerprint.
+        Falls back to hashing the whole file when ffmpeg is unavailable.
+        
+        Args:
+            media_path: Path to a local audio or video file
+        
+        Returns:
+            Hex fingerprint or None if the file could not be read
+        """
+        try:
+            return await asyncio.to_thread(self._fingerprint, media_path)
+        except Exception as e:
+            logger.error(f"Error fingerprinting audio: {str(e)}")
+            return None
+    
+    def _fingerprint(self, media_path: str) -> Optional[str]:
+        if self.ffmpeg_path:
+            command = [
+                self.ffmpeg_path,
+                "-nostdin",
+                "-v", "error",
+                "-i", media_path,
+                "-map", "0:a:0",
+                "-c", "copy",
+                "-f", "hash",
+                "-hash", "sha256",
+                "-"
+            ]
+            process = subprocess.run(command, capture_output=True, text=True)
+            output = process.stdout.strip()
+            if process.returncode == 0 and output.startswith("SHA256="):
+                return output.split("=", 1)[1]
+        
+        digest = hashlib.sha256()
+        with open(media_path, "rb") as media_file:
+            for block in iter(lambda: media_file.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def make_key(self, fingerprint: str, language: str, model: str) -> str:
+        """
+        Build the cache key for a transcription.
+        
+        Args:
+            fingerprint: Audio fingerprint
+            language: Language code
+            model: Transcription model name
+        
+        Returns:
+            Cache key
+        """
+        return DiskCache.make_key("transcript", fingerprint, language, model)
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached transcription and account for the audio it saves.
+        
+        Args:
+            key: Cache key from make_key
+        
+        Returns:
+            Cached transcription result or None on a miss
+        """
+        result = self.cache.get(key)
+        if result is not None:
+            with self._lock:
+                self.saved_audio_seconds += result.get("duration") or 0.0
+        return result
+    
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        """
+        Store a transcription result.
+        
+        Args:
+            key: Cache key from make_key
+            result: Transcription result (with 'duration' in seconds when known)
+        """
+        self.cache.set(key, result)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get transcript cache statistics.
+        
+        Returns:
+            Cache statistics including the audio minutes not re-transcribed
+        """
+        stats = self.cache.get_stats()
+        with self._lock:
+            stats["saved_audio_minutes"] = round(self.saved_audio_seconds / 60, 2)
+        return stats
+
+# Create global transcript cache instance
+transcript_cache = TranscriptCache()
@@ -0,0 +1,265 @@
+import logging
+import math
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+import numpy as np
+from ..config import settings
+from ..database import db
+
+# Configure logging
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
+
+# Serialized layout: header, then token byte offsets, start/end milliseconds,
+# confidences and the UTF-8 token blob, all little-endian and zlib-compressed
+SERIALIZATION_MAGIC = b"WTR1"
+HEADER = struct.Struct("<4sII")
+
+class WordTranscript:
+    """
+    Word-level transcript in columnar form.
+    
+    Words are kept sorted by start time in parallel arrays: start and end offsets
+    in milliseconds (int32), confidence quantized to a byte (uint8) and the tokens as
+    one UTF-8 blob with int32 offsets. Time-range lookups bisect the start column,
+    so fetching any segment costs O(log n) plus the words returned.
+    """
+    
+    def __init__(
+        self,
+        token_blob: bytes,
+        token_offsets: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        confidences: np.ndarray
+    ):
+        self.token_blob = token_blob
+        self.token_offsets = token_offsets
+        self.starts = starts
+        self.ends = ends
+        self.confidences = confidences
+    
+    @classmethod
+    def from_words(cls, words: List[Dict[str, Any]]) -> "WordTranscript":
+        """
+        Build a transcript from word dictionaries.
+        
+        Args:
+            words: Words with 'word', 'start' and 'end' in seconds and an optional 'confidence'
+        
+        Returns:
+            Columnar transcript sorted by start time
+        """
+        count = len(words)
+        starts = np.fromiter((word["start"] for word in words), dtype=np.float64, count=count)
+        ends = np.fromiter((word["end"] for word in words), dtype=np.float64, count=count)
+        confidences = np.fromiter((word.get("confidence", 1.0) for word in words), dtype=np.float64, count=count)
+        
+        order = np.argsort(starts, kind="stable")
+        encoded = [words[i]["word"].strip().encode("utf-8") for i in order.tolist()]
+        
+        token_offsets = np.zeros(count + 1, dtype=np.int32)
+        if count:
+            np.cumsum([len(token) for token in encoded], out=token_offsets[1:])
+        
+        return cls(
+            b"".join(encoded),
+            token_offsets,
+            np.round(starts[order] * 1000).astype(np.int32),
+            np.round(ends[order] * 1000).astype(np.int32),
+            np.round(np.clip(confidences[order], 0.0, 1.0) * 255).astype(np.uint8)
+        )
+    
+    def __len__(self) -> int:
+        return len(self.starts)
+    
+    def _range(self, start_time: float, end_time: float) -> np.ndarray:
+        """Indices of the words lying entirely within [start_time, end_time]"""
+        start_ms = math.ceil(start_time * 1000)
+        end_ms = math.floor(end_time * 1000)
+        low = int(np.searchsorted(self.starts, start_ms, side="left"))
+        high = int(np.searchsorted(self.starts, end_ms, side="right"))
+        indices = np.arange(low, high)
+        return indices[self.ends[low:high] <= end_ms]
+    
+    def slice(self, start_time: float, end_time: float) -> "WordTranscript":
+        """
+        Get the words lying entirely within a time range.
+        
+        Args:
+            start_time: Range start in seconds
+            end_time: Range end in seconds
+        
+        Returns:
+            Transcript with only the words in range
+        """
+        indices = self._range(start_time, end_time)
+        tokens = [self._token(i) for i in indices.tolist()]
+        token_offsets = np.zeros(len(tokens) + 1, dtype=np.int32)
+        if tokens:
+            np.cumsum([len(token) for token in tokens], out=token_offsets[1:])
+        
+        return WordTranscript(
+            b"".join(tokens),
+            token_offsets,
+            self.starts[indices],
+            self.ends[indices],
+            self.confidences[indices]
+        )
+    
+    def _token(self, index: int) -> bytes:
+        return self.token_blob[self.token_offsets[index]:self.token_offsets[index + 1]]
+    
+    def text(self) -> str:
+        """
+        Get the transcript text.
+        
+        Returns:
+            Words joined by single spaces
+        """
+        return " ".join(self._token(i).decode("utf-8") for i in range(len(self)))
+    
+    def words(self) -> List[Dict[str, Any]]:
+        """
+        Get the transcript as word dictionaries.
+        
+        Returns:
+            Words with 'word', 'start', 'end' (seconds) and 'confidence'
+        """
+        return [
+            {
+                "word": self._token(i).decode("utf-8"),
+                "start": start / 1000,
+                "end": end / 1000,
+                "confidence": round(confidence / 255, 3)
+            }
+            for i, (start, end, confidence) in enumerate(zip(self.starts.tolist(), self.ends.tolist(), self.confidences.tolist()))
+        ]
+    
+    def to_bytes(self) -> bytes:
+        """
+        Serialize the transcript to a compact binary form.
+        
+        Returns:
+            Serialized transcript
+        """
+        payload = b"".join([
+            self.token_offsets.astype("<i4").tobytes(),
+            self.starts.astype("<i4").tobytes(),
+            self.ends.astype("<i4").tobytes(),
+            self.confidences.tobytes(),
+            self.token_blob
+        ])
+        return HEADER.pack(SERIALIZATION_MAGIC, len(self), len(self.token_blob)) + zlib.compress(payload)
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "WordTranscript":
+        """
+        Deserialize a transcript produced by to_bytes.
+        
+        Args:
+            data: Serialized transcript
+        
+        Returns:
+            Columnar transcript
+        """
+        magic, count, blob_length = HEADER.unpack_from(data)
+        if magic != SERIALIZATION_MAGIC:
+            raise ValueError("Not a serialized word transcript")
+        
+        payload = zlib.decompress(data[HEADER.size:])
+        offset = 0
+        
+        def take(dtype: str, length: int) -> np.ndarray:
+            nonlocal offset
+            array = np.frombuffer(payload, dtype=dtype, count=length, offset=offset)
+            offset += array.nbytes
+            return array
+        
+        token_offsets = take("<i4", count + 1)
+        starts = take("<i4", count)
+        ends = take("<i4", count)
+        confidences = take("u1", count)
+        token_blob = payload[offset:offset + blob_length]
+        
+        return cls(token_blob, token_offsets, starts, ends, confidences)
+
+class TranscriptStore:
+    """
+    Word-level transcripts stored compressed, with recently used ones kept decoded.
+    
+    Decoding is linear in transcript length, so a bounded LRU of deserialized
+    transcripts keeps repeated range fetches at the cost of the binary search.
+    """
+    
+    def __init__(self):
+        self._decoded: "OrderedDict[str, WordTranscript]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def save(self, content_id: str, transcript: WordTranscript) -> None:
+        """
+        Persist the word-level transcript of a content upload.
+        
+        Args:
+            content_id: ID of the content
+            transcript: Columnar transcript
+        """
+        db.transcripts[content_id] = transcript.to_bytes()
+        with self._lock:
+            self._decoded.pop(content_id, None)
+        logger.info(f"Stored {len(transcript)} transcript words for content: {content_id}")
+    
+    def get(self, content_id: str) -> Optional[WordTranscript]:
+        """
+        Load the word-level transcript of a content upload.
+        
+        Args:
+            content_id: ID of the content
+        
+        Returns:
+            Columnar transcript or None if not stored
+        """
+        with self._lock:
+            transcript = self._decoded.get(content_id)
+            if transcript is not None:
+                self._decoded.move_to_end(content_id)
+                return transcript
+        
+        data = db.transcripts.get(content_id)
+        if data is None:
+            return None
+        transcript = WordTranscript.from_bytes(data)
+        
+        with self._lock:
+            self._decoded[content_id] = transcript
+            while len(self._decoded) > max(settings.transcript_store_cache_entries, 1):
+                self._decoded.popitem(last=False)
+        return transcript
+    
+    def get_range(self, content_id: str, start_time: float, end_time: float) -> Optional[Dict[str, Any]]:
+        """
+        Fetch the text and word timings of a time range, e.g. one segment.
+        
+        Args:
+            content_id: ID of the content
+            start_time: Range start in seconds
+            end_time: Range end in seconds
+        
+        Returns:
+            Dictionary with 'text' and 'words', or None if no transcript is stored
+        """
+        transcript = self.get(content_id)
+        if transcript is None:
+            return None
+        
+        words = transcript.slice(start_time, end_time)
+        return {
+            "text": words.text(),
+            "words": words.words()
+        }
+
+# Create global transcript store instance
+transcript_store = TranscriptStore()
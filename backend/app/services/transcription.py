@@ -1,34 +1,48 @@
+import asyncio
+import bisect
 import logging
 import os
+import subprocess
 import tempfile
-from typing import Dict, Any, Optional
-import openai
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Dict, Any, Optional
 from ..config import settings
 from .storage import storage_service
+from .audio_analysis import audio_analysis_service
+from .transcript_cache import transcript_cache
+from .audio_extraction import audio_extraction_service
+from .ffmpeg import find_ffmpeg
+from .transcription_backends import create_transcription_backend, get_request_semaphore
 
 # Configure logging
 logging.basicConfig(level=settings.log_level)
 logger = logging.getLogger(__name__)
 
+# Fraction of transcription_chunk_max_bytes a chunk may fill, leaving room for container overhead
+CHUNK_SIZE_HEADROOM = 0.9
+
 class TranscriptionService:
     def __init__(self):
-        self.openai_client = None
+        self.backend = None
+        self.ffmpeg_path = find_ffmpeg()
         self.initialize_client()
     
     def initialize_client(self):
-        """Initialize OpenAI client for transcription"""
+        """Initialize the transcription backend selected in settings"""
         try:
-            # Use the OpenAI API key from settings
-            api_key = settings.openai_api_key or settings.openai_whisper_api_key
-            
-            if api_key:
-                openai.api_key = api_key
-                self.openai_client = openai
-                logger.info("OpenAI client initialized successfully for transcription")
-            else:
-                logger.warning("OpenAI API key not provided, transcription will be simulated")
+            self.backend = create_transcription_backend()
         except Exception as e:
-            logger.error(f"Error initializing OpenAI client: {str(e)}")
+            logger.error(f"Error initializing transcription backend: {str(e)}")
+    
+    @property
+    def simulated(self) -> bool:
+        """Whether results come from a stand-in rather than a real speech model"""
+        return self.backend is None or self.backend.name == "local"
+    
+    def _model_id(self) -> str:
+        if not self.backend:
+            return "simulated"
+        return f"{self.backend.name}:{self.backend.model}"
     
     async def transcribe_audio(self, audio_file_path: str, language: str = "en") -> Dict[str, Any]:
         """
@@ -38,26 +52,74 @@ class TranscriptionService:
             audio_file_path: Path to the audio file
             language: Language code (default: "en")
             
+        Returns:
+            Transcription result
+        """
+        return await self._transcribe_with_cache(audio_file_path, language, self._transcribe_audio_file)
+    
+    async def _transcribe_with_cache(self, media_path: str, language: str, transcribe) -> Dict[str, Any]:
+        """
+        Serve a transcription from the transcript cache, or run it and cache the result.
+        
+        Args:
+            media_path: Path to the audio or video file
+            language: Language code
+            transcribe: Coroutine function taking (media_path, language) used on a miss
+            
+        Returns:
+            Transcription result
+        """
+        cache_key = None
+        if os.path.exists(media_path):
+            fingerprint = await transcript_cache.fingerprint(media_path)
+            if fingerprint:
+                cache_key = transcript_cache.make_key(fingerprint, language, self._model_id())
+                # Disk reads and JSON decoding stay off the event loop
+                cached = await asyncio.to_thread(transcript_cache.get, cache_key)
+                if cached is not None:
+                    logger.info(f"Transcript cache hit for: {media_path}")
+                    return {**cached, "cached": True}
+        
+        result = await transcribe(media_path, language)
+        
+        # Only real transcriptions are worth keeping
+        if cache_key and result.get("success") and not result.get("simulated"):
+            if "duration" not in result:
+                result["duration"] = await asyncio.to_thread(self._probe_duration, media_path)
+            await asyncio.to_thread(transcript_cache.set, cache_key, result)
+        
+        return result
+    
+    async def _transcribe_audio_file(self, audio_file_path: str, language: str) -> Dict[str, Any]:
+        """
+        Transcribe audio file without consulting the transcript cache.
+        
+        Args:
+            audio_file_path: Path to the audio file
+            language: Language code
+            
         Returns:
             Transcription result
         """
         logger.info(f"Transcribing audio file: {audio_file_path}")
         
         try:
-            if self.openai_client and os.path.exists(audio_file_path):
-                # Use OpenAI Whisper API for transcription
-                with open(audio_file_path, "rb") as audio_file:
-                    response = self.openai_client.audio.transcriptions.create(
-                        model="whisper-1",
-                        file=audio_file,
-                        language=language
-                    )
+            if os.path.exists(audio_file_path) and self.ffmpeg_path:
+                # Long sources exceed the API upload limit and serialize latency, split them up
+                duration = await asyncio.to_thread(self._probe_duration, audio_file_path)
+                too_large = os.path.getsize(audio_file_path) > settings.transcription_chunk_max_bytes
+                if duration and (too_large or duration > settings.transcription_chunk_max_seconds):
+                    return await self._transcribe_chunked(audio_file_path, duration, language)
+            
+            if self.backend and os.path.exists(audio_file_path):
+                # Use the configured transcription backend
+                result = await self._transcribe_chunk(audio_file_path, language)
                 
                 logger.info(f"Transcription completed successfully")
-                return {
-                    "text": response.text,
-                    "success": True
-                }
+                result["success"] = True
+                if self.simulated:
+                    result["simulated"] = True
+                return result
             else:
                 # Simulate transcription for development
                 logger.info(f"Simulating audio transcription")
@@ -79,6 +141,232 @@ class TranscriptionService:
                 "error": str(e)
             }
     
+    async def _transcribe_chunked(self, audio_file_path: str, duration: float, language: str) -> Dict[str, Any]:
+        """
+        Transcribe a long audio file as overlapping chunks split at speech pauses.
+        
+        Chunks are transcribed concurrently (bounded process-wide by
+        transcription_max_concurrency) and stitched back together with word timestamps shifted to the source timeline.
+        
+        Args:
+            audio_file_path: Path to the audio file
+            duration: Duration of the audio in seconds
+            language: Language code
+            
+        Returns:
+            Transcription result
+        """
+        intervals = await audio_analysis_service.detect_speech_intervals(audio_file_path)
+        plan = self._plan_chunks(duration, intervals.get("silence", []), os.path.getsize(audio_file_path))
+        logger.info(f"Transcribing {duration:.1f}s of audio in {len(plan)} chunks")
+        
+        async def transcribe_planned_chunk(chunk: Dict[str, float]) -> Dict[str, Any]:
+            chunk_path = await asyncio.to_thread(self._cut_audio_chunk, audio_file_path, chunk["start"], chunk["end"])
+            if not chunk_path:
+                raise RuntimeError(f"Failed to cut audio chunk at {chunk['start']:.2f}s")
+            try:
+                return await self._transcribe_chunk(chunk_path, language, chunk["end"] - chunk["start"])
+            finally:
+                if os.path.exists(chunk_path):
+                    os.remove(chunk_path)
+        
+        # gather keeps results in plan order regardless of completion order
+        results = await asyncio.gather(*(transcribe_planned_chunk(chunk) for chunk in plan))
+        
+        stitched = self._stitch_chunks(plan, results)
+        stitched.update({
+            "chunks": len(plan),
+            "success": True
+        })
+        if self.simulated:
+            stitched["simulated"] = True
+        return stitched
+    
+    def _plan_chunks(self, duration: float, silence_intervals: List[Dict[str, Any]], file_size: Optional[int] = None) -> List[Dict[str, float]]:
+        """
+        Choose chunk boundaries at speech pauses, falling back to hard cuts.
+        
+        Each chunk records the region it owns ('keep_start' to 'keep_end') and the wider
+        region it is transcribed over ('start' to 'end'), which overlaps its neighbours.
+        Chunks are stream-copied, so their size scales with the source bitrate and the
+        span is also capped to stay under transcription_chunk_max_bytes.
+        
+        Args:
+            duration: Duration of the audio in seconds
+            silence_intervals: Silence intervals from the audio analysis service
+            file_size: Size of the audio file in bytes (optional)
+            
+        Returns:
+            List of chunk plans in timeline order
+        """
+        max_seconds = settings.transcription_chunk_max_seconds
+        if file_size and duration > 0:
+            max_seconds = min(max_seconds, settings.transcription_chunk_max_bytes * CHUNK_SIZE_HEADROOM * duration / file_size)
+        overlap = settings.transcription_chunk_overlap_seconds
+        
+        # Keep the transcribed span (owned region plus both overlaps) under the limit
+        target = max(max_seconds - 2 * overlap, max_seconds / 2)
+        pause_points = [(interval["start_time"] + interval["end_time"]) / 2 for interval in silence_intervals]
+        
+        boundaries = [0.0]
+        while duration - boundaries[-1] > target:
+            earliest = boundaries[-1] + target / 2
+            latest = boundaries[-1] + target
+            
+            # Prefer the latest pause that still keeps the chunk under the limit
+            index = bisect.bisect_right(pause_points, latest) - 1
+            if index >= 0 and pause_points[index] > earliest:
+                boundaries.append(pause_points[index])
+            else:
+                boundaries.append(latest)
+        boundaries.append(duration)
+        
+        return [
+            {
+                "keep_start": keep_start,
+                "keep_end": keep_end,
+                "start": max(keep_start - overlap, 0.0),
+                "end": min(keep_end + overlap, duration)
+            }
+            for keep_start, keep_end in zip(boundaries[:-1], boundaries[1:])
+        ]
+    
+    def _stitch_chunks(self, plan: List[Dict[str, float]], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Merge chunk transcriptions into one transcript on the source timeline.
+        
+        Word timestamps are offset by the chunk start, and each word is kept only by the
+        chunk that owns its start time, which removes duplicates from the overlaps.
+        
+        Args:
+            plan: Chunk plans from _plan_chunks
+            results: Chunk transcription results, in plan order
+            
+        Returns:
+            Dictionary with 'text', 'words' and 'segments'
+        """
+        words = []
+        segments = []
+        texts = []
+        
+        for chunk, result in zip(plan, results):
+            for segment in result.get("segments") or []:
+                start = segment["start"] + chunk["start"]
+                if chunk["keep_start"] <= start < chunk["keep_end"]:
+                    segments.append({
+                        "text": segment["text"],
+                        "start": round(start, 3),
+                        "end": round(segment["end"] + chunk["start"], 3)
+                    })
+
+            chunk_words = result.get("words") or []
+            if not chunk_words:
+                # Without word timings the overlap cannot be trimmed, keep the text as is
+                texts.append(result.get("text", "").strip())
+                continue
+            
+            kept = []
+            for word in chunk_words:
+                start = word["start"] + chunk["start"]
+                if chunk["keep_start"] <= start < chunk["keep_end"]:
+                    kept.append({
+                        "word": word["word"],
+                        "start": round(start, 3),
+                        "end": round(word["end"] + chunk["start"], 3)
+                    })
+            words.extend(kept)
+            texts.append(" ".join(word["word"] for word in kept))
+        
+        return {
+            "text": " ".join(text for text in texts if text),
+            "words": words,
+            "segments": segments
+        }
+    
+    async def _transcribe_chunk(self, audio_file_path: str, language: str, duration: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Transcribe a single audio file with word-level timestamps.
+        
+        Args:
+            audio_file_path: Path to the audio file
+            language: Language code
+            duration: Duration of the audio in seconds, used when simulating (optional)
+            
+        Returns:
+            Dictionary with 'text' and 'words' (each with 'word', 'start' and 'end')
+        """
+        if not self.backend:
+            # Simulate a chunk transcription with evenly spaced word timings
+            text = self._generate_simulated_transcript(audio_file_path)
+            tokens = text.split()
+            step = (duration or len(tokens) * 0.4) / max(len(tokens), 1)
+            return {
+                "text": text,
+                "words": [
+                    {"word": token, "start": round(i * step, 3), "end": round((i + 1) * step, 3)}
+                    for i, token in enumerate(tokens)
+                ]
+            }
+        
+        # Backends are non-blocking; the shared semaphore bounds in-flight requests process-wide
+        async with get_request_semaphore():
+            return await self.backend.transcribe(audio_file_path, language, duration)
+    
+    def _cut_audio_chunk(self, audio_file_path: str, start_time: float, end_time: float) -> Optional[str]:
+        """
+        Cut a time range out of an audio file with ffmpeg.
+        
+        Args:
+            audio_file_path: Path to the audio file
+            start_time: Chunk start in seconds
+            end_time: Chunk end in seconds
+            
+        Returns:
+            Path to the chunk file or None if failed
+        """
+        if not self.ffmpeg_path:
+            return None
+        
+        # Chunks keep the source container and are stream-copied, the extract is already compact
+        extension = os.path.splitext(audio_file_path)[1] or ".mp3"
+        with tempfile.NamedTemporaryFile(delete=False, suffix=extension) as temp_file:
+            chunk_path = temp_file.name
+        
+        command = [
+            self.ffmpeg_path,
+            "-y",
+            "-ss", f"{start_time:.3f}",
+            "-t", f"{end_time - start_time:.3f}",
+            "-i", audio_file_path,
+            "-map", "0:a:0",
+            "-c:a", "copy",
+            chunk_path
+        ]
+        
+        process = subprocess.run(command, capture_output=True, text=True)
+        if process.returncode != 0:
+            logger.error(f"FFMPEG error: {process.stderr}")
+            if os.path.exists(chunk_path):
+                os.remove(chunk_path)
+            return None
+        
+        return chunk_path
+    
+    def _probe_duration(self, media_path: str) -> Optional[float]:
+        """
+        Read the duration of a media file from the ffmpeg header dump.
+        
+        Args:
+            media_path: Path to the media file
+            
+        Returns:
+            Duration in seconds or None if unknown
+        """
+        if not audio_extraction_service.ffmpeg_path:
+            return None
+        
+        return audio_extraction_service.probe(media_path)["duration"]
+    
     async def transcribe_video(self, video_file_path: str, language: str = "en") -> Dict[str, Any]:
         """
         Extract audio from video and transcribe it.
@@ -87,39 +375,44 @@ class TranscriptionService:
             video_file_path: Path to the video file
             language: Language code (default: "en")
             
+        Returns:
+            Transcription result
+        """
+        # The cache is keyed on the video's own audio stream, so a hit skips extraction too
+        return await self._transcribe_with_cache(video_file_path, language, self._transcribe_video_file)
+    
+    async def _transcribe_video_file(self, video_file_path: str, language: str) -> Dict[str, Any]:
+        """
+        Extract audio from video and transcribe it without consulting the transcript cache.
+        
+        Args:
+            video_file_path: Path to the video file
+            language: Language code
+            
         Returns:
             Transcription result
         """
         logger.info(f"Transcribing video file: {video_file_path}")
         
         try:
-            # Extract audio from video using ffmpeg
-            audio_file_path = await self._extract_audio_from_video(video_file_path)
+            # Extract audio from video using ffmpeg, kept on disk until transcription is done
+            async with self._extract_audio_from_video(video_file_path) as audio_file_path:
+                if audio_file_path:
+                    # Transcribe the extracted audio
+                    return await self._transcribe_audio_file(audio_file_path, language)
             
-            if audio_file_path:
-                # Transcribe the extracted audio
-                result = await self.transcribe_audio(audio_file_path, language)
-                
-                # Clean up the temporary audio file
-                try:
-                    os.remove(audio_file_path)
-                except Exception as e:
-                    logger.warning(f"Error removing temporary audio file: {str(e)}")
-                
-                return result
-            else:
-                # Simulate transcription if audio extraction failed
-                logger.info(f"Simulating video transcription (audio extraction failed)")
-                
-                # Generate a simulated transcript based on the filename
-                filename = os.path.basename(video_file_path)
-                simulated_transcript = self._generate_simulated_transcript(filename)
-                
-                return {
-                    "text": simulated_transcript,
-                    "success": True,
-                    "simulated": True
-                }
+            # Simulate transcription if audio extraction failed
+            logger.info(f"Simulating video transcription (audio extraction failed)")
+            
+            # Generate a simulated transcript based on the filename
+            filename = os.path.basename(video_file_path)
+            simulated_transcript = self._generate_simulated_transcript(filename)
+            
+            return {
+                "text": simulated_transcript,
+                "success": True,
+                "simulated": True
+            }
         except Exception as e:
             logger.error(f"Error transcribing video: {str(e)}")
             return {
@@ -158,8 +451,9 @@ class TranscriptionService:
                 else:
                     result = await self.transcribe_audio(temp_file_path, language)
                 
-                # Clean up the temporary file
+                # Clean up the temporary file and any audio extracted from it
                 try:
+                    audio_extraction_service.release(temp_file_path)
                     os.remove(temp_file_path)
                 except Exception as e:
                     logger.warning(f"Error removing temporary file: {str(e)}")
@@ -185,84 +479,31 @@ class TranscriptionService:
                 "error": str(e)
             }
     
-    async def _extract_audio_from_video(self, video_file_path: str) -> Optional[str]:
+    @asynccontextmanager
+    async def _extract_audio_from_video(self, video_file_path: str) -> AsyncIterator[Optional[str]]:
         """
         Extract audio from video using ffmpeg.
         
+        The extract is shared through the audio extraction service, which owns the
+        file; callers must not delete it. It stays pinned until the block exits.
+        
         Args:
             video_file_path: Path to the video file
             
-        Returns:
+        Yields:
             Path to the extracted audio file or None if failed
         """
         logger.info(f"Extracting audio from video: {video_file_path}")
         
-        try:
-            # Find ffmpeg
-            ffmpeg_path = self._find_ffmpeg()
-            
-            if not ffmpeg_path:
-                logger.warning("FFMPEG not found, audio extraction will be simulated")
-                return None
-            
-            # Create a temporary file for the audio
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
-                audio_file_path = temp_file.name
-            
-            # Use ffmpeg to extract audio
-            import subprocess
-            
-            command = [
-                ffmpeg_path,
-                "-i", video_file_path,
-                "-q:a", "0",
-                "-map", "a",
-                "-f", "mp3",
-                audio_file_path
-            ]
-            
-            process = subprocess.run(command, capture_output=True, text=True)
-            
-            if process.returncode != 0:
-                logger.error(f"FFMPEG error: {process.stderr}")
-                return None
-            
-            logger.info(f"Audio extracted successfully to: {audio_file_path}")
-            return audio_file_path
-        except Exception as e:
-            logger.error(f"Error extracting audio from video: {str(e)}")
-            return None
-    
-    def _find_ffmpeg(self) -> Optional[str]:
-        """
-        Find the FFMPEG binary path.
+        if not audio_extraction_service.ffmpeg_path:
+            logger.warning("FFMPEG not found, audio extraction will be simulated")
+            yield None
+            return
         
-        Returns:
-            Path to ffmpeg or None if not found
-        """
-        try:
-            # Try to find ffmpeg in PATH
-            import subprocess
-            
-            result = subprocess.run(["which", "ffmpeg"], capture_output=True, text=True)
-            if result.returncode == 0:
-                return result.stdout.strip()
-            
-            # Check common locations
-            common_paths = [
-                "/usr/bin/ffmpeg",
-                "/usr/local/bin/ffmpeg",
-                "/opt/homebrew/bin/ffmpeg"
-            ]
-            
-            for path in common_paths:
-                if os.path.exists(path):
-                    return path
-            
-            return None
-        except Exception as e:
-            logger.error(f"Error finding FFMPEG: {str(e)}")
-            return None
+        async with audio_extraction_service.use(video_file_path) as audio_file_path:
+            if audio_file_path:
+                logger.info(f"Audio extracted successfully to: {audio_file_path}")
+            yield audio_file_path
     
     def _generate_simulated_transcript(self, filename: str) -> str:
         """
@@ -0,0 +1,182 @@
+import asyncio
+import hashlib
+import logging
+import os
+import random
+from typing import List, Dict, Any, Optional, Protocol, Tuple
+import openai
+from ..config import settings
+
+# Configure logging
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
+
+class TranscriptionBackend(Protocol):
+    """
+    Interface for speech-to-text backends.
+    
+    transcribe returns a dictionary with 'text', 'words' and 'segments'; words and
+    segments carry 'start'/'end' offsets in seconds relative to the submitted file.
+    Implementations must not block the event loop.
+    """
+    
+    name: str
+    model: str
+    
+    async def transcribe(self, audio_file_path: str, language: str, duration: Optional[float] = None) -> Dict[str, Any]:
+        ...
+
+class OpenAIWhisperBackend:
+    name = "openai"
+    
+    def __init__(self, api_key: str):
+        self.model = settings.transcription_model
+        self.client = openai.AsyncOpenAI(api_key=api_key)
+    
+    async def transcribe(self, audio_file_path: str, language: str, duration: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Transcribe an audio file with the Whisper API.
+        
+        Args:
+            audio_file_path: Path to the audio file
+            language: Language code
+            duration: Duration of the audio in seconds (unused)
+        
+        Returns:
+            Dictionary with 'text', 'words' and 'segments'
+        """
+        with open(audio_file_path, "rb") as audio_file:
+            response = await self.client.audio.transcriptions.create(
+                model=self.model,
+                file=audio_file,
+                language=language,
+                response_format="verbose_json",
+                timestamp_granularities=["word", "segment"]
+            )
+        
+        return {
+            "text": response.text,
+            "words": [
+                {"word": word.word, "start": word.start, "end": word.end}
+                for word in (getattr(response, "words", None) or [])
+            ],
+            "segments": [
+                {"text": segment.text, "start": segment.start, "end": segment.end}
+                for segment in (getattr(response, "segments", None) or [])
+            ]
+        }
+
+class LocalTranscriptionBackend:
+    """
+    Deterministic offline stand-in for tests and load benchmarks.
+    
+    The same file content always produces the same words and timings. An optional
+    delay proportional to the audio duration mimics backend latency.
+    """
+    
+    name = "local"
+    model = "local-stub-v1"
+    
+    VOCABULARY = [
+        "today", "we", "look", "at", "how", "short", "videos", "grow", "your", "audience",
+        "the", "first", "step", "is", "a", "strong", "hook", "then", "keep", "viewers",
+        "watching", "with", "clear", "value", "and", "end", "on", "call", "to", "action"
+    ]
+    
+    def __init__(self, latency_factor: float = 0.0):
+        self.latency_factor = latency_factor
+    
+    async def transcribe(self, audio_file_path: str, language: str, duration: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Produce a deterministic pseudo-transcript for an audio file.
+        
+        Args:
+            audio_file_path: Path to the audio file
+            language: Language code
+            duration: Duration of the audio in seconds (optional, estimated from size otherwise)
+        
+        Returns:
+            Dictionary with 'text', 'words' and 'segments'
+        """
+        # File reads stay off the event loop, like a real backend's upload
+        seed, size = await asyncio.to_thread(self._read_seed, audio_file_path, language)
+        if duration is None:
+            duration = size / 4000
+        rng = random.Random(seed)
+        
+        if self.latency_factor > 0:
+            await asyncio.sleep(duration * self.latency_factor)
+        
+        words: List[Dict[str, Any]] = []
+        cursor = 0.0
+        while True:
+            length = rng.uniform(0.2, 0.6)
+            if cursor + length > duration:
+                break
+            words.append({
+                "word": rng.choice(self.VOCABULARY),
+                "start": round(cursor, 3),
+                "end": round(cursor + length, 3)
+            })
+            cursor += length + rng.uniform(0.05, 0.3)
+        
+        # Group words into sentence-sized segments
+        segments = []
+        for index in range(0, len(words), 12):
+            group = words[index:index + 12]
+            segments.append({
+                "text": " ".join(word["word"] for word in group),
+                "start": group[0]["start"],
+                "end": group[-1]["end"]
+            })
+        
+        return {
+            "text": " ".join(word["word"] for word in words),
+            "words": words,
+            "segments": segments
+        }
+    
+    def _read_seed(self, audio_file_path: str, language: str) -> Tuple[str, int]:
+        """Seed from the leading bytes so identical audio gives identical output"""
+        with open(audio_file_path, "rb") as audio_file:
+            seed = hashlib.sha256(audio_file.read(64 * 1024) + language.encode()).hexdigest()
+        return seed, os.path.getsize(audio_file_path)
+
+# Limits in-flight backend requests across every caller in the process
+_request_semaphore: Optional[asyncio.Semaphore] = None
+
+def get_request_semaphore() -> asyncio.Semaphore:
+    """
+    Get the process-wide semaphore bounding concurrent transcription requests.
+    
+    Returns:
+        Shared semaphore sized by transcription_max_concurrency
+    """
+    global _request_semaphore
+    if _request_semaphore is None:
+        _request_semaphore = asyncio.Semaphore(max(settings.transcription_max_concurrency, 1))
+    return _request_semaphore
+
+def create_transcription_backend() -> Optional[TranscriptionBackend]:
+    """
+    Create the transcription backend selected in settings.
+    
+    Returns:
+        Backend instance, or None when the selected backend is not configured
+    """
+    backend = settings.transcription_backend.lower()
+    
+    if backend == "local":
+        logger.info("Using local stand-in transcription backend")
+        return LocalTranscriptionBackend(settings.local_transcription_latency_factor)
+    
+    if backend == "openai":
+        api_key = settings.openai_api_key or settings.openai_whisper_api_key
+        if not api_key:
+            logger.warning("OpenAI API key not provided, transcription will be simulated")
+            return None
+        logger.info("OpenAI client initialized successfully for transcription")
+        return OpenAIWhisperBackend(api_key)
+    
+    logger.error(f"Unknown transcription backend: {settings.transcription_backend}")
+    return None
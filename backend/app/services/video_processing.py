@@ -10,6 +10,7 @@ from ..database import db, create_item, get_item, update_item
 from ..models import VideoProcessingResult, ProcessingStatus
 from .storage import storage_service
 from .content_analysis import content_analysis_service
+from .segment_selection import segment_selector
 
 # Configure logging
 logging.basicConfig(level=settings.log_level)
@@ -172,6 +173,103 @@ class VideoProcessingService:
             }
         )
     
+    def _select_segments(
+        self,
+        segments: List[Dict[str, Any]],
+        selected_segments: List[str],
+        content: Dict[str, Any],
+        custom_settings: Dict[str, Any],
+        duplicate_segments: Optional[List[Dict[str, Any]]] = None
+    ) -> List[int]:
+        """
+        Choose which analyzed segments to render within the output duration budget.
+        
+        Segment IDs are positions in the analysis segment list. Requested segments are
+        kept when they fit the budget, otherwise the most valuable subset of them that
+        fits; when none are requested, the subset is chosen from all segments, optionally
+        leaving out segments that repeat earlier material. The selection is only empty
+        when there are no segments; it may exceed the budget, see _trim_to_budget.
+        
+        Args:
+            segments: Segments from the content analysis
+            selected_segments: Requested segment IDs (may be empty)
+            content: Content upload record
+            custom_settings: Custom settings ('max_duration', 'contiguous', 'order', 'exclude_duplicates')
+            duplicate_segments: Near-duplicate segments flagged by the content analysis (optional)
+            
+        Returns:
+            Indices of the segments to render, in render order
+        """
+        budget = self._duration_budget(content, custom_settings)
+        
+        candidates = None
+        requested = [int(segment_id) for segment_id in selected_segments or [] if str(segment_id).isdigit()]
+        requested = [index for index in requested if index < len(segments)]
+        if requested:
+            candidates = requested
+        elif selected_segments:
+            logger.warning(f"Ignoring unknown segment IDs: {selected_segments}")
+        
+        if candidates is None and duplicate_segments and custom_settings.get("exclude_duplicates", settings.exclude_duplicate_segments):
+            repeated = {duplicate["segment_index"] for duplicate in duplicate_segments}
+            candidates = [index for index in range(len(segments)) if index not in repeated] or None
+            logger.info(f"Excluding {len(repeated)} near-duplicate segments from selection")
+        
+        return segment_selector.select(
+            segments,
+            budget,
+            candidates=candidates,
+            contiguous=bool(custom_settings.get("contiguous", False)),
+            order=custom_settings.get("order", "chronological"),
+            requested=bool(requested)
+        )
+    
+    def _duration_budget(self, content: Dict[str, Any], custom_settings: Dict[str, Any]) -> float:
+        """
+        Get the output duration budget in seconds.
+        
+        Args:
+            content: Content upload record
+            custom_settings: Custom settings ('max_duration')
+            
+        Returns:
+            Requested maximum duration, else the preferred duration, capped at the TikTok maximum
+        
+        Raises:
+            ValueError: If the requested maximum duration is not positive
+        """
+        max_duration = custom_settings.get("max_duration")
+        if max_duration is not None and float(max_duration) <= 0:
+            # An empty budget selects nothing and would hand ffmpeg an empty concat list
+            raise ValueError(f"max_duration must be positive, got {max_duration}")
+        
+        budget = max_duration or content.get("preferred_duration") or settings.tiktok_video_max_length_seconds
+        return min(float(budget), float(settings.tiktok_video_max_length_seconds))
+    
+    def _trim_to_budget(self, segments: List[Dict[str, Any]], budget: float) -> List[Dict[str, Any]]:
+        """
+        Cut the render list at the duration budget.
+        
+        Args:
+            segments: Segments in render order
+            budget: Maximum total duration in seconds
+            
+        Returns:
+            Segments whose total duration fits the budget, the last one shortened if needed
+        """
+        trimmed = []
+        remaining = budget
+        for segment in segments:
+            start_time = segment.get("start_time", 0)
+            duration = segment.get("end_time", 0) - start_time
+            if duration > remaining:
+                if remaining > 0:
+                    trimmed.append({**segment, "end_time": start_time + remaining})
+                break
+            trimmed.append(segment)
+            remaining -= duration
+        return trimmed
+    
     async def _process_video_with_template(
         self,
         content: Dict[str, Any],
@@ -220,14 +318,22 @@ class VideoProcessingService:
             if self.ffmpeg_path and original_file_path and os.path.exists(original_file_path):
                 logger.info(f"Using FFMPEG to process video")
                 
-                # Get segments from analysis
+                # Get segments from analysis and pick the ones to render
                 segments = analysis.get("segments", [])
-                
-                # Filter segments if selected_segments is provided
-                if selected_segments and len(selected_segments) > 0:
-                    # In a real implementation, we would filter by segment ID
-                    # For this simulation, we'll just take the first few segments
-                    segments = segments[:len(selected_segments)]
+                selected_indices = self._select_segments(
+                    segments,
+                    selected_segments,
+                    content,
+                    custom_settings,
+                    analysis.get("duplicate_segments", [])
+                )
+                segments = self._trim_to_budget(
+                    [segments[index] for index in selected_indices],
+                    self._duration_budget(content, custom_settings)
+                )
+                logger.info(f"Rendering {len(segments)} segments: {selected_indices}")
+                if not segments:
+                    return {"error": "No segments to render"}
                 
                 # Create a temporary file for the segment list
                 segments_file = os.path.join(self.temp_dir, f"segments_{uuid.uuid4()}.txt")
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import time
+from typing import List, Dict, Any, Optional
+import numpy as np
+from ..config import settings
+from .frame_sampler import FrameSampler
+
+# Configure logging
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
+
+# Normalization scales for raw 8-bit grayscale statistics (roughly the 95th percentile on typical footage)
+MOTION_SCALE = 20.0
+CONTRAST_SCALE = 64.0
+BRIGHTNESS_VARIATION_SCALE = 30.0
+SALIENCY_SCALE = 25.0
+CUT_RATE_SCALE = 0.5
+
+# Mean absolute frame difference above which two consecutive samples are treated as a hard cut
+CUT_THRESHOLD = 40.0
+
+class VisualFeatureService:
+    def __init__(self):
+        self.fps = settings.visual_scoring_fps
+        self.max_realtime_fraction = settings.visual_scoring_max_realtime_fraction
+        self.skip_frame = settings.visual_scoring_skip_frame
+    
+    async def score_segments(self, video_path: str, segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Compute visual features per segment and fold them into the segment scores.
+        
+        Args:
+            video_path: Local path to video file
+            segments: List of video segments
+        
+        Returns:
+            New list of segments with visual_features, importance_score and
+            engagement_prediction updated
+        """
+        logger.info(f"Scoring {len(segments)} segments on visual features")
+        
+        try:
+            # Decoding and pixel statistics are CPU bound, keep them off the event loop
+            features = await asyncio.to_thread(self.extract_features, video_path, segments)
+        except Exception as e:
+            logger.error(f"Error extracting visual features: {str(e)}")
+            return segments
+        
+        # Blended and text-only scores are on different scales, so blend all segments or none
+        if any(segment_features is None for segment_features in features):
+            logger.info("Visual features incomplete, keeping text-only scores")
+            return segments
+        
+        scored = []
+        for segment, segment_features in zip(segments, features):
+            visual_energy = segment_features["visual_energy"]
+            text_score = segment.get("importance_score", 0.0)
+            importance_score = min(max(0.6 * visual_energy + 0.4 * text_score, 0.0), 1.0)
+            
+            # Movement and cuts hold attention on short-form platforms; keep half of the existing prediction
+            text_engagement = segment.get("engagement_prediction", text_score)
+            engagement_prediction = min(max(
+                0.5 * text_engagement + 0.3 * segment_features["motion"] + 0.2 * segment_features["cut_rate"],
+                0.0
+            ), 1.0)
+            
+            scored.append({
+                **segment,
+                "visual_features": segment_features,
+                "importance_score": round(importance_score, 4),
+                "engagement_prediction": round(engagement_prediction, 4)
+            })
+        
+        return scored
+    
+    def extract_features(self, video_path: str, segments: List[Dict[str, Any]]) -> List[Optional[Dict[str, float]]]:
+        """
+        Extract normalized visual features for each segment from low-resolution frame samples.
+        
+        Adjacent segments are decoded in one ffmpeg pass with B-frames and the
+        deblocking filter skipped (visual_scoring_skip_frame). Extraction is
+        abandoned once it has used its share of realtime (the combined segment
+        duration times visual_scoring_max_realtime_fraction), or as soon as its
+        pace shows it would: the check runs per frame, so a single long segment
+        cannot overrun it. When it is abandoned, no segment is scored.
+        
+        Args:
+            video_path: Local path to video file
+            segments: List of video segments
+        
+        Returns:
+            List of feature dictionaries (or None when a segment was not scored), aligned with segments
+        """
+        sampler = FrameSampler(fps=self.fps, skip_frame=self.skip_frame or None)
+        if not sampler.available:
+            return [None] * len(segments)
+        
+        durations = [max(s.get("end_time", 0.0) - s.get("start_time", 0.0), 0.0) for s in segments]
+        total_duration = sum(durations)
+        budget = total_duration * self.max_realtime_fraction
+        expected_frames = max(total_duration * self.fps, 1.0)
+        started = time.perf_counter()
+        
+        shape = (sampler.height, sampler.width)
+        difference = np.empty(shape, dtype=np.int16)
+        gradient_x = np.empty((shape[0], shape[1] - 1), dtype=np.int16)
+        gradient_y = np.empty((shape[0] - 1, shape[1]), dtype=np.int16)
+        
+        brightness: List[List[float]] = [[] for _ in segments]
+        contrast: List[List[float]] = [[] for _ in segments]
+        motion: List[List[float]] = [[] for _ in segments]
+        saliency: List[List[float]] = [[] for _ in segments]
+        previous: List[Optional[np.ndarray]] = [None] * len(segments)
+        
+        frames = sampler.iter_segment_frames(video_path, segments)
+        sampled = 0
+        for segment_index, _, frame in frames:
+            sampled += 1
+            elapsed = time.perf_counter() - started
+            # Past the deadline, or a tenth of the way through and on pace to miss it
+            if elapsed > budget or (sampled >= expected_frames / 10 and elapsed * expected_frames / sampled > budget):
+                # Closing the generator kills the ffmpeg process
+                frames.close()
+                logger.info(f"Visual feature budget of {budget:.2f}s would be exceeded, skipping visual scoring")
+                return [None] * len(segments)
+            
+            brightness[segment_index].append(frame.mean())
+            contrast[segment_index].append(frame.std())
+            
+            # Edge density is a cheap, face-free proxy for how much there is to look at
+            np.subtract(frame[:, 1:], frame[:, :-1], out=gradient_x, dtype=np.int16)
+            np.subtract(frame[1:, :], frame[:-1, :], out=gradient_y, dtype=np.int16)
+            saliency[segment_index].append((np.abs(gradient_x).mean() + np.abs(gradient_y).mean()) / 2)
+            
+            if previous[segment_index] is not None:
+                np.subtract(frame, previous[segment_index], out=difference, dtype=np.int16)
+                motion[segment_index].append(np.abs(difference).mean())
+            # The ring buffer keeps the previous frame alive, no copy needed
+            previous[segment_index] = frame
+        
+        features: List[Optional[Dict[str, float]]] = []
+        for segment_index, duration in enumerate(durations):
+            if duration <= 0 or not brightness[segment_index]:
+                features.append(None)
+                continue
+            
+            motion_values = np.asarray(motion[segment_index], dtype=np.float32)
+            cuts = int(np.count_nonzero(motion_values > CUT_THRESHOLD))
+            # Hard cuts would otherwise dominate the motion average
+            steady_motion = motion_values[motion_values <= CUT_THRESHOLD]
+            
+            raw = {
+                "motion": float(steady_motion.mean()) if len(steady_motion) else 0.0,
+                "contrast": float(np.mean(contrast[segment_index])),
+                "brightness_variation": float(np.std(brightness[segment_index])),
+                "saliency": float(np.mean(saliency[segment_index])),
+                "cut_rate": cuts / duration
+            }
+            normalized = {
+                "motion": min(raw["motion"] / MOTION_SCALE, 1.0),
+                "contrast": min(raw["contrast"] / CONTRAST_SCALE, 1.0),
+                "brightness_variation": min(raw["brightness_variation"] / BRIGHTNESS_VARIATION_SCALE, 1.0),
+                "saliency": min(raw["saliency"] / SALIENCY_SCALE, 1.0),
+                "cut_rate": min(raw["cut_rate"] / CUT_RATE_SCALE, 1.0)
+            }
+            normalized["visual_energy"] = (
+                0.35 * normalized["motion"]
+                + 0.2 * normalized["contrast"]
+                + 0.15 * normalized["brightness_variation"]
+                + 0.2 * normalized["saliency"]
+                + 0.1 * normalized["cut_rate"]
+            )
+            features.append({name: round(value, 4) for name, value in normalized.items()})
+        
+        elapsed = time.perf_counter() - started
+        logger.info(f"Visual features extracted in {elapsed:.2f}s for {total_duration:.1f}s of video")
+        return features
+
+# Create global visual feature service instance
+visual_feature_service = VisualFeatureService()
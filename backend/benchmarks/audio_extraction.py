@@ -0,0 +1,98 @@
+"""
+Audio extraction time and size per extraction mode.
+
+Compares the former '-q:a 0' MP3 re-encode with the extraction service's
+stream copy and its 16 kHz mono speech profiles (Opus and FLAC), then checks
+that concurrent consumers of one source share a single extraction.
+
+Usage (from backend/):
+    python -m benchmarks.audio_extraction [source.mp4] [--duration 600]
+
+Without a source, a stereo AAC 160 kbit/s file is encoded with ffmpeg.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import tempfile
+import time
+from app.config import settings
+from app.services.audio_extraction import AudioExtractionService
+from app.services.ffmpeg import find_ffmpeg
+
+def make_source(path: str, duration: float) -> None:
+    subprocess.run(
+        [
+            find_ffmpeg(), "-v", "error", "-y",
+            "-f", "lavfi", "-i", f"sine=frequency=220:sample_rate=44100:duration={duration}",
+            "-f", "lavfi", "-i", f"anoisesrc=color=pink:amplitude=0.1:sample_rate=44100:duration={duration}",
+            "-filter_complex", "[0][1]amix=inputs=2,aformat=channel_layouts=stereo",
+            "-c:a", "aac", "-b:a", "160k",
+            path
+        ],
+        check=True
+    )
+
+def report(label: str, elapsed: float, audio_path: str) -> None:
+    print(f"{label:24} {elapsed:6.2f}s {os.path.getsize(audio_path) / 1e6:7.2f} MB")
+
+def legacy_mp3(source_path: str) -> None:
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
+        audio_path = temp_file.name
+    started = time.perf_counter()
+    subprocess.run(
+        [find_ffmpeg(), "-v", "error", "-y", "-i", source_path, "-q:a", "0", "-map", "a", "-f", "mp3", audio_path],
+        check=True
+    )
+    report("mp3 -q:a 0 (former)", time.perf_counter() - started, audio_path)
+    os.remove(audio_path)
+
+async def service_extract(source_path: str, label: str, stream_copy: bool, profile: str) -> None:
+    settings.audio_extraction_stream_copy = stream_copy
+    settings.audio_extraction_profile = profile
+    service = AudioExtractionService()
+    started = time.perf_counter()
+    audio_path = await service.extract(source_path)
+    report(label, time.perf_counter() - started, audio_path)
+    service.release(source_path)
+
+async def single_flight(source_path: str, consumers: int) -> None:
+    settings.audio_extraction_stream_copy = True
+    service = AudioExtractionService()
+    extractions = 0
+    extract = service._extract
+    
+    def counting_extract(media_path):
+        nonlocal extractions
+        extractions += 1
+        return extract(media_path)
+    
+    service._extract = counting_extract
+    started = time.perf_counter()
+    paths = await asyncio.gather(*(service.extract(source_path) for _ in range(consumers)))
+    elapsed = time.perf_counter() - started
+    print(f"{consumers} concurrent consumers: {extractions} extraction(s), {len(set(paths))} file(s), {elapsed:.2f}s")
+    service.release(source_path)
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", nargs="?", help="Media file with an audio track (default: encode a synthetic one)")
+    parser.add_argument("--duration", type=float, default=600.0, help="Seconds of synthetic audio")
+    args = parser.parse_args()
+    
+    source_path = args.source
+    if not source_path:
+        source_path = os.path.join(tempfile.gettempdir(), f"audio-extraction-benchmark-{int(args.duration)}s.mp4")
+        if not os.path.exists(source_path):
+            print(f"Encoding {args.duration:.0f}s synthetic AAC source to {source_path}")
+            make_source(source_path, args.duration)
+    print(f"source                          {os.path.getsize(source_path) / 1e6:7.2f} MB")
+    
+    legacy_mp3(source_path)
+    await service_extract(source_path, "stream copy", True, "opus")
+    await service_extract(source_path, "16 kHz mono opus 24k", False, "opus")
+    await service_extract(source_path, "16 kHz mono flac", False, "flac")
+    await single_flight(source_path, 4)
+
+if __name__ == "__main__":
+    asyncio.run(main())
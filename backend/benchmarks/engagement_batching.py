@@ -0,0 +1,80 @@
+"""
+Engagement prediction throughput, per-item invokes against the micro-batcher.
+
+Fires concurrent prediction requests at the local stand-in function with a
+fixed per-invoke latency, once invoking the function for every request and once
+through EngagementBatcher, and reports throughput, latency percentiles and the
+number of invokes. Also compares the former full-segment JSON payload with the
+compact feature row.
+
+Usage (from backend/):
+    python -m benchmarks.engagement_batching [--requests 1000] [--latency 0.05]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import numpy as np
+from app.config import settings
+from app.services.engagement_batcher import EngagementBatcher, LocalPredictionFunction, encode_payload, extract_features
+
+SEGMENTS_PER_CONTENT = 30
+
+def make_segments(rng: random.Random) -> list:
+    return [
+        {
+            "start_time": index * 10.0,
+            "end_time": index * 10.0 + rng.uniform(4, 10),
+            "transcript": " ".join(rng.choice(["short", "video", "hook", "value", "audience", "growth"]) for _ in range(60)),
+            "keywords": ["video", "growth", "hook"],
+            "importance_score": round(rng.random(), 4),
+            "engagement_prediction": round(rng.random(), 4)
+        }
+        for index in range(SEGMENTS_PER_CONTENT)
+    ]
+
+async def run(label: str, requests: list, predict) -> None:
+    latencies = []
+    
+    async def timed(row):
+        started = time.perf_counter()
+        await predict(row)
+        latencies.append(time.perf_counter() - started)
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(timed(row) for row in requests))
+    elapsed = time.perf_counter() - started
+    milliseconds = np.array(latencies) * 1000
+    print(
+        f"{label:9} {len(requests) / elapsed:8.0f} req/s  p50 {np.percentile(milliseconds, 50):7.0f} ms  "
+        f"p99 {np.percentile(milliseconds, 99):7.0f} ms"
+    )
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per function invoke")
+    args = parser.parse_args()
+    
+    rng = random.Random(5)
+    segments = make_segments(rng)
+    legacy_payload = json.dumps({"content_id": "content-0", "segments": segments, "content_type": "educational", "metadata": {}})
+    print(f"payload per item: {len(legacy_payload) / 1000:.1f} kB full segments, {len(encode_payload([extract_features(segments, 'educational')]))} B feature row")
+    
+    rows = [extract_features(make_segments(rng), "educational") for _ in range(args.requests)]
+    
+    per_item_function = LocalPredictionFunction(args.latency)
+    await run("per-item", rows, lambda row: per_item_function.invoke(encode_payload([row])))
+    print(f"          {per_item_function.calls} invokes")
+    
+    batched_function = LocalPredictionFunction(args.latency)
+    batcher = EngagementBatcher(batched_function)
+    await run("batched", rows, batcher.predict)
+    print(
+        f"          {batched_function.calls} invokes "
+        f"(window {settings.engagement_batch_window_seconds * 1000:.0f} ms, max size {settings.engagement_batch_max_size})"
+    )
+
+if __name__ == "__main__":
+    asyncio.run(main())
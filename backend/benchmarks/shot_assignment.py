@@ -0,0 +1,85 @@
+"""
+Word and label assignment to Video Intelligence shots.
+
+Builds synthetic annotations (a shot every ~2.4 s, ~2.7 words and ~1.1 label
+segments per second) and times the former per-shot rescan of every word and
+label against _segments_from_shots, checking that both produce the same
+transcripts and keywords for every shot.
+
+Usage (from backend/):
+    python -m benchmarks.shot_assignment [--minutes 15 60 120] [--legacy-max-minutes 120]
+"""
+import argparse
+import random
+import time
+from typing import Any, Dict, List
+from app.services.content_analysis import content_analysis_service
+from app.services.transcript_store import WordTranscript
+
+def make_annotations(minutes: float, rng: random.Random):
+    duration = minutes * 60
+    
+    shots = []
+    cursor = 0.0
+    while cursor < duration:
+        length = round(rng.uniform(0.8, 4.0), 3)
+        shots.append((cursor, round(min(cursor + length, duration), 3)))
+        cursor = round(cursor + length, 3)
+    
+    words = []
+    cursor = 0.0
+    while cursor < duration:
+        length = rng.uniform(0.15, 0.45)
+        words.append({"word": f"w{rng.randrange(5000)}", "start": round(cursor, 3), "end": round(cursor + length, 3)})
+        cursor += length + rng.uniform(0.0, 0.1)
+    
+    labels = []
+    for _ in range(int(duration * 1.1)):
+        start = round(rng.uniform(0, duration), 3)
+        labels.append((start, round(start + rng.uniform(0.2, 3.0), 3), f"label{rng.randrange(400)}"))
+    return shots, words, labels
+
+def legacy_segments(shots, words: List[Dict[str, Any]], labels) -> List[Dict[str, Any]]:
+    """The former loop: every shot rescans every word and every label segment"""
+    segments = []
+    for start_time, end_time in shots:
+        transcript = ""
+        for word in words:
+            if word["start"] >= start_time and word["end"] <= end_time:
+                transcript += word["word"] + " "
+        keywords = []
+        for label_start, label_end, description in labels:
+            if label_start >= start_time and label_end <= end_time:
+                keywords.append(description)
+        segments.append({"transcript": transcript.strip(), "keywords": keywords[:10]})
+    return segments
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, nargs="+", default=[15, 60, 120, 240])
+    parser.add_argument("--legacy-max-minutes", type=float, default=120, help="Skip the former loop beyond this length")
+    args = parser.parse_args()
+    
+    rng = random.Random(7)
+    for minutes in args.minutes:
+        shots, words, labels = make_annotations(minutes, rng)
+        
+        started = time.perf_counter()
+        word_transcript = WordTranscript.from_words(words)
+        segments = content_analysis_service._segments_from_shots(shots, word_transcript, labels)
+        new_seconds = time.perf_counter() - started
+        
+        line = f"{minutes:5.0f} min {len(shots):6} shots {len(words):7} words {len(labels):6} labels  new {new_seconds:7.3f}s"
+        if minutes <= args.legacy_max_minutes:
+            started = time.perf_counter()
+            expected = legacy_segments(shots, words, labels)
+            legacy_seconds = time.perf_counter() - started
+            matches = all(
+                segment["transcript"] == reference["transcript"] and segment["keywords"] == reference["keywords"]
+                for segment, reference in zip(segments, expected)
+            )
+            line += f"  former {legacy_seconds:7.3f}s  identical={matches}"
+        print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+BM25 text search index size and query latency.
+
+Indexes synthetic segments of Zipf-distributed terms spread over many users'
+libraries, then times typical queries against one library: a rare term, a
+common term, three terms, a prefix and a phrase of the two most frequent terms.
+Phrase hits are checked against a brute-force scan of the library.
+
+Usage (from backend/):
+    python -m benchmarks.text_search [--segments 300000] [--users 200]
+"""
+import argparse
+import re
+import time
+import numpy as np
+from app.services.text_search import TextSearchIndex
+
+VOCABULARY_SIZE = 20000
+WORDS_PER_SEGMENT = 40
+SEGMENTS_PER_CONTENT = 30
+QUERY_REPEATS = 50
+
+def make_vocabulary(rng: np.random.Generator) -> list:
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add("".join(rng.choice(letters, size=rng.integers(3, 9))))
+    return sorted(words)
+
+def time_query(index: TextSearchIndex, user_id: str, query: str) -> tuple:
+    index.search(user_id, query)
+    started = time.perf_counter()
+    for _ in range(QUERY_REPEATS):
+        hits = index.search(user_id, query, top_k=10)
+    return (time.perf_counter() - started) / QUERY_REPEATS * 1000, hits
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=300000)
+    parser.add_argument("--users", type=int, default=200)
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(3)
+    vocabulary = make_vocabulary(rng)
+    # Zipf ranks map to vocabulary entries in a random order, so frequency is not alphabetical
+    ranks = rng.permutation(VOCABULARY_SIZE)
+    
+    index = TextSearchIndex()
+    index._loaded = True  # Synthetic data only, skip the stored analyses
+    
+    libraries = {}
+    started = time.perf_counter()
+    content_count = args.segments // SEGMENTS_PER_CONTENT
+    for content_index in range(content_count):
+        user_id = f"user-{content_index % args.users}"
+        draws = np.minimum(rng.zipf(1.1, size=(SEGMENTS_PER_CONTENT, WORDS_PER_SEGMENT)), VOCABULARY_SIZE) - 1
+        segments = [
+            {"transcript": " ".join(vocabulary[ranks[rank]] for rank in row), "start_time": float(i), "end_time": float(i + 1)}
+            for i, row in enumerate(draws.tolist())
+        ]
+        index.add_analysis(user_id, f"content-{content_index}", segments)
+        libraries.setdefault(user_id, []).extend(segment["transcript"] for segment in segments)
+    build_seconds = time.perf_counter() - started
+    
+    stats = index.get_stats()
+    postings = sum(len(posting_list.decode()[0]) for user in index.users.values() for posting_list in user.postings.values())
+    tokens = int(index.lengths[:index.count].sum())
+    raw_bytes = 4 * (2 * postings + tokens)  # document id and frequency per posting, one int32 per position
+    print(f"indexed {stats['documents']} segments for {stats['libraries']} users in {build_seconds:.1f}s")
+    print(f"postings {stats['postings_bytes'] / 1e6:.1f} MB compressed vs {raw_bytes / 1e6:.1f} MB as raw int32")
+    
+    user_id = "user-0"
+    most_frequent = [vocabulary[ranks[rank]] for rank in range(3)]
+    rare = vocabulary[ranks[1000]]
+    queries = {
+        "rare term": rare,
+        "common term": most_frequent[0],
+        "three terms": " ".join(most_frequent),
+        "prefix": most_frequent[1][:2] + "*",
+        "phrase": f'"{most_frequent[0]} {most_frequent[1]}"'
+    }
+    for label, query in queries.items():
+        milliseconds, hits = time_query(index, user_id, query)
+        print(f"{label:12} {query!r:28} {milliseconds:7.2f} ms  {len(hits)} hits")
+    
+    # Every phrase hit must contain the phrase, and the index must not miss any segment that does
+    phrase = f"{most_frequent[0]} {most_frequent[1]}"
+    pattern = re.compile(rf"\b{re.escape(phrase)}\b")
+    expected = sum(1 for transcript in libraries[user_id] if pattern.search(transcript))
+    found = index.search(user_id, f'"{phrase}"', top_k=len(libraries[user_id]))
+    print(f"phrase hits: {len(found)} indexed, {expected} by brute force, all verified={all(pattern.search(hit['text']) for hit in found)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Visual scoring cost against its realtime budget.
+
+Scores consecutive 10 s segments of a 720p30 H.264 clip, once with full
+decoding and once with the configured decoder frame skipping, and reports the
+time taken as a fraction of the media duration. The default budget is
+visual_scoring_max_realtime_fraction (5%) of the scored duration.
+
+Usage (from backend/):
+    python -m benchmarks.visual_scoring [video.mp4] [--duration 120]
+
+Without a video, a synthetic clip is encoded with ffmpeg (libx264, veryfast).
+"""
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+from app.config import settings
+from app.services.ffmpeg import find_ffmpeg
+from app.services.visual_features import VisualFeatureService
+
+SEGMENT_SECONDS = 10.0
+
+def make_clip(path: str, duration: float) -> None:
+    subprocess.run(
+        [
+            find_ffmpeg(), "-v", "error", "-y",
+            "-f", "lavfi", "-i", "testsrc2=size=1280x720:rate=30",
+            "-t", str(duration),
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", "23", "-pix_fmt", "yuv420p",
+            path
+        ],
+        check=True
+    )
+
+def run(video_path: str, duration: float, skip_frame: str, max_realtime_fraction: float) -> None:
+    settings.visual_scoring_skip_frame = skip_frame
+    settings.visual_scoring_max_realtime_fraction = max_realtime_fraction
+    service = VisualFeatureService()
+    segments = [
+        {"start_time": start, "end_time": min(start + SEGMENT_SECONDS, duration)}
+        for start in range(0, int(duration), int(SEGMENT_SECONDS))
+    ]
+    
+    started = time.perf_counter()
+    features = service.extract_features(video_path, segments)
+    elapsed = time.perf_counter() - started
+    
+    scored = sum(1 for segment_features in features if segment_features is not None)
+    print(
+        f"skip_frame={skip_frame or 'none':6} budget={max_realtime_fraction:.0%} "
+        f"elapsed={elapsed:6.2f}s realtime={elapsed / duration:.3f}x scored={scored}/{len(segments)}"
+    )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video", nargs="?", help="H.264 video to score (default: encode a synthetic clip)")
+    parser.add_argument("--duration", type=float, default=120.0, help="Seconds of video to score")
+    args = parser.parse_args()
+    
+    video_path = args.video
+    if not video_path:
+        video_path = os.path.join(tempfile.gettempdir(), f"visual-scoring-benchmark-{int(args.duration)}s.mp4")
+        if not os.path.exists(video_path):
+            print(f"Encoding {args.duration:.0f}s synthetic 720p30 clip to {video_path}")
+            make_clip(video_path, args.duration)
+    
+    budget = settings.visual_scoring_max_realtime_fraction
+    skip_frame = settings.visual_scoring_skip_frame
+    run(video_path, args.duration, "", 1.0)
+    run(video_path, args.duration, skip_frame, 1.0)
+    run(video_path, args.duration, skip_frame, budget)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Keep the services' on-disk caches out of the shared cache directory
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="video-accelerator-tests-"))
@@ -0,0 +1,19 @@
+import numpy as np
+from app.services.duplicate_detection import DuplicateDetector
+
+def test_texts_shorter_than_a_shingle_use_the_whole_text(monkeypatch):
+    monkeypatch.setattr("app.services.duplicate_detection.settings.duplicate_min_words", 2)
+    monkeypatch.setattr("app.services.duplicate_detection.settings.duplicate_shingle_words", 3)
+    detector = DuplicateDetector()
+    
+    first = detector.signature("great hook")
+    
+    assert first is not None
+    assert np.array_equal(detector.signature("Great hook!"), first)
+    assert not np.array_equal(detector.signature("weak hook"), first)
+    assert detector.signature("hook") is None
+
+def test_empty_text_has_no_signature(monkeypatch):
+    monkeypatch.setattr("app.services.duplicate_detection.settings.duplicate_min_words", 0)
+    
+    assert DuplicateDetector().signature("") is None
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import pytest
+from app.services.engagement_batcher import EngagementBatcher, LocalPredictionFunction, extract_features
+
+class RecordingFunction(LocalPredictionFunction):
+    """Local function that records the size of every batch it is invoked with"""
+    
+    def __init__(self):
+        super().__init__()
+        self.batch_sizes = []
+    
+    def _invoke(self, payload):
+        self.batch_sizes.append(len(json.loads(payload)["rows"]))
+        return super()._invoke(payload)
+
+class FailingFunction:
+    name = "failing"
+    
+    async def invoke(self, payload):
+        raise RuntimeError("function failed")
+
+def make_row(segment_count, importance=0.5):
+    segments = [
+        {"start_time": i * 10.0, "end_time": i * 10.0 + 5.0, "importance_score": importance}
+        for i in range(segment_count)
+    ]
+    return extract_features(segments, "educational")
+
+@pytest.fixture
+def batch_settings(monkeypatch):
+    def configure(max_size, window_seconds):
+        monkeypatch.setattr("app.services.engagement_batcher.settings.engagement_batch_max_size", max_size)
+        monkeypatch.setattr("app.services.engagement_batcher.settings.engagement_batch_window_seconds", window_seconds)
+    return configure
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_coalesce_into_one_invoke(batch_settings):
+    batch_settings(64, 0.01)
+    function = RecordingFunction()
+    batcher = EngagementBatcher(function)
+    rows = [make_row(count) for count in range(1, 11)]
+    
+    results = await asyncio.gather(*(batcher.predict(row) for row in rows))
+    
+    assert function.batch_sizes == [10]
+    # Each caller gets its own row of the response
+    expected = json.loads(LocalPredictionFunction()._invoke(json.dumps({"rows": rows}).encode()))["predictions"]
+    assert [list(result) for result in results] == expected
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_without_waiting_for_the_window(batch_settings):
+    batch_settings(4, 10.0)
+    function = RecordingFunction()
+    batcher = EngagementBatcher(function)
+    
+    results = await asyncio.wait_for(asyncio.gather(*(batcher.predict(make_row(3)) for _ in range(8))), timeout=1.0)
+    
+    assert len(results) == 8
+    assert function.batch_sizes == [4, 4]
+
+@pytest.mark.asyncio
+async def test_partial_batch_flushes_when_the_window_expires(batch_settings):
+    batch_settings(64, 0.05)
+    function = RecordingFunction()
+    batcher = EngagementBatcher(function)
+    
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    first = asyncio.ensure_future(batcher.predict(make_row(2)))
+    await asyncio.sleep(0.01)
+    second = asyncio.ensure_future(batcher.predict(make_row(5)))
+    await asyncio.gather(first, second)
+    
+    # The window starts with the first request, so both share the invoke it triggers
+    assert function.batch_sizes == [2]
+    assert 0.05 <= loop.time() - started < 0.5
+    
+    # A later request opens a new window
+    await batcher.predict(make_row(1))
+    assert function.batch_sizes == [2, 1]
+
+@pytest.mark.asyncio
+async def test_failed_invoke_fails_every_waiter(batch_settings):
+    batch_settings(64, 0.01)
+    batcher = EngagementBatcher(FailingFunction())
+    
+    results = await asyncio.gather(*(batcher.predict(make_row(1)) for _ in range(3)), return_exceptions=True)
+    
+    assert all(isinstance(result, RuntimeError) for result in results)
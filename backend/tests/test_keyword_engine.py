@@ -0,0 +1,32 @@
+from app.services.keyword_engine import KeywordEngine
+
+TRANSCRIPTS = {
+    "a": "editing tips for short videos, editing with jump cuts and editing on a phone",
+    "b": "lighting a small studio with one lamp, lighting tips for beginners",
+    "c": "audio tips: clip-on microphones beat camera audio for short videos"
+}
+
+def test_corpus_survives_a_restart():
+    engine = KeywordEngine()
+    for content_id, text in TRANSCRIPTS.items():
+        engine.add_document("tenant-restart", text, content_id)
+    before = engine.extract_keywords("tenant-restart", TRANSCRIPTS["a"])
+    
+    assert before
+    restarted = KeywordEngine()
+    
+    assert restarted.extract_keywords("tenant-restart", TRANSCRIPTS["a"]) == before
+    corpus = restarted.corpora["tenant-restart"]
+    assert corpus.documents == 3
+    assert set(corpus.document_terms) == set(TRANSCRIPTS)
+
+def test_readded_document_replaces_its_persisted_counts():
+    engine = KeywordEngine()
+    engine.add_document("tenant-readd", TRANSCRIPTS["a"], "a")
+    engine.add_document("tenant-readd", TRANSCRIPTS["b"], "a")
+    
+    corpus = KeywordEngine()._corpus("tenant-readd")
+    
+    assert corpus.documents == 1
+    assert corpus.document_frequency[corpus.term_ids["editing"]] == 0
+    assert corpus.document_frequency[corpus.term_ids["lighting"]] == 1
@@ -0,0 +1,29 @@
+import io
+import pytest
+from app.services.lambda_invoker import LambdaInvoker, create_lambda_client
+
+class RecordingClient:
+    def __init__(self, name):
+        self.name = name
+        self.calls = []
+    
+    def invoke(self, FunctionName, InvocationType, Payload):
+        self.calls.append(FunctionName)
+        return {"Payload": io.BytesIO(self.name.encode())}
+
+def test_client_retries_are_bounded_by_total_attempts():
+    client = create_lambda_client(5.0, 1)
+    
+    assert client.meta.config.read_timeout == 5.0
+    assert client.meta.config.retries == {"total_max_attempts": 1, "mode": "standard"}
+
+@pytest.mark.asyncio
+async def test_calls_without_retry_use_the_single_attempt_client():
+    retrying = RecordingClient("retrying")
+    single_attempt = RecordingClient("single")
+    invoker = LambdaInvoker(retrying, single_attempt)
+    
+    assert await invoker.invoke("predict", b"{}", 1.0) == b"retrying"
+    assert await invoker.invoke("train", b"{}", 1.0, hedge=True, retry=False) == b"single"
+    assert retrying.calls == ["predict"]
+    assert single_attempt.calls == ["train"]
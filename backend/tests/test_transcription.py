@@ -0,0 +1,79 @@
+import asyncio
+import pytest
+from app.services import transcription_backends
+from app.services.transcription import transcription_service
+from app.services.transcription_backends import LocalTranscriptionBackend
+
+class ReversedLatencyBackend(LocalTranscriptionBackend):
+    """Local backend that finishes chunks later in the timeline first"""
+    
+    def __init__(self, delays):
+        super().__init__()
+        self.delays = delays
+        self.completed = []
+    
+    async def transcribe(self, audio_file_path, language, duration=None):
+        result = await super().transcribe(audio_file_path, language, duration)
+        await asyncio.sleep(self.delays[audio_file_path])
+        self.completed.append(audio_file_path)
+        return result
+
+@pytest.fixture
+def chunked_service(monkeypatch, tmp_path):
+    """Transcription service cutting fake chunk files, with a backend that completes them in reverse"""
+    monkeypatch.setattr(transcription_backends, "_request_semaphore", None)
+    monkeypatch.setattr("app.services.transcription.settings.transcription_chunk_max_seconds", 14.0)
+    monkeypatch.setattr("app.services.transcription.settings.transcription_chunk_overlap_seconds", 2.0)
+    
+    backend = ReversedLatencyBackend({})
+    chunk_starts = {}
+    
+    def cut_audio_chunk(audio_file_path, start_time, end_time):
+        path = str(tmp_path / f"chunk-{start_time:.3f}.ogg")
+        with open(path, "wb") as chunk_file:
+            chunk_file.write(f"{start_time:.3f}-{end_time:.3f}".encode())
+        chunk_starts[path] = start_time
+        # Earlier chunks take longer, so results arrive in reverse timeline order
+        backend.delays[path] = 0.4 - 0.01 * start_time
+        return path
+    
+    async def detect_speech_intervals(media_path):
+        return {"silence": [{"start_time": 9.0, "end_time": 11.0}, {"start_time": 19.0, "end_time": 21.0}]}
+    
+    monkeypatch.setattr(transcription_service, "_cut_audio_chunk", cut_audio_chunk)
+    monkeypatch.setattr("app.services.transcription.audio_analysis_service.detect_speech_intervals", detect_speech_intervals)
+    monkeypatch.setattr(transcription_service, "backend", backend)
+    return transcription_service, backend, chunk_starts
+
+@pytest.mark.asyncio
+async def test_chunked_transcription_stitches_out_of_order_results(chunked_service, tmp_path):
+    service, backend, chunk_starts = chunked_service
+    source = tmp_path / "source.ogg"
+    source.write_bytes(b"\0" * 1000)
+    
+    result = await service._transcribe_chunked(str(source), 30.0, "en")
+    
+    assert result["success"] and result["chunks"] == 3
+    assert [chunk_starts[path] for path in backend.completed] == sorted(chunk_starts.values(), reverse=True)
+    
+    # Words come back on the source timeline, in order, without overlap duplicates
+    starts = [word["start"] for word in result["words"]]
+    assert starts == sorted(starts)
+    assert len(starts) == len(set(starts))
+    assert 0.0 <= starts[0] and result["words"][-1]["end"] <= 30.0
+    assert result["text"] == " ".join(word["word"] for word in result["words"])
+
+def test_stitch_keeps_owned_words_only():
+    plan = [
+        {"keep_start": 0.0, "keep_end": 10.0, "start": 0.0, "end": 12.0},
+        {"keep_start": 10.0, "keep_end": 20.0, "start": 8.0, "end": 20.0}
+    ]
+    results = [
+        {"words": [{"word": "a", "start": 1.0, "end": 1.5}, {"word": "b", "start": 10.5, "end": 11.0}]},
+        {"words": [{"word": "b", "start": 2.5, "end": 3.0}, {"word": "c", "start": 5.0, "end": 5.5}]}
+    ]
+    
+    stitched = transcription_service._stitch_chunks(plan, results)
+    
+    assert [(word["word"], word["start"]) for word in stitched["words"]] == [("a", 1.0), ("b", 10.5), ("c", 13.0)]
+    assert stitched["text"] == "a b c"
@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+from app.services import transcription_backends
+from app.services.transcription import transcription_service
+from app.services.transcription_backends import LocalTranscriptionBackend
+
+class InFlightBackend(LocalTranscriptionBackend):
+    """Local backend with latency that records how many requests overlap"""
+    
+    def __init__(self):
+        super().__init__(latency_factor=0.01)
+        self.in_flight = 0
+        self.max_in_flight = 0
+    
+    async def transcribe(self, audio_file_path, language, duration=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return await super().transcribe(audio_file_path, language, duration)
+        finally:
+            self.in_flight -= 1
+
+@pytest.fixture
+def audio_files(tmp_path):
+    paths = []
+    for index in range(8):
+        path = tmp_path / f"audio-{index}.ogg"
+        path.write_bytes(bytes([index]) * 2000)
+        paths.append(str(path))
+    return paths
+
+@pytest.mark.asyncio
+async def test_local_backend_is_deterministic(audio_files):
+    backend = LocalTranscriptionBackend()
+    
+    first = await backend.transcribe(audio_files[0], "en", 5.0)
+    again = await backend.transcribe(audio_files[0], "en", 5.0)
+    other = await backend.transcribe(audio_files[1], "en", 5.0)
+    
+    assert first == again
+    assert first["words"] != other["words"]
+    assert first["words"][-1]["end"] <= 5.0
+
+@pytest.mark.asyncio
+async def test_shared_semaphore_bounds_concurrent_requests(monkeypatch, audio_files):
+    monkeypatch.setattr(transcription_backends, "_request_semaphore", None)
+    monkeypatch.setattr(transcription_backends.settings, "transcription_max_concurrency", 3)
+    backend = InFlightBackend()
+    monkeypatch.setattr(transcription_service, "backend", backend)
+    
+    # Two independent callers share the process-wide limit
+    first = [transcription_service._transcribe_chunk(path, "en", 5.0) for path in audio_files[:4]]
+    second = [transcription_service._transcribe_chunk(path, "en", 5.0) for path in audio_files[4:]]
+    results = await asyncio.gather(*first, *second)
+    
+    assert len(results) == len(audio_files)
+    assert backend.max_in_flight == 3
+    assert backend.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_backend_requests_run_concurrently(monkeypatch, audio_files):
+    monkeypatch.setattr(transcription_backends, "_request_semaphore", None)
+    monkeypatch.setattr(transcription_backends.settings, "transcription_max_concurrency", len(audio_files))
+    backend = LocalTranscriptionBackend(latency_factor=0.02)
+    monkeypatch.setattr(transcription_service, "backend", backend)
+    
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await asyncio.gather(*(transcription_service._transcribe_chunk(path, "en", 5.0) for path in audio_files))
+    elapsed = loop.time() - started
+    
+    # Each request waits 0.1s; run serially they would take 0.8s
+    assert elapsed < 0.4